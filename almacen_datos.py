@@ -0,0 +1,210 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - ALMACÉN DE DATOS                                        ║
+║  Dataset enriquecido compartido por todas las sesiones del proceso            ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Hay un único almacén por proceso (expuesto con `st.cache_resource`). Cada
+cambio del payload publica una nueva `VersionDatos` inmutable; las sesiones
+solo guardan el número de versión y el estado de sus filtros.
+
+Los DataFrames publicados son de solo lectura por convención: quien necesite
+agregar columnas debe trabajar sobre `df.copy(deep=False)`.
+
+`RefrescadorDatos` mantiene el almacén al día desde un hilo en segundo plano
+(uno por proceso): consulta la fuente, enriquece y publica la nueva versión.
+Los renders solo leen `almacen.actual`, nunca esperan a la red.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from cambios_filas import EstadoIncremental, actualizar_incremental
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# VERSIONES
+# ============================================================================
+
+
+@dataclass(frozen=True)
+class VersionDatos:
+    """Snapshot inmutable del dataset enriquecido."""
+
+    version: int
+    huella: Optional[str]
+    df: pd.DataFrame
+    actualizado: datetime
+    cambios: Dict[str, int] = field(default_factory=dict)
+
+
+class AlmacenDatos:
+    """Dataset versionado y compartido; las actualizaciones se serializan."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estado: Optional[EstadoIncremental] = None
+        self._actual: Optional[VersionDatos] = None
+        # Huella del último payload procesado (aunque no publicara versión)
+        self._huella: Optional[str] = None
+
+    @property
+    def actual(self) -> Optional[VersionDatos]:
+        """Última versión publicada (None si aún no hay datos)."""
+        return self._actual
+
+    def actualizar(
+        self,
+        registros: List[dict],
+        huella: Optional[str],
+        procesar: Callable[[pd.DataFrame], pd.DataFrame],
+    ) -> VersionDatos:
+        """
+        Publica una nueva versión si el contenido del payload cambió.
+
+        Si varias sesiones llegan a la vez con el mismo payload, solo la
+        primera lo procesa; las demás reciben la versión ya publicada. Un
+        payload con huella nueva pero sin filas cambiadas tampoco publica: se
+        conserva la versión (y los caches que dependen de ella).
+        """
+        actual = self._actual
+        if actual is not None and huella is not None and self._huella == huella:
+            return actual
+
+        with self._lock:
+            actual = self._actual
+            if actual is not None and huella is not None and self._huella == huella:
+                return actual
+
+            estado, cambios = actualizar_incremental(self._estado, registros, procesar)
+            self._huella = huella
+            if actual is not None and estado is self._estado:
+                logger.info("📦 Payload sin cambios por fila; se mantiene la versión")
+                return actual
+
+            self._estado = estado
+            self._actual = VersionDatos(
+                version=(actual.version + 1) if actual else 1,
+                huella=huella,
+                df=estado.df,
+                actualizado=datetime.now(),
+                cambios=cambios,
+            )
+            logger.info(
+                f"📦 Dataset v{self._actual.version} publicado ({len(estado.df):,} filas)"
+            )
+            return self._actual
+
+
+# ============================================================================
+# REFRESCO EN SEGUNDO PLANO
+# ============================================================================
+
+
+@dataclass(frozen=True)
+class EstadoRefresco:
+    """Resumen del refrescador para mostrar en la UI."""
+
+    ultimo_intento: Optional[datetime]
+    ultimo_exito: Optional[datetime]
+    ultimo_error: Optional[str]
+    refrescos: int
+    fallos: int
+
+
+class RefrescadorDatos:
+    """
+    Hilo daemon que consulta la fuente cada `intervalo` segundos y publica
+    en el almacén las versiones nuevas.
+
+    Args:
+        almacen: Almacén donde se publican las versiones
+        fuente: Función sin argumentos que devuelve (registros, huella, error)
+        procesar: Enriquecimiento del DataFrame (como en `actualizar`)
+        intervalo: Segundos entre consultas
+    """
+
+    def __init__(
+        self,
+        almacen: AlmacenDatos,
+        fuente: Callable[[], Tuple[Optional[List[dict]], Optional[str], Optional[str]]],
+        procesar: Callable[[pd.DataFrame], pd.DataFrame],
+        intervalo: float = 30.0,
+    ):
+        self.almacen = almacen
+        self.fuente = fuente
+        self.procesar = procesar
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self._primera = threading.Event()
+        self._ultimo_intento: Optional[datetime] = None
+        self._ultimo_exito: Optional[datetime] = None
+        self._ultimo_error: Optional[str] = None
+        self._refrescos = 0
+        self._fallos = 0
+
+    def iniciar(self) -> "RefrescadorDatos":
+        """Arranca el hilo (solo la primera vez)."""
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._detener.clear()
+                self._hilo = threading.Thread(
+                    target=self._bucle, name="refrescador-datos", daemon=True
+                )
+                self._hilo.start()
+        return self
+
+    def detener(self, timeout: Optional[float] = None):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            self.refrescar()
+            self._detener.wait(self.intervalo)
+
+    def refrescar(self) -> Optional[VersionDatos]:
+        """Una consulta a la fuente; publica si el payload cambió."""
+        self._ultimo_intento = datetime.now()
+        try:
+            registros, huella, error = self.fuente()
+            if registros:
+                datos = self.almacen.actualizar(registros, huella, self.procesar)
+                self._ultimo_exito = datetime.now()
+                self._ultimo_error = None
+                self._refrescos += 1
+                return datos
+            self._ultimo_error = error or "Respuesta vacía"
+        except Exception as e:
+            self._ultimo_error = str(e)
+            logger.exception("❌ Error refrescando datos")
+        finally:
+            self._primera.set()
+
+        self._fallos += 1
+        logger.warning(f"⚠️ Refresco fallido: {self._ultimo_error}")
+        return self.almacen.actual
+
+    def esperar_primera(self, timeout: Optional[float] = None) -> Optional[VersionDatos]:
+        """Bloquea hasta el primer intento (arranque en frío) y devuelve el snapshot."""
+        self._primera.wait(timeout)
+        return self.almacen.actual
+
+    @property
+    def estado(self) -> EstadoRefresco:
+        return EstadoRefresco(
+            ultimo_intento=self._ultimo_intento,
+            ultimo_exito=self._ultimo_exito,
+            ultimo_error=self._ultimo_error,
+            refrescos=self._refrescos,
+            fallos=self._fallos,
+        )
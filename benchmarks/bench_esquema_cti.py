@@ -0,0 +1,98 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  BENCHMARK - ESQUEMA CTI COMPACTO                                             ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Memoria del CTI enriquecido antes y después de `compactar_cti`, y tiempo de
+value_counts y máscaras de filtro sobre ambas versiones.
+
+Uso:
+    python3 benchmarks/bench_esquema_cti.py --filas 1000000
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from esquema_cti import compactar_cti, mascara_campana, memoria_mb
+
+
+def generar_cti(filas: int, seed: int = 42) -> pd.DataFrame:
+    """CTI enriquecido sintético con los tipos que deja procesar_datos_sheets."""
+    rng = np.random.default_rng(seed)
+    prob = rng.beta(2, 5, filas)
+    saldo = rng.integers(50_000, 20_000_000, filas).astype(np.float64)
+    return pd.DataFrame(
+        {
+            "cedula": rng.integers(10**7, 10**8, filas).astype(str),
+            "campaign": rng.choice(["true", "false"], filas).astype(object),
+            "producto": rng.choice(
+                ["Tarjeta de Crédito", "Crédito Personal", "Hipotecario", "Crédito Vehicular"],
+                filas,
+            ).astype(object),
+            "Tipo Cartera": rng.choice(["Consumo", "Vivienda"], filas).astype(object),
+            "dias mora": rng.integers(1, 400, filas).astype(np.float64),
+            "Saldo en mora": saldo,
+            "Saldo total": saldo * 1.3,
+            "probabilidad_pago_SIMULADA": prob,
+            "segmento_SIMULADO": np.select(
+                [prob >= 0.75, prob >= 0.5, prob >= 0.25], ["A", "B", "C"], "D"
+            ).astype(object),
+            "mecanismo_detectado": rng.choice(
+                ["NOVACION", "CONSOLIDACION", "ACUERDO_PAGO", "DESCUENTO"], filas
+            ).astype(object),
+            "valor_esperado_SIMULADO": prob * saldo,
+            "GAC_proyectado": saldo * 0.1,
+        }
+    )
+
+
+def medir(df: pd.DataFrame, repeticiones: int = 5) -> dict:
+    """Mejor tiempo (ms) de las operaciones típicas del dashboard."""
+    operaciones = {
+        "value_counts segmento": lambda: df["segmento_SIMULADO"].value_counts(),
+        "value_counts producto": lambda: df["producto"].value_counts(),
+        "máscara campaña": lambda: mascara_campana(df["campaign"]),
+        "isin segmento": lambda: df["segmento_SIMULADO"].isin(["A", "B"]),
+        "== producto": lambda: df["producto"] == "Hipotecario",
+    }
+    tiempos = {}
+    for nombre, op in operaciones.items():
+        mejores = []
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            op()
+            mejores.append(time.perf_counter() - t0)
+        tiempos[nombre] = min(mejores) * 1000
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark esquema CTI")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = generar_cti(args.filas)
+    antes_mb = memoria_mb(df)
+    antes = medir(df)
+
+    compacto = df.copy()
+    reporte = compactar_cti(compacto)
+    despues_mb = memoria_mb(compacto)
+    despues = medir(compacto)
+
+    print(f"💾 Memoria total: {antes_mb:.1f} MB → {despues_mb:.1f} MB")
+    print(f"   Columnas convertidas: {reporte['antes_mb']:.1f} MB → {reporte['despues_mb']:.1f} MB")
+    print(f"{'Operación':<24}{'object (ms)':>12}{'compacto (ms)':>15}")
+    for nombre in antes:
+        print(f"{nombre:<24}{antes[nombre]:>12.1f}{despues[nombre]:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
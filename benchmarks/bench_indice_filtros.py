@@ -0,0 +1,79 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  BENCHMARK - ÍNDICE DE FILTROS                                                ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Latencia de los filtros del sidebar: máscaras booleanas encadenadas frente a
+`IndiceFiltros.resolver`, verificando que ambas devuelvan las mismas filas.
+
+Uso:
+    python3 benchmarks/bench_indice_filtros.py --filas 1000000
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_esquema_cti import generar_cti
+from esquema_cti import compactar_cti, mascara_campana
+from indice_filtros import IndiceFiltros
+
+COMBINACIONES = [
+    ("sin filtros", dict()),
+    ("con campaña", dict(campana=True)),
+    ("segmentos A+B", dict(segmentos=["A", "B"])),
+    ("mora 30-90", dict(mora=(30, 90))),
+    ("mora 1-15 + producto", dict(mora=(1, 15), producto="Hipotecario")),
+    ("todo combinado", dict(campana=False, segmentos=["C", "D"], mora=(60, 300), producto="Crédito Personal")),
+]
+
+
+def filtrar_mascaras(df, campana=None, segmentos=None, mora=None, producto=None):
+    """Filtros como los aplicaba el sidebar antes del índice."""
+    df_f = df.copy(deep=False)
+    if campana is not None:
+        df_f = df_f[mascara_campana(df_f["campaign"]) == campana]
+    if segmentos:
+        df_f = df_f[df_f["segmento_SIMULADO"].isin(segmentos)]
+    if mora is not None:
+        df_f = df_f[(df_f["dias mora"] >= mora[0]) & (df_f["dias mora"] <= mora[1])]
+    if producto is not None:
+        df_f = df_f[df_f["producto"] == producto]
+    return df_f
+
+
+def mejor_ms(funcion, repeticiones=5):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos) * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark índice de filtros")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = generar_cti(args.filas)
+    compactar_cti(df)
+
+    t_indice, indice = mejor_ms(lambda: IndiceFiltros.construir(df), repeticiones=1)
+    print(f"🔧 Índice construido en {t_indice:.0f} ms ({args.filas:,} filas)")
+    print(f"{'Filtro':<24}{'máscaras (ms)':>14}{'índice (ms)':>13}{'filas':>10}")
+
+    for nombre, filtros in COMBINACIONES:
+        t_mascaras, df_f = mejor_ms(lambda: filtrar_mascaras(df, **filtros))
+        t_resolver, pos = mejor_ms(lambda: indice.resolver(**filtros))
+        assert np.array_equal(pos, df.index.get_indexer(df_f.index)), nombre
+        print(f"{nombre:<24}{t_mascaras:>14.1f}{t_resolver:>13.2f}{len(pos):>10,}")
+
+
+if __name__ == "__main__":
+    main()
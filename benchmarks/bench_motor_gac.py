@@ -0,0 +1,83 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  BENCHMARK - MOTOR GAC VECTORIZADO                                            ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Compara el cálculo vectorizado contra el recorrido fila a fila original y mide
+el tiempo sobre un CTI sintético.
+
+Uso:
+    python3 benchmarks/bench_motor_gac.py --filas 1000000
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motor_gac import TABLA_GAC_DEFAULT, cargar_tabla_gac, calcular_gac_vectorizado
+
+
+def gac_fila_a_fila(dias_mora, saldo_mora):
+    """Implementación original (bucle por fila y búsqueda lineal en la tabla)."""
+    valores = []
+    for dias, saldo in zip(dias_mora, saldo_mora):
+        gac = 0
+        for (min_dias, max_dias), config in TABLA_GAC_DEFAULT.items():
+            if min_dias <= dias <= max_dias:
+                gac_calc = saldo * config["tarifa"]
+                gac = max(config["min"], min(gac_calc, config["max"]))
+                break
+        valores.append(gac)
+    return valores
+
+
+def generar_cti(filas: int, seed: int = 42):
+    """Genera días de mora y saldos sintéticos, con algunos casos borde."""
+    rng = np.random.default_rng(seed)
+    dias = rng.integers(-5, 400, filas).astype(np.float64)
+    saldo = rng.lognormal(13, 1.2, filas).round()
+    dias[::97] = np.nan
+    dias[1::89] = 10.5
+    saldo[::113] = np.nan
+    return dias, saldo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark motor GAC")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--muestra", type=int, default=50_000)
+    args = parser.parse_args()
+
+    tabla = cargar_tabla_gac()
+    dias, saldo = generar_cti(args.filas)
+
+    # Equivalencia sobre una muestra
+    n = min(args.muestra, args.filas)
+    t0 = time.perf_counter()
+    esperado = np.array(gac_fila_a_fila(dias[:n], saldo[:n]), dtype=np.float64)
+    t_loop = time.perf_counter() - t0
+    obtenido = calcular_gac_vectorizado(dias[:n], saldo[:n], tabla)
+    np.testing.assert_array_equal(obtenido, esperado)
+    print(f"✅ Equivalencia verificada en {n:,} filas")
+    print(f"   Bucle original: {t_loop * 1000:.1f} ms ({t_loop / n * 1e6:.2f} µs/fila)")
+
+    tiempos = []
+    for _ in range(args.repeticiones):
+        t0 = time.perf_counter()
+        calcular_gac_vectorizado(dias, saldo, tabla)
+        tiempos.append(time.perf_counter() - t0)
+
+    print(
+        f"⚡ Vectorizado {args.filas:,} filas: "
+        f"mejor {min(tiempos) * 1000:.1f} ms | mediana {np.median(tiempos) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  BENCHMARK - MOTOR DE MÉTRICAS                                                ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Tiempo de las métricas del dashboard por combinación de filtros: la versión
+pandas (sum/mean/value_counts/pd.cut sobre el DataFrame filtrado) frente a
+`BaseMetricas.calcular` sobre las posiciones del índice y el roll-up de
+`CuboKPI` (si el rango de mora alinea con los tramos), verificando que todas
+den los mismos valores.
+
+Uso:
+    python3 benchmarks/bench_motor_metricas.py --filas 1000000
+"""
+
+import sys
+import math
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_esquema_cti import generar_cti
+from bench_indice_filtros import COMBINACIONES, mejor_ms
+from esquema_cti import compactar_cti, conteos, mascara_campana
+from indice_filtros import IndiceFiltros
+from motor_metricas import BaseMetricas
+from cubo_kpi import CuboKPI
+
+
+def calcular_metricas_pandas(df):
+    """calcular_metricas como estaba antes del motor (una pasada por métrica)."""
+    m = {}
+
+    # Básicas
+    m["total"] = len(df)
+    m["gac_total"] = df["GAC_proyectado"].sum() if "GAC_proyectado" in df.columns else 0
+    m["gac_promedio"] = (
+        df["GAC_proyectado"].mean() if "GAC_proyectado" in df.columns else 0
+    )
+
+    # Campañas
+    if "campaign" in df.columns:
+        m["con_campana"] = int(mascara_campana(df["campaign"]).sum())
+        m["sin_campana"] = m["total"] - m["con_campana"]
+        m["pct_campana"] = m["con_campana"] / m["total"] * 100 if m["total"] > 0 else 0
+    else:
+        m["con_campana"], m["sin_campana"], m["pct_campana"] = 0, m["total"], 0
+
+    # Probabilidad
+    prob_col = (
+        "probabilidad_pago_ML"
+        if "probabilidad_pago_ML" in df.columns
+        else "probabilidad_pago_SIMULADA"
+    )
+    if prob_col in df.columns:
+        m["prob_media"] = df[prob_col].mean() * 100
+        m["prob_max"] = df[prob_col].max() * 100
+        m["prob_min"] = df[prob_col].min() * 100
+    else:
+        m["prob_media"], m["prob_max"], m["prob_min"] = 0, 0, 0
+
+    # Segmentos
+    seg_col = "segmento_ML" if "segmento_ML" in df.columns else "segmento_SIMULADO"
+    m["segmentos"] = conteos(df[seg_col]) if seg_col in df.columns else {}
+
+    # Mecanismos
+    m["mecanismos"] = (
+        conteos(df["mecanismo_detectado"]) if "mecanismo_detectado" in df.columns else {}
+    )
+
+    # Productos
+    prod_col = "producto" if "producto" in df.columns else "Tipo Producto"
+    m["productos"] = conteos(df[prod_col]) if prod_col in df.columns else {}
+
+    # Mora
+    if "dias mora" in df.columns:
+        bins = [0, 10, 30, 60, 90, 9999]
+        labels = ["1-10", "11-30", "31-60", "61-90", ">90"]
+        mora_cat = pd.cut(df["dias mora"], bins=bins, labels=labels)
+        m["mora_dist"] = mora_cat.value_counts().to_dict()
+        m["mora_promedio"] = df["dias mora"].mean()
+    else:
+        m["mora_dist"], m["mora_promedio"] = {}, 0
+
+    # Requiere pago
+    if "requiere_pago" in df.columns:
+        m["req_pago"] = (df["requiere_pago"] == True).sum()
+        m["no_req_pago"] = m["total"] - m["req_pago"]
+    else:
+        m["req_pago"], m["no_req_pago"] = 0, 0
+
+    # Valor esperado
+    val_col = (
+        "valor_esperado_ML"
+        if "valor_esperado_ML" in df.columns
+        else "valor_esperado_SIMULADO"
+    )
+    m["valor_esperado_total"] = df[val_col].sum() if val_col in df.columns else 0
+
+    return m
+
+
+def iguales(a, b) -> bool:
+    """`a` tiene al menos las claves de `b`, con los mismos valores."""
+    if isinstance(b, dict):
+        return all(k in a and iguales(a[k], b[k]) for k in b)
+    if b is None or isinstance(b, np.ndarray):
+        return np.array_equal(a, b) if b is not None else a is None
+    return math.isclose(float(a), float(b), rel_tol=1e-6, abs_tol=1e-6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark motor de métricas")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = generar_cti(args.filas)
+    df["requiere_pago"] = df["mecanismo_detectado"] != "DESCUENTO"
+    compactar_cti(df)
+    indice = IndiceFiltros.construir(df)
+
+    t_base, base = mejor_ms(lambda: BaseMetricas.construir(df), repeticiones=1)
+    t_cubo, cubo = mejor_ms(lambda: CuboKPI.construir(df, base), repeticiones=1)
+    print(f"🔧 Base de métricas construida en {t_base:.0f} ms ({args.filas:,} filas)")
+    print(f"🧊 Cubo {cubo.forma} construido en {t_cubo:.0f} ms")
+    print(f"{'Filtro':<24}{'pandas (ms)':>12}{'motor (ms)':>12}{'cubo (ms)':>11}{'filas':>10}")
+
+    for nombre, filtros in COMBINACIONES:
+        pos = indice.resolver(**filtros)
+        t_pandas, esperado = mejor_ms(lambda: calcular_metricas_pandas(df.take(pos)))
+        t_motor, m = mejor_ms(lambda: base.calcular(pos))
+        t_cubo, m_cubo = mejor_ms(lambda: cubo.metricas(**filtros))
+        assert iguales(m, esperado), nombre
+        assert m_cubo is None or iguales(m_cubo, m), nombre
+        cubo_ms = f"{t_cubo:.2f}" if m_cubo is not None else "filas"
+        print(f"{nombre:<24}{t_pandas:>12.1f}{t_motor:>12.1f}{cubo_ms:>11}{len(pos):>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - CACHE DE AUDIO                                          ║
+║  Grabaciones en disco con tope de tamaño (LRU) y vista previa Opus opcional   ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+La grabación se descarga por bloques directamente a un archivo (nunca está
+entera en un objeto `bytes` de Python). Las reproducciones siguientes salen del
+disco sin llamar a ElevenLabs.
+
+El directorio por defecto es `static/audio/` junto a este módulo (el mismo
+`static/` que Streamlit sirve en `/app/static/` para `dashboard.py`, con
+`enableStaticServing` en `.streamlit/config.toml`): el reproductor recibe la
+URL del archivo, con soporte de rangos para saltar. Si el directorio está
+fuera de `static/`, `st.audio(ruta)` carga el archivo completo en la memoria
+de Streamlit; la descarga del MP3 siempre lo hace.
+
+Esas URLs no pasan por la sesión de Streamlit, así que cada archivo se guarda
+con un token aleatorio en el nombre (`<conversation_id>.<token>.mp3`): solo
+puede pedirlo quien recibió la URL desde el dashboard. Los archivos sin token
+(nombres predecibles de versiones anteriores) se borran al arrancar.
+
+    - Tope: MAX_BYTES_AUDIO en total; al superarlo se borran las grabaciones
+      usadas hace más tiempo (la fecha de modificación marca el último uso)
+    - Vista previa: si hay `ffmpeg` en el PATH, una copia Opus a BITRATE_OPUS
+      para escuchar rápido; la descarga sigue siendo el MP3 original
+
+Uso:
+    cache = CacheAudio()
+    ruta, error = cache.obtener(conversation_id, API_KEY)
+    preview = cache.vista_previa(conversation_id, ruta)  # None sin ffmpeg
+"""
+
+import logging
+import os
+import re
+import secrets
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from cliente_http import CLIENTE_HTTP, REQUESTS_AVAILABLE
+from historial_conversaciones import URL_CONVERSACIONES
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+DIR_AUDIO = os.getenv(
+    "AUDIO_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "audio"),
+)
+MAX_BYTES_AUDIO = int(os.getenv("AUDIO_CACHE_MB", "512")) * 1024 * 1024
+TAMANO_BLOQUE = 64 * 1024  # bytes escritos por iteración
+BITRATE_OPUS = "24k"
+
+FFMPEG = shutil.which("ffmpeg")
+OPUS_AVAILABLE = FFMPEG is not None
+
+_ID_VALIDO = re.compile(r"^[A-Za-z0-9_-]+$")
+# <conversation_id>.<token>.<extensión>; token_urlsafe no usa "."
+_ARCHIVO_VALIDO = re.compile(r"^([A-Za-z0-9_-]+)\.([A-Za-z0-9_-]{32})\.(mp3|opus\.ogg)$")
+BYTES_TOKEN = 24  # 32 caracteres base64url
+
+# ============================================================================
+# NOMBRES
+# ============================================================================
+
+
+def _con_token(nombre: str) -> str:
+    """`<id>.mp3` → `<id>.<token>.mp3` con un token aleatorio nuevo."""
+    conversation_id, extension = nombre.split(".", 1)
+    return f"{conversation_id}.{secrets.token_urlsafe(BYTES_TOKEN)}.{extension}"
+
+
+def _logico(archivo: str) -> str:
+    """`<id>.<token>.mp3` → `<id>.mp3`."""
+    conversation_id, _, extension = archivo.split(".", 2)
+    return f"{conversation_id}.{extension}"
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+
+class CacheAudio:
+    """Archivos de audio por conversation_id, acotados por bytes con LRU."""
+
+    def __init__(self, directorio: str = DIR_AUDIO, max_bytes: int = MAX_BYTES_AUDIO):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._descargas: Dict[str, threading.Lock] = {}
+        self.estadisticas = {"aciertos": 0, "descargas": 0, "expulsados": 0}
+
+        # Índice LRU (archivo → bytes) reconstruido del disco, del más viejo al más
+        # nuevo; se borran los .part (descargas interrumpidas) y los nombres sin token
+        archivos = []
+        for e in os.scandir(directorio):
+            if not e.is_file():
+                continue
+            if _ARCHIVO_VALIDO.match(e.name):
+                archivos.append(e)
+            else:
+                os.remove(e.path)
+        archivos.sort(key=lambda e: e.stat().st_mtime)
+        self._archivos: "OrderedDict[str, int]" = OrderedDict(
+            (e.name, e.stat().st_size) for e in archivos
+        )
+        self._bytes = sum(self._archivos.values())
+        # Nombre lógico (<conversation_id>.mp3) → archivo con token
+        self._nombres: Dict[str, str] = {_logico(n): n for n in self._archivos}
+
+    @property
+    def bytes_usados(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._archivos)
+
+    def _ruta(self, nombre: str) -> str:
+        return os.path.join(self.directorio, nombre)
+
+    def _usar(self, nombre: str) -> Optional[str]:
+        """Marca el archivo como recién usado; None si no está en cache."""
+        with self._lock:
+            archivo = self._nombres.get(nombre)
+            if archivo is None:
+                return None
+            self._archivos.move_to_end(archivo)
+        ruta = self._ruta(archivo)
+        try:
+            os.utime(ruta)
+        except FileNotFoundError:
+            with self._lock:
+                self._bytes -= self._archivos.pop(archivo, 0)
+                self._nombres.pop(nombre, None)
+            return None
+        return ruta
+
+    def _registrar(self, nombre: str, archivo: str):
+        """Añade un archivo recién escrito y expulsa los más viejos si hace falta."""
+        tamano = os.path.getsize(self._ruta(archivo))
+        with self._lock:
+            self._bytes += tamano
+            self._archivos[archivo] = tamano
+            self._nombres[nombre] = archivo
+            while self._bytes > self.max_bytes and len(self._archivos) > 1:
+                viejo, bytes_viejo = self._archivos.popitem(last=False)
+                self._bytes -= bytes_viejo
+                self._nombres.pop(_logico(viejo), None)
+                self.estadisticas["expulsados"] += 1
+                try:
+                    os.remove(self._ruta(viejo))
+                except FileNotFoundError:
+                    pass
+
+    def _lock_descarga(self, nombre: str) -> threading.Lock:
+        with self._lock:
+            return self._descargas.setdefault(nombre, threading.Lock())
+
+    # ------------------------------------------------------------------
+    # Grabación original
+    # ------------------------------------------------------------------
+
+    def obtener(
+        self, conversation_id: str, api_key: str
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Ruta del MP3 de la conversación, descargándolo si no está en cache.
+
+        Returns:
+            (ruta, error)
+        """
+        if not _ID_VALIDO.match(conversation_id or ""):
+            return None, "ID de conversación inválido"
+
+        nombre = f"{conversation_id}.mp3"
+        ruta = self._usar(nombre)
+        if ruta is not None:
+            self.estadisticas["aciertos"] += 1
+            return ruta, None
+
+        # Una sola descarga por conversación aunque varias sesiones la pidan
+        with self._lock_descarga(nombre):
+            ruta = self._usar(nombre)
+            if ruta is not None:
+                self.estadisticas["aciertos"] += 1
+                return ruta, None
+            archivo = _con_token(nombre)
+            error = self._descargar(conversation_id, archivo, api_key)
+            if error:
+                return None, error
+            self._registrar(nombre, archivo)
+            self.estadisticas["descargas"] += 1
+            return self._ruta(archivo), None
+
+    def _descargar(self, conversation_id: str, archivo: str, api_key: str) -> Optional[str]:
+        if not REQUESTS_AVAILABLE:
+            return "Requests no disponible"
+
+        parcial = self._ruta(archivo + ".part")
+        try:
+            with CLIENTE_HTTP.get(
+                f"{URL_CONVERSACIONES}/{conversation_id}/audio",
+                endpoint="elevenlabs.audio",
+                headers={"xi-api-key": api_key},
+                timeout=30,
+                stream=True,
+            ) as response:
+                if response.status_code != 200:
+                    return f"Error {response.status_code}"
+                with open(parcial, "wb") as salida:
+                    for bloque in response.iter_content(chunk_size=TAMANO_BLOQUE):
+                        salida.write(bloque)
+            os.replace(parcial, self._ruta(archivo))
+            return None
+        except Exception as e:
+            return str(e)
+        finally:
+            if os.path.exists(parcial):
+                os.remove(parcial)
+
+    # ------------------------------------------------------------------
+    # Vista previa Opus
+    # ------------------------------------------------------------------
+
+    def vista_previa(self, conversation_id: str, ruta_mp3: str) -> Optional[str]:
+        """Ruta de la copia Opus (la crea si falta); None sin ffmpeg o si falla."""
+        if not OPUS_AVAILABLE or not _ID_VALIDO.match(conversation_id or ""):
+            return None
+
+        nombre = f"{conversation_id}.opus.ogg"
+        ruta = self._usar(nombre)
+        if ruta is not None:
+            return ruta
+
+        with self._lock_descarga(nombre):
+            ruta = self._usar(nombre)
+            if ruta is not None:
+                return ruta
+            archivo = _con_token(nombre)
+            parcial = self._ruta(archivo + ".part")
+            try:
+                comando = [FFMPEG, "-y", "-loglevel", "error", "-i", ruta_mp3, "-vn"]
+                comando += ["-c:a", "libopus", "-b:a", BITRATE_OPUS, "-f", "ogg", parcial]
+                subprocess.run(comando, check=True, timeout=60)
+                os.replace(parcial, self._ruta(archivo))
+            except (subprocess.SubprocessError, OSError) as e:
+                logger.warning(f"⚠️ Vista previa Opus falló para {conversation_id}: {e}")
+                return None
+            finally:
+                if os.path.exists(parcial):
+                    os.remove(parcial)
+            self._registrar(nombre, archivo)
+            return self._ruta(archivo)
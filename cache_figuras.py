@@ -0,0 +1,179 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - CACHE DE FIGURAS                                        ║
+║  Figuras Plotly serializadas, reutilizadas mientras no cambien sus datos      ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Cada gráfico se identifica por una huella (blake2b) de sus datos agregados y
+de su estilo. Si la huella ya está en cache se devuelve la figura guardada como
+JSON, sin volver a construirla ni validarla; `st.plotly_chart` solo copia ese
+JSON al mensaje del navegador.
+
+El cache es único por proceso, LRU y acotado por bytes de JSON. Lleva la cuenta
+de aciertos y fallos por gráfico.
+
+Uso:
+    @figura_cacheada("barras")
+    def grafico_barras(datos, titulo, ...):
+        ...
+"""
+
+import json
+import hashlib
+import dataclasses
+import threading
+from collections import Counter, OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+MAX_BYTES_CACHE = 64 * 1024 * 1024  # JSON total retenido
+
+# ============================================================================
+# HUELLAS
+# ============================================================================
+
+
+def _actualizar(h, parte):
+    if isinstance(parte, pd.Series):
+        valores = parte.to_numpy()
+        if valores.dtype.kind in "biuf":
+            h.update(str(valores.dtype).encode())
+            h.update(np.ascontiguousarray(valores).tobytes())
+        else:
+            h.update(pd.util.hash_pandas_object(parte, index=False).to_numpy().tobytes())
+    elif isinstance(parte, np.ndarray):
+        h.update(str(parte.dtype).encode())
+        h.update(np.ascontiguousarray(parte).tobytes())
+    elif isinstance(parte, dict):
+        for clave, valor in parte.items():
+            _actualizar(h, clave)
+            _actualizar(h, valor)
+    elif dataclasses.is_dataclass(parte):
+        for campo in dataclasses.fields(parte):
+            _actualizar(h, getattr(parte, campo.name))
+    elif isinstance(parte, (list, tuple)):
+        h.update(f"[{len(parte)}".encode())
+        for valor in parte:
+            _actualizar(h, valor)
+    else:
+        h.update(repr(parte).encode())
+    h.update(b"|")
+
+
+def huella(*partes) -> str:
+    """Huella de datos y estilo (Series, arrays y dataclasses por contenido, el resto por repr)."""
+    h = hashlib.blake2b(digest_size=16)
+    for parte in partes:
+        _actualizar(h, parte)
+    return h.hexdigest()
+
+
+# ============================================================================
+# FIGURA SERIALIZADA
+# ============================================================================
+
+
+class FiguraSerializada(go.Figure):
+    """Figura que ya es JSON: `to_dict` lo decodifica sin validar de nuevo."""
+
+    def __init__(self, spec: str):
+        super().__init__()
+        self._spec = spec
+
+    def to_dict(self):
+        return json.loads(self._spec)
+
+    def to_json(self, *args, **kwargs):
+        return self._spec
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+
+class CacheFiguras:
+    """LRU de figuras serializadas por huella, con contadores por gráfico."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES_CACHE):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._figuras: "OrderedDict[str, FiguraSerializada]" = OrderedDict()
+        self._bytes = 0
+        self.aciertos: Counter = Counter()
+        self.fallos: Counter = Counter()
+
+    def obtener(
+        self, grafico: str, clave: str, construir: Callable[[], Optional[go.Figure]]
+    ) -> Optional[go.Figure]:
+        """Figura de cache o recién construida (las figuras None no se guardan)."""
+        clave = f"{grafico}:{clave}"
+        with self._lock:
+            figura = self._figuras.get(clave)
+            if figura is not None:
+                self._figuras.move_to_end(clave)
+                self.aciertos[grafico] += 1
+                return figura
+            self.fallos[grafico] += 1
+
+        construida = construir()
+        if construida is None:
+            return None
+        figura = FiguraSerializada(construida.to_json(validate=False))
+
+        with self._lock:
+            if clave not in self._figuras:
+                self._figuras[clave] = figura
+                self._bytes += len(figura._spec)
+            while self._bytes > self.max_bytes and len(self._figuras) > 1:
+                _, vieja = self._figuras.popitem(last=False)
+                self._bytes -= len(vieja._spec)
+        return figura
+
+    def estadisticas(self) -> Dict[str, Dict[str, int]]:
+        """Aciertos y fallos por gráfico."""
+        with self._lock:
+            graficos = sorted(set(self.aciertos) | set(self.fallos))
+            return {
+                g: {"aciertos": self.aciertos[g], "fallos": self.fallos[g]} for g in graficos
+            }
+
+    def __len__(self):
+        return len(self._figuras)
+
+
+# Único por proceso: sobrevive a los reruns de Streamlit
+CACHE_FIGURAS = CacheFiguras()
+
+
+def figura_cacheada(grafico: str, clave: Optional[Callable] = None, cache: CacheFiguras = None):
+    """
+    Decorador para funciones que devuelven una figura Plotly.
+
+    Args:
+        grafico: Nombre del gráfico para los contadores
+        clave: Recibe los mismos argumentos y devuelve las partes que
+            identifican la figura (por defecto, todos los argumentos)
+        cache: Cache a usar (por defecto CACHE_FIGURAS)
+    """
+
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            partes = clave(*args, **kwargs) if clave else (args, kwargs)
+            destino = cache if cache is not None else CACHE_FIGURAS
+            return destino.obtener(
+                grafico, huella(funcion.__name__, partes), lambda: funcion(*args, **kwargs)
+            )
+
+        return envoltura
+
+    return decorador
@@ -0,0 +1,238 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - CAMBIOS POR FILA                                        ║
+║  Reprocesamiento incremental del CTI                                          ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Cada fila del payload se identifica por su clave (`unique_user_id` +
+`OBLIGACION`) y se resume en una huella de 64 bits. Entre dos refrescos solo
+se enriquecen las filas insertadas o modificadas; las eliminadas se descartan
+y el resto se reutiliza tal cual desde el frame enriquecido anterior.
+
+Para que el resultado sea idéntico a reprocesar todo el payload, `procesar`
+recibe las claves de sus filas en `df.attrs["claves"]` (para derivar de ellas
+cualquier valor aleatorio) y devuelve sus reportes por fila en
+`df.attrs["reporte_por_fila"]`; aquí se empalman junto con las filas y se
+publican sumados en `df.attrs`.
+
+Claves y huellas son digests blake2b de 64 bits sobre el `repr` de la tupla de
+valores (codificación canónica: tipo y valor exactos, en orden de columnas). No
+se usa `hash()` de Python porque colisiona con valores cercanos
+(`hash(-1) == hash(-2)`, enteros módulo 2^61 - 1).
+
+Uso:
+    estado, cambios = actualizar_incremental(estado, registros, procesar_datos_sheets)
+    df = estado.df
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from esquema_cti import concatenar_cti
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+COLUMNAS_CLAVE = ("unique_user_id", "OBLIGACION")
+
+# Atributos de intercambio con `procesar`
+ATTR_CLAVES = "claves"
+ATTR_POR_FILA = "reporte_por_fila"
+
+# ============================================================================
+# HUELLAS
+# ============================================================================
+
+# φ · 2^64: combina clave y número de aparición, y separa los flujos aleatorios
+_PRIMO_64 = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _digest(valores: tuple) -> bytes:
+    return hashlib.blake2b(repr(valores).encode(), digest_size=8).digest()
+
+
+def _hashes(tuplas: Iterable[tuple], n: int) -> np.ndarray:
+    """Digest blake2b de cada tupla como uint64."""
+    digests = b"".join(map(_digest, tuplas))
+    return np.frombuffer(digests, dtype=np.uint64, count=n).copy()
+
+
+def calcular_claves(registros: List[dict]) -> np.ndarray:
+    """
+    Clave uint64 por registro a partir de COLUMNAS_CLAVE.
+
+    Las claves repetidas se distinguen por su número de aparición, de modo que
+    siempre hay una clave única por fila. Sin columnas clave se usa la posición.
+    """
+    if not registros or not any(c in registros[0] for c in COLUMNAS_CLAVE):
+        return np.arange(len(registros), dtype=np.uint64)
+
+    try:
+        tuplas = map(itemgetter(*COLUMNAS_CLAVE), registros)
+        base = _hashes(tuplas, len(registros))
+    except KeyError:
+        tuplas = (tuple(r.get(c) for c in COLUMNAS_CLAVE) for r in registros)
+        base = _hashes(tuplas, len(registros))
+
+    aparicion = pd.Series(base).groupby(base, sort=False).cumcount().to_numpy()
+    with np.errstate(over="ignore"):
+        return base * _PRIMO_64 + aparicion.astype(np.uint64)
+
+
+def calcular_huellas(registros: List[dict]) -> np.ndarray:
+    """Huella de 64 bits del contenido completo de cada registro."""
+    return _hashes(map(tuple, map(dict.values, registros)), len(registros))
+
+
+def aleatorios_por_clave(claves: np.ndarray, k: int = 1) -> np.ndarray:
+    """
+    Matriz (n, k) de uniformes en (0, 1) que solo dependen de la clave de cada fila.
+
+    splitmix64 sobre `clave + i * φ`: la misma fila obtiene los mismos valores
+    se procese sola, en un lote de cambios o con todo el payload.
+    """
+    z = claves.astype(np.uint64)[:, None] + np.arange(1, k + 1, dtype=np.uint64) * _PRIMO_64
+    with np.errstate(over="ignore"):
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z ^= z >> np.uint64(31)
+    return ((z >> np.uint64(11)).astype(np.float64) + 0.5) * 2.0**-53
+
+
+# ============================================================================
+# REPORTES
+# ============================================================================
+
+
+def _procesar(
+    procesar: Callable[[pd.DataFrame], pd.DataFrame], df: pd.DataFrame, claves: np.ndarray
+) -> Tuple[pd.DataFrame, Dict[tuple, np.ndarray]]:
+    """
+    Enriquece `df` pasándole sus claves y separa los reportes por fila.
+
+    `procesar` publica `{reporte: {columna: {campo: máscara}}}`; se aplana a
+    `{(reporte, columna, campo): array}` para empalmarlo igual que las filas.
+    """
+    df.attrs[ATTR_CLAVES] = claves
+    df = procesar(df)
+    df.attrs.pop(ATTR_CLAVES, None)
+    anidado = df.attrs.pop(ATTR_POR_FILA, {})
+    por_fila = {
+        (reporte, col, campo): np.asarray(valores)
+        for reporte, columnas in anidado.items()
+        for col, campos in columnas.items()
+        for campo, valores in campos.items()
+    }
+    return df, por_fila
+
+
+def _sumar_reportes(por_fila: Dict[tuple, np.ndarray]) -> dict:
+    """Reportes de `df.attrs` a partir de los arrays por fila."""
+    reportes: dict = {}
+    for (reporte, col, campo), valores in por_fila.items():
+        reportes.setdefault(reporte, {}).setdefault(col, {})[campo] = int(valores.sum())
+    return reportes
+
+
+# ============================================================================
+# ESTADO INCREMENTAL
+# ============================================================================
+
+
+@dataclass
+class EstadoIncremental:
+    """Frame enriquecido junto con sus claves, huellas y reportes por fila."""
+
+    columnas: Tuple[str, ...]
+    claves: np.ndarray
+    huellas: np.ndarray
+    df: pd.DataFrame
+    por_fila: Dict[tuple, np.ndarray]
+    cambios: Dict[str, int] = field(default_factory=dict)
+
+
+def actualizar_incremental(
+    estado: Optional[EstadoIncremental],
+    registros: List[dict],
+    procesar: Callable[[pd.DataFrame], pd.DataFrame],
+) -> Tuple[EstadoIncremental, Dict[str, int]]:
+    """
+    Aplica el payload crudo sobre el estado anterior enriqueciendo solo el diff.
+
+    Las huellas se calculan sobre los registros JSON, así que el DataFrame solo
+    se construye para las filas insertadas o modificadas.
+
+    Args:
+        estado: Estado del refresco anterior (None en la primera carga)
+        registros: Payload de Apps Script (lista de dicts)
+        procesar: Función de enriquecimiento (p. ej. procesar_datos_sheets)
+
+    Returns:
+        (estado nuevo, resumen de cambios)
+    """
+    columnas = tuple(registros[0].keys()) if registros else ()
+    claves = calcular_claves(registros)
+    huellas = calcular_huellas(registros)
+
+    # Primera carga o cambio de columnas: no hay nada reutilizable
+    if estado is None or estado.columnas != columnas:
+        df, por_fila = _procesar(procesar, pd.DataFrame(registros), claves)
+        df = df.reset_index(drop=True)
+        df.attrs.update(_sumar_reportes(por_fila))
+        cambios = {"insertadas": len(df), "modificadas": 0, "eliminadas": 0, "completo": 1}
+        return EstadoIncremental(columnas, claves, huellas, df, por_fila, cambios), cambios
+
+    # Posición de cada clave nueva en el estado anterior (-1 si es insertada)
+    pos_anterior = pd.Index(estado.claves).get_indexer(claves)
+    existe = pos_anterior >= 0
+    igual = np.zeros(len(claves), dtype=bool)
+    igual[existe] = estado.huellas[pos_anterior[existe]] == huellas[existe]
+
+    cambiadas = np.flatnonzero(~igual)
+    cambios = {
+        "insertadas": int((~existe).sum()),
+        "modificadas": int((existe & ~igual).sum()),
+        "eliminadas": int(len(estado.claves) - existe.sum()),
+        "completo": 0,
+    }
+
+    if not len(cambiadas) and not cambios["eliminadas"]:
+        return estado, cambios
+
+    # Reutilizar filas sin cambios y enriquecer solo las cambiadas
+    reusadas = pos_anterior[igual]
+    partes = [estado.df.iloc[reusadas]]
+    por_fila_nuevo: Dict[tuple, np.ndarray] = {}
+    if len(cambiadas):
+        df_cambios = pd.DataFrame([registros[i] for i in cambiadas], columns=columnas)
+        df_cambios, por_fila_nuevo = _procesar(procesar, df_cambios, claves[cambiadas])
+        partes.append(df_cambios)
+
+    # Reordenar según el payload nuevo (filas y reportes por fila)
+    orden = np.argsort(np.concatenate([np.flatnonzero(igual), cambiadas]), kind="stable")
+    df = concatenar_cti(partes).iloc[orden]
+    df.index = pd.RangeIndex(len(df))
+
+    por_fila = {}
+    for clave in {**estado.por_fila, **por_fila_nuevo}:
+        previo = estado.por_fila.get(clave)
+        nuevo = por_fila_nuevo.get(clave)
+        previo = previo[reusadas] if previo is not None else np.zeros(len(reusadas), dtype=bool)
+        nuevo = nuevo if nuevo is not None else np.zeros(len(cambiadas), dtype=bool)
+        por_fila[clave] = np.concatenate([previo, nuevo])[orden]
+    df.attrs = {**estado.df.attrs, **_sumar_reportes(por_fila)}
+
+    logger.info(
+        f"🔄 Refresco incremental: +{cambios['insertadas']} "
+        f"~{cambios['modificadas']} -{cambios['eliminadas']} filas"
+    )
+    return EstadoIncremental(columnas, claves, huellas, df, por_fila, cambios), cambios
@@ -0,0 +1,207 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - CLIENTE HTTP                                            ║
+║  Sesión única por proceso con pools keep-alive, reintentos y latencias        ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Todas las llamadas salientes (Apps Script, webhooks, ElevenLabs) pasan por
+`CLIENTE_HTTP`: una `requests.Session` con un pool de conexiones por host, de
+modo que el handshake TCP+TLS se hace una vez y los refrescos siguientes
+reutilizan la conexión abierta.
+
+    - Timeouts: (conexión, lectura); la conexión es corta para fallar rápido
+    - Reintentos (urllib3 Retry): errores de conexión en cualquier método
+      (la petición no llegó a enviarse); 429/5xx y errores de lectura solo en
+      GET/HEAD, que son idempotentes. Espera exponencial con jitter y se
+      respeta `Retry-After`
+    - Latencias: histograma por endpoint con cubetas fijas en ms
+
+requests no habla HTTP/2; las conexiones son HTTP/1.1 persistentes.
+
+Uso:
+    response = CLIENTE_HTTP.get(url, endpoint="elevenlabs.conversaciones", timeout=10)
+    CLIENTE_HTTP.estadisticas()  # {"elevenlabs.conversaciones": {"p50_ms": ..., ...}}
+"""
+
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+# Intentar importar requests
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+HOSTS_EN_POOL = 8  # hosts con pool propio
+CONEXIONES_POR_HOST = 32  # conexiones keep-alive por host (≥ hilos que la usan)
+TIMEOUT_CONEXION = 3.05  # segundos hasta establecer la conexión
+TIMEOUT_LECTURA = 10.0  # segundos entre bytes de la respuesta (por defecto)
+
+REINTENTOS_CONEXION = 2
+REINTENTOS_LECTURA = 1  # solo GET/HEAD
+REINTENTOS_ESTADO = 2  # solo GET/HEAD
+CODIGOS_REINTENTABLES = (429, 500, 502, 503, 504)
+BACKOFF = 0.3  # segundos; se duplica en cada reintento
+JITTER = 0.2  # segundos aleatorios añadidos a cada espera
+
+# Bordes superiores de las cubetas del histograma (ms); la última es abierta
+CUBETAS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+# ============================================================================
+# LATENCIAS
+# ============================================================================
+
+
+class HistogramaLatencia:
+    """Conteo por cubeta de latencia, errores y máximo de un endpoint."""
+
+    def __init__(self):
+        self.cubetas = [0] * len(CUBETAS_MS)
+        self.peticiones = 0
+        self.errores = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def registrar(self, ms: float, error: bool = False):
+        self.cubetas[bisect.bisect_left(CUBETAS_MS, ms)] += 1
+        self.peticiones += 1
+        self.errores += error
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentil(self, q: float) -> float:
+        """Borde superior de la cubeta donde cae el percentil q (0-1), acotado al máximo."""
+        objetivo = q * self.peticiones
+        acumulado = 0
+        for borde, conteo in zip(CUBETAS_MS, self.cubetas):
+            acumulado += conteo
+            if acumulado >= objetivo and conteo:
+                return round(min(borde, self.max_ms), 1)
+        return 0.0
+
+    def resumen(self) -> Dict[str, float]:
+        return {
+            "peticiones": self.peticiones,
+            "errores": self.errores,
+            "media_ms": round(self.total_ms / self.peticiones, 1) if self.peticiones else 0.0,
+            "p50_ms": self.percentil(0.5),
+            "p95_ms": self.percentil(0.95),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+# ============================================================================
+# CLIENTE
+# ============================================================================
+
+
+def _politica_reintentos() -> "Retry":
+    return Retry(
+        total=None,
+        connect=REINTENTOS_CONEXION,
+        read=REINTENTOS_LECTURA,
+        status=REINTENTOS_ESTADO,
+        other=0,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        status_forcelist=CODIGOS_REINTENTABLES,
+        backoff_factor=BACKOFF,
+        backoff_jitter=JITTER,
+        respect_retry_after_header=True,
+        raise_on_status=False,  # se devuelve la última respuesta
+    )
+
+
+class ClienteHTTP:
+    """Sesión compartida con pool por host, reintentos y latencia por endpoint."""
+
+    def __init__(
+        self,
+        hosts: int = HOSTS_EN_POOL,
+        conexiones: int = CONEXIONES_POR_HOST,
+        timeout_conexion: float = TIMEOUT_CONEXION,
+    ):
+        self.timeout_conexion = timeout_conexion
+        self._lock = threading.Lock()
+        self._latencias: Dict[str, HistogramaLatencia] = {}
+
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(
+            pool_connections=hosts, pool_maxsize=conexiones, max_retries=_politica_reintentos()
+        )
+        self.sesion.mount("https://", adaptador)
+        self.sesion.mount("http://", adaptador)
+
+    def _timeout(self, timeout: Union[None, float, Tuple[float, float]]):
+        if isinstance(timeout, tuple):
+            return timeout
+        return (self.timeout_conexion, timeout if timeout is not None else TIMEOUT_LECTURA)
+
+    def request(
+        self, metodo: str, url: str, endpoint: Optional[str] = None, timeout=None, **kwargs
+    ) -> "requests.Response":
+        """
+        Petición por el pool compartido.
+
+        Args:
+            metodo: GET, POST, ...
+            url: URL completa
+            endpoint: Nombre para el histograma (por defecto, el host)
+            timeout: Segundos de lectura o tupla (conexión, lectura)
+            **kwargs: Los mismos de `requests.Session.request`
+        """
+        endpoint = endpoint or urlsplit(url).netloc
+        inicio = time.perf_counter()
+        error = True
+        try:
+            response = self.sesion.request(metodo, url, timeout=self._timeout(timeout), **kwargs)
+            error = response.status_code >= 400
+            return response
+        finally:
+            self._registrar(endpoint, (time.perf_counter() - inicio) * 1000, error)
+
+    def get(self, url: str, endpoint: Optional[str] = None, **kwargs) -> "requests.Response":
+        return self.request("GET", url, endpoint, **kwargs)
+
+    def post(self, url: str, endpoint: Optional[str] = None, **kwargs) -> "requests.Response":
+        return self.request("POST", url, endpoint, **kwargs)
+
+    def _registrar(self, endpoint: str, ms: float, error: bool):
+        with self._lock:
+            histograma = self._latencias.get(endpoint)
+            if histograma is None:
+                histograma = self._latencias[endpoint] = HistogramaLatencia()
+            histograma.registrar(ms, error)
+
+    def estadisticas(self) -> Dict[str, Dict[str, float]]:
+        """Peticiones, errores y latencias (media, p50, p95, máx.) por endpoint."""
+        with self._lock:
+            return {e: h.resumen() for e, h in sorted(self._latencias.items())}
+
+    def histograma(self, endpoint: str) -> Dict[str, int]:
+        """Conteo por cubeta ("≤25 ms", ..., ">10000 ms") de un endpoint."""
+        with self._lock:
+            h = self._latencias.get(endpoint)
+            cubetas = list(h.cubetas) if h is not None else [0] * len(CUBETAS_MS)
+        etiquetas = [f"≤{b:g} ms" for b in CUBETAS_MS[:-1]] + [f">{CUBETAS_MS[-2]:g} ms"]
+        return dict(zip(etiquetas, cubetas))
+
+    def cerrar(self):
+        self.sesion.close()
+
+
+# Único por proceso: el pool sobrevive a los reruns de Streamlit
+CLIENTE_HTTP = ClienteHTTP() if REQUESTS_AVAILABLE else None
@@ -0,0 +1,358 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - CUBO DE KPIs                                            ║
+║  Agregados por segmento × producto × mecanismo × tramo de mora × campaña      ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Se construye una vez por versión del dataset con un `np.bincount` por medida
+sobre el código de celda (conteo, GAC, saldo en mora, valor esperado,
+probabilidad, mora, requiere pago), más el histograma de probabilidad de cada
+celda. Con unas pocas decenas de valores por
+dimensión el cubo ocupa unos cientos de KB.
+
+Los KPIs de una combinación de filtros salen de sumar las celdas seleccionadas,
+sin recorrer filas. El rango de mora solo se puede responder si no corta ningún
+tramo (cada tramo con datos queda entero dentro o entero fuera); si lo corta,
+`metricas` devuelve None y hay que usar `BaseMetricas.calcular`.
+
+Uso:
+    cubo = CuboKPI.construir(df)
+    m = cubo.metricas(campana=True, segmentos=("A", "B"), mora=(31, 90))
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agregados_graficos import BINS_PROB
+from motor_metricas import (
+    TRAMOS_MORA,
+    BaseMetricas,
+    distribucion_mora,
+    ordenar_conteos,
+    tramos_mora,
+)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+# Tope de valores de 8 bytes por cubo (≈ 32 MB; el dashboard guarda dos
+# versiones). Cada celda lleva VALORES_POR_CELDA valores más los BINS_PROB del
+# histograma de probabilidad; por encima (productos con demasiados valores
+# distintos) no se arma el cubo y todo se resuelve recorriendo filas
+MAX_VALORES = 4_000_000
+VALORES_POR_CELDA = 12  # 10 medidas + prob_max + prob_min
+
+# Códigos de la dimensión mora: nulo, <= 0, los tramos de TRAMOS_MORA y > 9999
+MORA_NULA, MORA_BAJA = 0, 1
+MORA_ALTA = len(TRAMOS_MORA) + 2
+CODIGOS_MORA = len(TRAMOS_MORA) + 3
+
+# Ejes del cubo
+EJE_SEGMENTO, EJE_PRODUCTO, EJE_MECANISMO, EJE_MORA, EJE_CAMPANA = range(5)
+
+# ============================================================================
+# CONSTRUCCIÓN
+# ============================================================================
+
+
+def _dimension(codigos: Optional[np.ndarray], n: int) -> np.ndarray:
+    """Códigos de factorize desplazados: 0 = nulo o columna ausente."""
+    if codigos is None:
+        return np.zeros(n, dtype=np.intp)
+    return codigos.astype(np.intp) + 1
+
+
+def _codigos_mora(mora: np.ndarray) -> np.ndarray:
+    codigo = tramos_mora(mora).astype(np.intp) + 2
+    codigo[mora <= 0] = MORA_BAJA
+    codigo[mora > 9999] = MORA_ALTA
+    codigo[np.isnan(mora)] = MORA_NULA
+    return codigo
+
+
+def _suma(celdas: np.ndarray, celdas_totales: int, pesos=None) -> np.ndarray:
+    return np.bincount(celdas, weights=pesos, minlength=celdas_totales).astype(np.float64)
+
+
+# ============================================================================
+# CUBO
+# ============================================================================
+
+
+@dataclass(frozen=True)
+class CuboKPI:
+    """Medidas agregadas por celda para una versión del dataset."""
+
+    forma: Tuple[int, ...]
+    medidas: Dict[str, np.ndarray]
+    prob_max: np.ndarray
+    prob_min: np.ndarray
+    hist_prob: Optional[np.ndarray]
+    mora_min: np.ndarray
+    mora_max: np.ndarray
+    segmentos: list
+    productos: list
+    mecanismos: list
+    tiene_campana: bool
+    tiene_mora: bool
+    tiene_req_pago: bool
+
+    @classmethod
+    def construir(
+        cls, df: pd.DataFrame, base: Optional[BaseMetricas] = None
+    ) -> Optional["CuboKPI"]:
+        """
+        Agrega el dataset por celdas.
+
+        Args:
+            df: Dataset enriquecido
+            base: BaseMetricas de la misma versión (evita repetir la extracción)
+
+        Returns:
+            El cubo, o None si ocuparía más de MAX_VALORES valores
+        """
+        base = base or BaseMetricas.construir(df)
+        n = base.n
+
+        mora = base.mora if base.mora is not None else np.full(n, np.nan)
+        dimensiones = (
+            _dimension(base.segmentos[0], n),
+            _dimension(base.productos[0], n),
+            _dimension(base.mecanismos[0], n),
+            _codigos_mora(mora),
+            (
+                base.campana.astype(np.intp)
+                if base.campana is not None
+                else np.zeros(n, dtype=np.intp)
+            ),
+        )
+        forma = (
+            len(base.segmentos[1]) + 1,
+            len(base.productos[1]) + 1,
+            len(base.mecanismos[1]) + 1,
+            CODIGOS_MORA,
+            2,
+        )
+        total = int(np.prod(forma))
+        por_celda = VALORES_POR_CELDA + (BINS_PROB if base.bin_prob is not None else 0)
+        if total * por_celda > MAX_VALORES:
+            return None
+        celdas = np.ravel_multi_index(dimensiones, forma)
+
+        def suma_valida(valores):
+            if valores is None:
+                return np.zeros(total), np.zeros(total)
+            validos = ~np.isnan(valores)
+            return (
+                _suma(celdas, total, np.where(validos, valores, 0.0)),
+                _suma(celdas, total, validos),
+            )
+
+        gac, gac_n = suma_valida(base.gac)
+        prob, prob_n = suma_valida(base.prob)
+        mora_suma, mora_n = suma_valida(base.mora)
+        saldo, _ = suma_valida(
+            pd.to_numeric(df["Saldo en mora"], errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+            if "Saldo en mora" in df.columns
+            else None
+        )
+        valor, _ = suma_valida(base.valor_esperado)
+
+        prob_max = np.full(total, -np.inf)
+        prob_min = np.full(total, np.inf)
+        if base.prob is not None:
+            np.fmax.at(prob_max, celdas, base.prob)
+            np.fmin.at(prob_min, celdas, base.prob)
+
+        # Histograma de probabilidad por celda (último eje = bin)
+        hist_prob = None
+        if base.bin_prob is not None:
+            con_bin = base.bin_prob >= 0
+            hist_prob = np.bincount(
+                celdas[con_bin] * BINS_PROB + base.bin_prob[con_bin],
+                minlength=total * BINS_PROB,
+            ).reshape(forma + (BINS_PROB,))
+
+        # Extremos de mora por código: deciden si un rango corta algún tramo
+        mora_min = np.full(CODIGOS_MORA, np.inf)
+        mora_max = np.full(CODIGOS_MORA, -np.inf)
+        np.fmin.at(mora_min, dimensiones[EJE_MORA], mora)
+        np.fmax.at(mora_max, dimensiones[EJE_MORA], mora)
+
+        medidas = {
+            "filas": _suma(celdas, total),
+            "gac": gac,
+            "gac_n": gac_n,
+            "saldo": saldo,
+            "valor": valor,
+            "prob": prob,
+            "prob_n": prob_n,
+            "mora": mora_suma,
+            "mora_n": mora_n,
+            "req_pago": (
+                _suma(celdas, total, base.requiere_pago)
+                if base.requiere_pago is not None
+                else np.zeros(total)
+            ),
+        }
+        return cls(
+            forma=forma,
+            medidas={k: v.reshape(forma) for k, v in medidas.items()},
+            prob_max=prob_max.reshape(forma),
+            prob_min=prob_min.reshape(forma),
+            hist_prob=hist_prob,
+            mora_min=mora_min,
+            mora_max=mora_max,
+            segmentos=base.segmentos[1],
+            productos=base.productos[1],
+            mecanismos=base.mecanismos[1],
+            tiene_campana=base.campana is not None,
+            tiene_mora=base.mora is not None,
+            tiene_req_pago=base.requiere_pago is not None,
+        )
+
+    # ------------------------------------------------------------------------
+
+    def _seleccion(
+        self,
+        campana: Optional[bool],
+        segmentos: Optional[Iterable],
+        mora: Optional[Tuple[float, float]],
+        producto: Optional[object],
+    ) -> Optional[Tuple[np.ndarray, ...]]:
+        """Índices por eje que equivalen a IndiceFiltros.resolver (None si no alinea)."""
+        ejes = [np.arange(t) for t in self.forma]
+
+        if campana is not None and self.tiene_campana:
+            ejes[EJE_CAMPANA] = np.array([int(bool(campana))])
+
+        if segmentos and self.segmentos:
+            seleccion = set(segmentos)
+            con_nulos = self.medidas["filas"][0].sum() > 0
+            if con_nulos or not seleccion.issuperset(self.segmentos):
+                ejes[EJE_SEGMENTO] = np.array(
+                    [i + 1 for i, s in enumerate(self.segmentos) if s in seleccion], dtype=np.intp
+                )
+
+        if producto is not None and self.productos:
+            ejes[EJE_PRODUCTO] = np.array(
+                [i + 1 for i, p in enumerate(self.productos) if p == producto], dtype=np.intp
+            )
+
+        if mora is not None and self.tiene_mora:
+            con_datos = np.isfinite(self.mora_min)
+            dentro = con_datos & (self.mora_min >= mora[0]) & (self.mora_max <= mora[1])
+            fuera = ~con_datos | (self.mora_max < mora[0]) | (self.mora_min > mora[1])
+            if not (dentro | fuera).all():
+                return None
+            ejes[EJE_MORA] = np.flatnonzero(dentro)
+
+        return tuple(ejes)
+
+    def agregar(self, **filtros) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Medidas por eje completo para los filtros: cada medida se suma sobre
+        todos los ejes menos uno (None si el rango de mora no alinea).
+
+        Returns:
+            {medida: {eje: array de largo forma[eje]}}
+        """
+        ejes = self._seleccion(**filtros)
+        if ejes is None:
+            return None
+        indice = np.ix_(*ejes)
+
+        resultado = {}
+        for medida, valores in self.medidas.items():
+            sub = valores[indice]
+            resultado[medida] = {}
+            for eje, seleccion in enumerate(ejes):
+                completo = np.zeros(self.forma[eje])
+                otros = tuple(i for i in range(len(self.forma)) if i != eje)
+                completo[seleccion] = sub.sum(axis=otros)
+                resultado[medida][eje] = completo
+        resultado["prob_max"] = self.prob_max[indice].max(initial=-np.inf)
+        resultado["prob_min"] = self.prob_min[indice].min(initial=np.inf)
+        resultado["hist_prob"] = (
+            self.hist_prob[indice].sum(axis=tuple(range(len(self.forma))))
+            if self.hist_prob is not None
+            else None
+        )
+        return resultado
+
+    def metricas(
+        self,
+        campana: Optional[bool] = None,
+        segmentos: Optional[Iterable] = None,
+        mora: Optional[Tuple[float, float]] = None,
+        producto: Optional[object] = None,
+    ) -> Optional[Dict]:
+        """
+        Mismo dict que BaseMetricas.calcular, por roll-up del cubo.
+
+        Returns:
+            Las métricas, o None si el rango de mora corta algún tramo
+        """
+        agregado = self.agregar(campana=campana, segmentos=segmentos, mora=mora, producto=producto)
+        if agregado is None:
+            return None
+
+        def suma(medida):
+            return agregado[medida][EJE_CAMPANA].sum()
+
+        filas = agregado["filas"]
+        total = int(suma("filas"))
+        m = {"total": total}
+
+        # Básicas
+        gac_n = suma("gac_n")
+        m["gac_total"] = float(suma("gac"))
+        m["gac_promedio"] = float(suma("gac") / gac_n) if gac_n else 0.0
+
+        # Campañas
+        if self.tiene_campana:
+            m["con_campana"] = int(filas[EJE_CAMPANA][1])
+            m["sin_campana"] = total - m["con_campana"]
+            m["pct_campana"] = m["con_campana"] / total * 100 if total > 0 else 0
+        else:
+            m["con_campana"], m["sin_campana"], m["pct_campana"] = 0, total, 0
+
+        # Probabilidad
+        prob_n = suma("prob_n")
+        if prob_n:
+            m["prob_media"] = float(suma("prob") / prob_n) * 100
+            m["prob_max"] = float(agregado["prob_max"]) * 100
+            m["prob_min"] = float(agregado["prob_min"]) * 100
+        else:
+            m["prob_media"], m["prob_max"], m["prob_min"] = 0, 0, 0
+        m["hist_prob"] = agregado["hist_prob"]
+
+        # Segmentos, mecanismos y productos (sin la celda de nulos)
+        m["segmentos"] = ordenar_conteos(filas[EJE_SEGMENTO][1:], self.segmentos)
+        m["mecanismos"] = ordenar_conteos(filas[EJE_MECANISMO][1:], self.mecanismos)
+        m["productos"] = ordenar_conteos(filas[EJE_PRODUCTO][1:], self.productos)
+
+        # Mora
+        if self.tiene_mora:
+            tramos = filas[EJE_MORA][MORA_BAJA + 1 : MORA_ALTA]
+            m["mora_dist"] = distribucion_mora(tramos.astype(np.int64))
+            mora_n = suma("mora_n")
+            m["mora_promedio"] = float(suma("mora") / mora_n) if mora_n else 0.0
+        else:
+            m["mora_dist"], m["mora_promedio"] = {}, 0
+
+        # Requiere pago
+        if self.tiene_req_pago:
+            m["req_pago"] = int(suma("req_pago"))
+            m["no_req_pago"] = total - m["req_pago"]
+        else:
+            m["req_pago"], m["no_req_pago"] = 0, 0
+
+        m["valor_esperado_total"] = float(suma("valor"))
+        return m
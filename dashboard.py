@@ -17,27 +17,51 @@ MEJORAS EN AUTO-ACTUALIZACIÓN:
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
+from pathlib import Path
+from urllib.parse import urljoin
 from datetime import datetime, timedelta
 import warnings
-import hashlib
-import json
 from dotenv import load_dotenv
 
+from motor_gac import calcular_gac_vectorizado, tabla_gac_default
+from limpieza_numerica import limpiar_columnas_moneda
+from mecanismos import clasificar_mecanismos
+from almacen_datos import AlmacenDatos, RefrescadorDatos
+from cambios_filas import aleatorios_por_clave
+from indice_filtros import IndiceFiltros
+from detalle_clientes import detalle_clientes
+from indice_busqueda import IndiceBusqueda, buscar_en
+from esquema_cti import compactar_cti, segmentar
+from motor_metricas import BaseMetricas
+from cubo_kpi import CuboKPI
+from cache_figuras import CACHE_FIGURAS, figura_cacheada
+from prioridad_llamadas import CRITERIOS, OrdenLlamadas
+from lanzador_llamadas import (
+    AIOHTTP_AVAILABLE,
+    CONCURRENCIA,
+    POR_SEGUNDO,
+    LanzamientoLlamadas,
+)
+from exportador import FORMATOS, exportar, formatos_disponibles, nombre_archivo
+from agregados_graficos import (
+    BORDES_PROB,
+    TOP_K_SALDOS,
+    UMBRAL_SCATTER,
+    densidad_2d,
+    indices_top_k,
+)
+from fuente_sheets import SincronizadorSheets
+from cliente_http import CLIENTE_HTTP, REQUESTS_AVAILABLE
+from historial_conversaciones import HistorialConversaciones
+from detalle_conversaciones import CacheDetalles
+from cache_audio import CacheAudio
+
 load_dotenv()
 warnings.filterwarnings("ignore")
 
-# Intentar importar requests
-try:
-    import requests
-
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
-
 # Intentar importar streamlit-autorefresh
 try:
     from streamlit_autorefresh import st_autorefresh
@@ -151,90 +175,197 @@ st.markdown(
 # FUNCIONES DE DATOS (MEJORADAS)
 # ============================================================================
 
-# Configuración Google Apps Script
-APPS_SCRIPT_URL = "https://script.google.com/macros/s/AKfycbwJ779TGN3j770xG9qYV_M_9ODJTqS481I_B4G7CwkcOIoD0jJz1a5eduMPXNsrwymG/exec"
+# Configuración Google Apps Script (APPS_SCRIPT_URL permite apuntar al servidor local)
+APPS_SCRIPT_URL = os.getenv(
+    "APPS_SCRIPT_URL",
+    "https://script.google.com/macros/s/AKfycbwJ779TGN3j770xG9qYV_M_9ODJTqS481I_B4G7CwkcOIoD0jJz1a5eduMPXNsrwymG/exec",
+)
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_sincronizador(url=APPS_SCRIPT_URL):
+    """Copia local del payload de Apps Script, única por proceso."""
+    return SincronizadorSheets(url)
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_almacen():
+    """Almacén del dataset enriquecido, único por proceso."""
+    return AlmacenDatos()
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_historial():
+    """Copia local (SQLite) de las conversaciones de ElevenLabs, única por proceso."""
+    return HistorialConversaciones()
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_cache_detalles():
+    """Detalles de conversaciones: terminados en disco, en curso en memoria."""
+    return CacheDetalles()
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_cache_audio():
+    """Grabaciones de llamadas en disco, con tope de tamaño (LRU)."""
+    return CacheAudio()
+
 
+DIR_ESTATICO = Path(__file__).resolve().parent / "static"
 
-# Cache de 30 segundos para actualización frecuente
-@st.cache_data(ttl=30, show_spinner=False)
-def cargar_datos_sheets(url=APPS_SCRIPT_URL):
-    """Carga datos desde Google Apps Script con cache de 30s."""
-    if not REQUESTS_AVAILABLE:
-        return None, "Error: requests no disponible"
 
+def url_estatica(ruta):
+    """URL de un archivo bajo ./static/ servido por Streamlit; None si no aplica."""
+    base = st.context.url
+    if not base or not st.get_option("server.enableStaticServing"):
+        return None
     try:
-        response = requests.get(url, timeout=10)
+        relativa = Path(ruta).resolve().relative_to(DIR_ESTATICO)
+    except ValueError:
+        return None
+    return urljoin(base if base.endswith("/") else base + "/", f"app/static/{relativa.as_posix()}")
 
-        if response.status_code == 200:
-            data = response.json()
 
-            if isinstance(data, list) and len(data) > 0:
-                return data, None
-            else:
-                return None, "No se encontraron datos"
-        else:
-            return None, f"Error HTTP {response.status_code}"
+# Refresco cada 30 segundos en segundo plano; los renders leen el último snapshot
+INTERVALO_REFRESCO = 30
+
+
+@st.cache_resource(show_spinner=False)
+def obtener_refrescador(url=APPS_SCRIPT_URL):
+    """Hilo de refresco del dataset, arrancado una sola vez por proceso.
+
+    Consulta primero la revisión y, si cambió, descarga solo el delta.
+    """
+    return RefrescadorDatos(
+        obtener_almacen(),
+        obtener_sincronizador(url).sincronizar,
+        procesar_datos_sheets,
+        intervalo=INTERVALO_REFRESCO,
+    ).iniciar()
+
 
-    except requests.Timeout:
-        return None, "Timeout"
-    except requests.ConnectionError:
-        return None, "Error de conexión"
-    except Exception as e:
-        return None, f"Error: {str(e)}"
+def formatear_edad(momento):
+    """Antigüedad legible de un instante ('12s', '3m 05s', '1h 02m')."""
+    segundos = max(int((datetime.now() - momento).total_seconds()), 0)
+    if segundos < 60:
+        return f"{segundos}s"
+    if segundos < 3600:
+        return f"{segundos // 60}m {segundos % 60:02d}s"
+    return f"{segundos // 3600}h {segundos % 3600 // 60:02d}m"
 
 
-def payload_hash(data) -> str:
-    """Genera hash MD5 del payload para detectar cambios."""
-    return hashlib.md5(
-        json.dumps(data, sort_keys=True, default=str).encode()
-    ).hexdigest()
+@st.cache_resource(max_entries=2, show_spinner=False)
+def obtener_indice_filtros(version, _df):
+    """Índice de filtros del sidebar, construido una vez por versión del dataset."""
+    return IndiceFiltros.construir(_df)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def obtener_base_metricas(version, _df):
+    """Columnas de los KPIs como arrays, extraídas una vez por versión del dataset."""
+    return BaseMetricas.construir(_df)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def obtener_cubo_kpi(version, _df):
+    """Cubo de KPIs (segmento × producto × mecanismo × mora × campaña) por versión."""
+    return CuboKPI.construir(_df, obtener_base_metricas(version, _df))
+
+
+# LRU por (versión, filtros): cambiar de tab o tocar otro widget no recalcula
+@st.cache_resource(max_entries=32, show_spinner=False)
+def obtener_metricas(version, filtros, _df, _posiciones):
+    """Métricas de las filas filtradas.
+
+    Se responden con el cubo; solo un rango de mora que corta tramos recorre
+    las filas filtradas (una pasada por combinación de filtros nueva).
+    """
+    cubo = obtener_cubo_kpi(version, _df)
+    m = cubo.metricas(**dict(filtros)) if cubo is not None else None
+    if m is None:
+        base = obtener_base_metricas(version, _df)
+        m = base.calcular(None if len(_posiciones) == len(_df) else _posiciones)
+    return m
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def obtener_orden_llamadas(version, _df):
+    """Permutación descendente por criterio de llamadas, una vez por versión."""
+    return OrdenLlamadas.construir(_df)
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def obtener_top_llamadas(version, filtros, criterio, k, _df, _posiciones):
+    """Top-K de clientes a llamar para los filtros y el criterio elegidos."""
+    return obtener_orden_llamadas(version, _df).top_k(criterio, k, _posiciones)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def obtener_detalle_clientes(version, _df):
+    """tipo_cliente y detalle_productos por fila, una vez por versión del dataset."""
+    return detalle_clientes(_df)
+
+
+@st.cache_resource(max_entries=2, show_spinner="Indexando clientes...")
+def obtener_indice_busqueda(version, _df):
+    """Índice de búsqueda de clientes, construido una vez por versión del dataset."""
+    return IndiceBusqueda.construir(_df)
 
 
 def procesar_datos_sheets(df):
-    """Procesa y enriquece datos de Google Sheets."""
-
-    # Limpiar y convertir columnas numéricas
-    def limpiar_numero(valor):
-        if pd.isna(valor) or valor == "":
-            return 0
-        valor_str = str(valor).replace("$", "").replace(",", "").replace(".", "")
-        try:
-            return float(valor_str)
-        except:
-            return 0
+    """Procesa y enriquece datos de Google Sheets.
+
+    Las claves de fila (`df.attrs["claves"]`, puestas por el refresco
+    incremental) fijan los valores simulados de cada fila; los reportes de
+    limpieza se devuelven por fila para poder empalmarlos.
+    """
+    # Sacar las claves antes de operar: pandas copia attrs en cada operación
+    claves = df.attrs.pop("claves", None)
+    if claves is None:
+        claves = np.arange(len(df), dtype=np.uint64)
 
     # Convertir tipos de datos
-    numeric_cols = [
-        "dias mora",
+    money_cols = [
         "Saldo en mora",
         "Saldo total",
         "Capital Total",
         "Capital Mora",
         "Cuota Mensual Aprox",
     ]
-    for col in numeric_cols:
-        if col in df.columns:
-            if col == "dias mora":
-                df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-            else:
-                df[col] = df[col].apply(limpiar_numero)
+    reporte = {}
+    if "dias mora" in df.columns:
+        vacias = df["dias mora"].isna() | (df["dias mora"] == "")
+        dias = pd.to_numeric(df["dias mora"], errors="coerce")
+        reporte["dias mora"] = {
+            "vacias": vacias.to_numpy(dtype=bool),
+            "fallidas": (dias.isna() & ~vacias).to_numpy(dtype=bool),
+        }
+        df["dias mora"] = dias.fillna(0)
+
+    # Limpiar montos en bloque ($, separadores de miles y vacíos)
+    reporte.update(limpiar_columnas_moneda(df, money_cols, por_fila=True))
 
     # Calcular GAC proyectado
     df["GAC_proyectado"] = calcular_gac(df)
 
-    # Detectar mecanismos
-    df["mecanismo_detectado"] = df.apply(
-        lambda row: parsear_popup_camp(row.get("POPUP_CAMP", "")), axis=1
+    # Detectar mecanismos (y si requieren pago) en una sola pasada
+    popup = (
+        df["POPUP_CAMP"]
+        if "POPUP_CAMP" in df.columns
+        else pd.Series("", index=df.index, dtype=object)
     )
+    df["mecanismo_detectado"], requiere_pago = clasificar_mecanismos(popup)
 
-    # Simular probabilidad ML
-    np.random.seed(42)
-    df["probabilidad_pago_SIMULADA"] = np.random.beta(2, 5, len(df))
+    # Simular probabilidad ML: Beta(2, 5) como Gamma(2) / (Gamma(2) + Gamma(5)),
+    # con uniformes derivados de la clave de cada fila
+    u = aleatorios_por_clave(claves, 7)
+    x = -np.log(u[:, :2]).sum(axis=1)
+    y = -np.log(u[:, 2:]).sum(axis=1)
+    df["probabilidad_pago_SIMULADA"] = x / (x + y)
 
     # Segmentación
-    df["segmento_SIMULADO"] = df["probabilidad_pago_SIMULADA"].apply(
-        lambda x: "A" if x >= 0.75 else "B" if x >= 0.50 else "C" if x >= 0.25 else "D"
-    )
+    df["segmento_SIMULADO"] = segmentar(df["probabilidad_pago_SIMULADA"])
 
     # Valor esperado
     df["valor_esperado_SIMULADO"] = (
@@ -242,141 +373,27 @@ def procesar_datos_sheets(df):
     )
 
     # Requiere pago
-    df["requiere_pago"] = df["mecanismo_detectado"].apply(
-        lambda x: "PAGO" in str(x).upper()
-    )
+    df["requiere_pago"] = requiere_pago
+
+    # Tipos compactos (categóricas, bool, enteros, float32)
+    compactar_cti(df)
 
+    df.attrs["reporte_por_fila"] = {"reporte_limpieza": reporte}
     return df
 
 
 def calcular_gac(df):
-    """Calcula Gastos de Cobranza según tabla GAC."""
-    GAC_TABLE = {
-        (1, 10): {"tarifa": 0.00, "min": 0, "max": 0},
-        (11, 15): {"tarifa": 0.06, "min": 10000, "max": 260000},
-        (16, 30): {"tarifa": 0.08, "min": 15000, "max": 350000},
-        (31, 60): {"tarifa": 0.10, "min": 20000, "max": 450000},
-        (61, 90): {"tarifa": 0.12, "min": 25000, "max": 550000},
-        (91, 9999): {"tarifa": 0.15, "min": 30000, "max": 650000},
-    }
-
-    gac_values = []
-    for _, row in df.iterrows():
-        dias = row.get("dias mora", 0)
-        saldo = row.get("Saldo en mora", 0)
-
-        gac = 0
-        for (min_dias, max_dias), config in GAC_TABLE.items():
-            if min_dias <= dias <= max_dias:
-                gac_calc = saldo * config["tarifa"]
-                gac = max(config["min"], min(gac_calc, config["max"]))
-                break
-        gac_values.append(gac)
-
-    return gac_values
-
-
-def parsear_popup_camp(popup):
-    """Parsea POPUP_CAMP para detectar mecanismo."""
-    if pd.isna(popup) or popup == "":
-        return "SIN_MECANISMO"
-
-    popup_upper = str(popup).upper()
-
-    if "NOVACION" in popup_upper:
-        return "NOVACION"
-    elif "CONSOLIDACION" in popup_upper:
-        return "CONSOLIDACION"
-    elif "PAGO" in popup_upper:
-        return "ACUERDO_PAGO"
-    elif "DESCUENTO" in popup_upper:
-        return "DESCUENTO"
-    else:
-        return "OTRO_MECANISMO"
-
-
-def calcular_metricas(df):
-    """Calcula todas las métricas del dashboard."""
-    m = {}
-
-    # Básicas
-    m["total"] = len(df)
-    m["gac_total"] = df["GAC_proyectado"].sum() if "GAC_proyectado" in df.columns else 0
-    m["gac_promedio"] = (
-        df["GAC_proyectado"].mean() if "GAC_proyectado" in df.columns else 0
-    )
-
-    # Campañas
-    if "campaign" in df.columns:
-        camp_true = (
-            (df["campaign"] == True)
-            if df["campaign"].dtype == bool
-            else (df["campaign"].astype(str).str.lower() == "true")
-        )
-        m["con_campana"] = camp_true.sum()
-        m["sin_campana"] = m["total"] - m["con_campana"]
-        m["pct_campana"] = m["con_campana"] / m["total"] * 100 if m["total"] > 0 else 0
-    else:
-        m["con_campana"], m["sin_campana"], m["pct_campana"] = 0, m["total"], 0
-
-    # Probabilidad
-    prob_col = (
-        "probabilidad_pago_ML"
-        if "probabilidad_pago_ML" in df.columns
-        else "probabilidad_pago_SIMULADA"
-    )
-    if prob_col in df.columns:
-        m["prob_media"] = df[prob_col].mean() * 100
-        m["prob_max"] = df[prob_col].max() * 100
-        m["prob_min"] = df[prob_col].min() * 100
-    else:
-        m["prob_media"], m["prob_max"], m["prob_min"] = 0, 0, 0
-
-    # Segmentos
-    seg_col = "segmento_ML" if "segmento_ML" in df.columns else "segmento_SIMULADO"
-    m["segmentos"] = (
-        df[seg_col].value_counts().to_dict() if seg_col in df.columns else {}
-    )
-
-    # Mecanismos
-    m["mecanismos"] = (
-        df["mecanismo_detectado"].value_counts().to_dict()
-        if "mecanismo_detectado" in df.columns
-        else {}
+    """Calcula Gastos de Cobranza según tabla GAC (vectorizado)."""
+    dias = df["dias mora"] if "dias mora" in df.columns else np.zeros(len(df))
+    saldo = (
+        df["Saldo en mora"] if "Saldo en mora" in df.columns else np.zeros(len(df))
     )
+    return calcular_gac_vectorizado(dias, saldo, tabla_gac_default())
 
-    # Productos
-    prod_col = "producto" if "producto" in df.columns else "Tipo Producto"
-    m["productos"] = (
-        df[prod_col].value_counts().to_dict() if prod_col in df.columns else {}
-    )
-
-    # Mora
-    if "dias mora" in df.columns:
-        bins = [0, 10, 30, 60, 90, 9999]
-        labels = ["1-10", "11-30", "31-60", "61-90", ">90"]
-        mora_cat = pd.cut(df["dias mora"], bins=bins, labels=labels)
-        m["mora_dist"] = mora_cat.value_counts().to_dict()
-        m["mora_promedio"] = df["dias mora"].mean()
-    else:
-        m["mora_dist"], m["mora_promedio"] = {}, 0
-
-    # Requiere pago
-    if "requiere_pago" in df.columns:
-        m["req_pago"] = (df["requiere_pago"] == True).sum()
-        m["no_req_pago"] = m["total"] - m["req_pago"]
-    else:
-        m["req_pago"], m["no_req_pago"] = 0, 0
 
-    # Valor esperado
-    val_col = (
-        "valor_esperado_ML"
-        if "valor_esperado_ML" in df.columns
-        else "valor_esperado_SIMULADO"
-    )
-    m["valor_esperado_total"] = df[val_col].sum() if val_col in df.columns else 0
-
-    return m
+def calcular_metricas(df):
+    """Calcula todas las métricas del dashboard (sin cache, sobre todo `df`)."""
+    return BaseMetricas.construir(df).calcular()
 
 
 # ============================================================================
@@ -384,6 +401,7 @@ def calcular_metricas(df):
 # ============================================================================
 
 
+@figura_cacheada("barras")
 def grafico_barras(datos, titulo, color_scale="Blues", horizontal=True):
     """Gráfico de barras profesional."""
     if not datos:
@@ -430,6 +448,7 @@ def grafico_barras(datos, titulo, color_scale="Blues", horizontal=True):
     return fig
 
 
+@figura_cacheada("dona")
 def grafico_dona(datos, titulo, colores=None):
     """Gráfico de dona profesional."""
     if not datos:
@@ -469,6 +488,7 @@ def grafico_dona(datos, titulo, colores=None):
     return fig
 
 
+@figura_cacheada("gauge")
 def grafico_gauge(valor, titulo, max_val=100):
     """Gauge profesional."""
     fig = go.Figure(
@@ -500,15 +520,20 @@ def grafico_gauge(valor, titulo, max_val=100):
     return fig
 
 
-def grafico_histograma(df, col, titulo):
-    """Histograma profesional."""
-    if col not in df.columns:
+@figura_cacheada("histograma")
+def grafico_histograma(bordes, conteos, titulo, eje_x="", eje_y="Clientes"):
+    """Histograma profesional a partir de bins ya calculados en el servidor."""
+    if conteos is None or not np.any(conteos):
         return None
 
+    bordes = np.asarray(bordes, dtype=np.float64)
     fig = go.Figure(
-        go.Histogram(
-            x=df[col] * 100 if df[col].max() <= 1 else df[col],
-            nbinsx=25,
+        go.Bar(
+            x=(bordes[:-1] + bordes[1:]) / 2,
+            y=conteos,
+            width=np.diff(bordes),
+            customdata=np.column_stack([bordes[:-1], bordes[1:]]),
+            hovertemplate="%{customdata[0]:,.0f} – %{customdata[1]:,.0f}<br>%{y:,}<extra></extra>",
             marker=dict(color="#3b82f6", line=dict(color="#1e293b", width=1)),
         )
     )
@@ -517,37 +542,18 @@ def grafico_histograma(df, col, titulo):
         title=dict(text=titulo, font=dict(color="#f1f5f9", size=16)),
         paper_bgcolor="rgba(0,0,0,0)",
         plot_bgcolor="rgba(0,0,0,0)",
-        xaxis=dict(gridcolor="#1e293b", tickfont=dict(color="#94a3b8"), title=""),
+        xaxis=dict(gridcolor="#1e293b", tickfont=dict(color="#94a3b8"), title=eje_x),
         yaxis=dict(
-            gridcolor="#1e293b", tickfont=dict(color="#94a3b8"), title="Clientes"
+            gridcolor="#1e293b", tickfont=dict(color="#94a3b8"), title=eje_y
         ),
+        bargap=0,
         margin=dict(l=10, r=10, t=50, b=10),
         height=300,
     )
     return fig
 
 
-def grafico_scatter_mora(df):
-    """Scatter de mora vs probabilidad."""
-    prob_col = (
-        "probabilidad_pago_ML"
-        if "probabilidad_pago_ML" in df.columns
-        else "probabilidad_pago_SIMULADA"
-    )
-    if prob_col not in df.columns or "dias mora" not in df.columns:
-        return None
-
-    sample = df.sample(min(500, len(df)))
-
-    fig = px.scatter(
-        sample,
-        x="dias mora",
-        y=sample[prob_col] * 100,
-        color=sample[prob_col] * 100,
-        color_continuous_scale="Viridis",
-        opacity=0.7,
-    )
-
+def _layout_scatter_mora(fig):
     fig.update_layout(
         title=dict(
             text="Días de Mora vs Probabilidad de Pago",
@@ -563,44 +569,165 @@ def grafico_scatter_mora(df):
             tickfont=dict(color="#94a3b8"),
             title="Probabilidad (%)",
         ),
-        coloraxis_colorbar=dict(title="Prob %", tickfont=dict(color="#94a3b8")),
+        legend=dict(
+            font=dict(color="#cbd5e1"),
+            bgcolor="rgba(0,0,0,0)",
+            orientation="h",
+            x=1,
+            xanchor="right",
+            y=1.12,
+        ),
         margin=dict(l=10, r=10, t=50, b=10),
         height=400,
     )
     return fig
 
 
+@figura_cacheada("scatter_mora")
+def _figura_scatter_mora(mora, prob):
+    """Un punto por obligación (WebGL), para carteras pequeñas."""
+    fig = go.Figure(
+        go.Scattergl(
+            x=mora,
+            y=prob,
+            mode="markers",
+            marker=dict(
+                color=prob,
+                colorscale="Viridis",
+                opacity=0.7,
+                colorbar=dict(title="Prob %", tickfont=dict(color="#94a3b8")),
+            ),
+            hovertemplate="Mora %{x:.0f} días<br>Prob %{y:.1f}%<extra></extra>",
+            showlegend=False,
+        )
+    )
+    return _layout_scatter_mora(fig)
+
+
+@figura_cacheada("densidad_mora")
+def _figura_densidad_mora(densidad, top_mora, top_prob, top_saldo):
+    """Mapa de densidad por bins y los mayores saldos como puntos sueltos."""
+    centros_x = (densidad.bordes_x[:-1] + densidad.bordes_x[1:]) / 2
+    centros_y = (densidad.bordes_y[:-1] + densidad.bordes_y[1:]) / 2
+    conteos = np.where(densidad.conteos > 0, densidad.conteos, np.nan)
+
+    fig = go.Figure(
+        go.Heatmap(
+            x=centros_x,
+            y=centros_y,
+            z=conteos.T,
+            customdata=densidad.pesos.T,
+            colorscale="Viridis",
+            colorbar=dict(title="Obligaciones", tickfont=dict(color="#94a3b8")),
+            hovertemplate=(
+                "Mora %{x:.0f} días · Prob %{y:.0f}%<br>%{z:,.0f} obligaciones<br>"
+                "Valor esperado $%{customdata:,.0f}<extra></extra>"
+            ),
+            showlegend=False,
+        )
+    )
+    fig.add_trace(
+        go.Scattergl(
+            x=top_mora,
+            y=top_prob,
+            mode="markers",
+            name=f"Top {len(top_saldo)} saldos",
+            customdata=top_saldo,
+            marker=dict(color="#f8fafc", size=7, line=dict(color="#ef4444", width=1)),
+            hovertemplate=(
+                "Saldo $%{customdata:,.0f}<br>Mora %{x:.0f} días · Prob %{y:.1f}%<extra></extra>"
+            ),
+        )
+    )
+    return _layout_scatter_mora(fig)
+
+
+def grafico_scatter_mora(df):
+    """Scatter de mora vs probabilidad.
+
+    Hasta UMBRAL_SCATTER filas se dibuja cada obligación; por encima, un mapa
+    de densidad calculado en el servidor más los TOP_K_SALDOS mayores saldos,
+    así el navegador recibe un tamaño acotado sin importar N.
+    """
+    prob_col = (
+        "probabilidad_pago_ML"
+        if "probabilidad_pago_ML" in df.columns
+        else "probabilidad_pago_SIMULADA"
+    )
+    if prob_col not in df.columns or "dias mora" not in df.columns:
+        return None
+
+    mora = df["dias mora"].to_numpy(dtype=np.float64, na_value=np.nan)
+    prob = df[prob_col].to_numpy(dtype=np.float64, na_value=np.nan) * 100
+    if len(df) <= UMBRAL_SCATTER:
+        return _figura_scatter_mora(mora, prob)
+
+    val_col = (
+        "valor_esperado_ML" if "valor_esperado_ML" in df.columns else "valor_esperado_SIMULADO"
+    )
+    valor = (
+        df[val_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        if val_col in df.columns
+        else np.zeros(len(df))
+    )
+    saldo = (
+        df["Saldo en mora"].to_numpy(dtype=np.float64, na_value=np.nan)
+        if "Saldo en mora" in df.columns
+        else np.zeros(len(df))
+    )
+    densidad = densidad_2d(mora, prob, rango=(None, (0, 100)), pesos=valor)
+    top = indices_top_k(saldo, TOP_K_SALDOS)
+    return _figura_densidad_mora(densidad, mora[top], prob[top], saldo[top])
+
+
 # ============================================================================
 # APLICACIÓN PRINCIPAL (MEJORADA)
 # ============================================================================
 
 
+# ============================================================================
+# LANZAMIENTO DE LLAMADAS
+# ============================================================================
+
+
+def mostrar_lanzamiento(lanzamiento):
+    """Progreso y resultado por cédula; se repinta solo mientras hay envíos."""
+    hechas, total = lanzamiento.progreso()
+    st.progress(hechas / total if total else 1.0, text=f"📞 {hechas}/{total} llamadas")
+
+    col_l1, col_l2 = st.columns([3, 1])
+    with col_l1:
+        st.caption(" · ".join(f"{estado}: {n}" for estado, n in lanzamiento.resumen().items()))
+    with col_l2:
+        if not lanzamiento.terminado and st.button("🚫 Cancelar", key="cancelar_lanzamiento"):
+            lanzamiento.cancelar()
+
+    st.dataframe(lanzamiento.tabla(), hide_index=True, use_container_width=True, height=250)
+
+    # Al terminar, un rerun completo quita el refresco periódico del fragmento
+    if lanzamiento.terminado and hechas == total and st.session_state.get(
+        "lanzamiento_visto"
+    ) is not lanzamiento:
+        st.session_state.lanzamiento_visto = lanzamiento
+        st.rerun()
+
+
 def main():
     # Auto-refresh cada 30 segundos (silencioso)
     if AUTOREFRESH_AVAILABLE:
         st_autorefresh(interval=30000, key="heartbeat")
 
-    # Fetch data con cache
-    raw_data, error = cargar_datos_sheets()
-
-    # Inicializar session_state
-    if "last_hash" not in st.session_state:
-        st.session_state.last_hash = None
-        st.session_state.df = None
-        st.session_state.last_update = datetime.now()
-
-    # Detectar cambios reales
-    if raw_data:
-        current_hash = payload_hash(raw_data)
-
-        if current_hash != st.session_state.last_hash:
-            # Hay cambios: procesar y actualizar
-            df = pd.DataFrame(raw_data)
-            st.session_state.df = procesar_datos_sheets(df)
-            st.session_state.last_hash = current_hash
-            st.session_state.last_update = datetime.now()
+    # Último snapshot listo; solo el arranque en frío espera al primer refresco
+    refrescador = obtener_refrescador()
+    datos = obtener_almacen().actual
+    if datos is None:
+        with st.spinner("Cargando datos..."):
+            datos = refrescador.esperar_primera(timeout=120)
+    estado_refresco = refrescador.estado
 
-    df = st.session_state.df
+    df = datos.df if datos is not None else None
+    st.session_state.version_datos = datos.version if datos is not None else None
+    last_update = datos.actualizado if datos is not None else datetime.now()
 
     # ===== HEADER =====
     col_h1, col_h2 = st.columns([4, 1])
@@ -642,6 +769,67 @@ def main():
                 unsafe_allow_html=True,
             )
 
+        # Antigüedad del snapshot y último refresco exitoso
+        if datos is not None:
+            st.caption(
+                f"📦 Datos v{datos.version} · antigüedad {formatear_edad(datos.actualizado)}"
+            )
+        if estado_refresco.ultimo_exito is not None:
+            st.caption(
+                f"✅ Último refresco: {estado_refresco.ultimo_exito.strftime('%H:%M:%S')}"
+            )
+        if estado_refresco.ultimo_error:
+            st.markdown(
+                f'<div class="error-indicator">⚠️ {estado_refresco.ultimo_error}</div>',
+                unsafe_allow_html=True,
+            )
+
+        # Gráficos servidos desde cache (aciertos por gráfico)
+        stats_figuras = CACHE_FIGURAS.estadisticas()
+        if stats_figuras:
+            aciertos = sum(v["aciertos"] for v in stats_figuras.values())
+            pedidos = aciertos + sum(v["fallos"] for v in stats_figuras.values())
+            with st.expander(f"🧩 Gráficos en cache: {aciertos:,}/{pedidos:,}"):
+                st.dataframe(
+                    pd.DataFrame.from_dict(stats_figuras, orient="index").rename(
+                        columns={"aciertos": "Aciertos", "fallos": "Construidos"}
+                    ),
+                )
+
+        # Latencia de las llamadas salientes por endpoint
+        stats_http = CLIENTE_HTTP.estadisticas() if CLIENTE_HTTP is not None else {}
+        if stats_http:
+            peticiones = sum(v["peticiones"] for v in stats_http.values())
+            with st.expander(f"🌐 Peticiones HTTP: {peticiones:,}"):
+                st.dataframe(
+                    pd.DataFrame.from_dict(stats_http, orient="index").rename(
+                        columns={
+                            "peticiones": "Peticiones",
+                            "errores": "Errores",
+                            "media_ms": "Media ms",
+                            "p50_ms": "p50 ms",
+                            "p95_ms": "p95 ms",
+                            "max_ms": "Máx. ms",
+                        }
+                    ),
+                )
+
+        # Celdas numéricas que no se pudieron convertir (se usan como 0)
+        reporte = df.attrs.get("reporte_limpieza", {}) if df is not None else {}
+        fallidas = {col: r["fallidas"] for col, r in reporte.items() if r["fallidas"]}
+        if fallidas:
+            st.markdown(
+                f'<div class="error-indicator">⚠️ {sum(fallidas.values()):,} celdas no numéricas</div>',
+                unsafe_allow_html=True,
+            )
+            with st.expander("Detalle de limpieza"):
+                st.dataframe(
+                    pd.DataFrame(
+                        {"Columna": list(fallidas.keys()), "Fallidas": list(fallidas.values())}
+                    ),
+                    hide_index=True,
+                )
+
         st.markdown("---")
 
         # Filtros
@@ -665,10 +853,10 @@ def main():
                 filtro_seg = []
 
             # Mora
-            if "dias mora" in df.columns:
-                mora_min, mora_max = int(df["dias mora"].min()), int(
-                    df["dias mora"].max()
-                )
+            indice = obtener_indice_filtros(datos.version, df)
+            rango_mora = indice.rango_mora()
+            if rango_mora is not None:
+                mora_min, mora_max = rango_mora
                 if mora_min == mora_max:
                     st.info(f"Todos los registros tienen {mora_min} días de mora")
                     filtro_mora = (mora_min, mora_max)
@@ -687,37 +875,18 @@ def main():
             else:
                 filtro_prod = "Todos"
 
-            # Aplicar filtros
-            df_f = df.copy()
-
-            if filtro_camp == "Con Campaña":
-                mask = (
-                    (df_f["campaign"] == True)
-                    if df_f["campaign"].dtype == bool
-                    else (df_f["campaign"].astype(str).str.lower() == "true")
-                )
-                df_f = df_f[mask]
-            elif filtro_camp == "Sin Campaña":
-                mask = (
-                    (df_f["campaign"] == False)
-                    if df_f["campaign"].dtype == bool
-                    else (df_f["campaign"].astype(str).str.lower() != "true")
-                )
-                df_f = df_f[mask]
-
-            if seg_col in df_f.columns and filtro_seg:
-                df_f = df_f[df_f[seg_col].isin(filtro_seg)]
-
-            if "dias mora" in df_f.columns:
-                df_f = df_f[
-                    (df_f["dias mora"] >= filtro_mora[0])
-                    & (df_f["dias mora"] <= filtro_mora[1])
-                ]
-
-            if filtro_prod != "Todos":
-                prod_col = "producto" if "producto" in df_f.columns else "Tipo Producto"
-                if prod_col in df_f.columns:
-                    df_f = df_f[df_f[prod_col] == filtro_prod]
+            # Aplicar filtros sobre el índice (el dataset compartido no se modifica)
+            filtros = (
+                ("campana", {"Con Campaña": True, "Sin Campaña": False}.get(filtro_camp)),
+                ("segmentos", tuple(sorted(filtro_seg, key=str))),
+                ("mora", tuple(filtro_mora)),
+                ("producto", None if filtro_prod == "Todos" else filtro_prod),
+            )
+            posiciones = indice.resolver(**dict(filtros))
+            if len(posiciones) == len(df):
+                df_f = df.copy(deep=False)
+            else:
+                df_f = df.take(posiciones)
 
             st.markdown("---")
             st.metric("Registros filtrados", f"{len(df_f):,}")
@@ -785,14 +954,14 @@ def main():
             
             **Otras dependencias requeridas:**
             ```bash
-            pip install streamlit pandas plotly requests openpyxl
+            pip install streamlit pandas plotly requests openpyxl pyarrow
             ```
             """
             )
 
         return
 
-    m = calcular_metricas(df_f)
+    m = obtener_metricas(datos.version, filtros, df, posiciones)
 
     # Tabs
     tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs(
@@ -840,12 +1009,10 @@ def main():
             if fig:
                 st.plotly_chart(fig, use_container_width=True)
         with col4:
-            prob_col = (
-                "probabilidad_pago_ML"
-                if "probabilidad_pago_ML" in df_f.columns
-                else "probabilidad_pago_SIMULADA"
+            # Bins precalculados por versión (cubo o pasada de métricas)
+            fig = grafico_histograma(
+                BORDES_PROB, m["hist_prob"], "Distribución de Probabilidad"
             )
-            fig = grafico_histograma(df_f, prob_col, "Distribución de Probabilidad")
             if fig:
                 st.plotly_chart(fig, use_container_width=True)
 
@@ -991,36 +1158,11 @@ def main():
     with tab5:
         st.markdown("### Exploración de Datos")
 
-        # Agregar columna de tipo de producto (mono/multi) y agregar info de productos
-        if "cedula" in df_f.columns:
-            cedula_counts = df_f["cedula"].value_counts()
-            df_f["tipo_cliente"] = df_f["cedula"].map(
-                lambda x: "Multiproducto" if cedula_counts[x] > 1 else "Monoproducto"
-            )
-
-            # Agregar columna con detalle de productos por cédula
-            prod_col = "producto" if "producto" in df_f.columns else "Tipo Producto"
-            num_prod_col = "Num_producto" if "Num_producto" in df_f.columns else None
-
-            def agregar_info_productos(cedula):
-                productos_cliente = df_f[df_f["cedula"] == cedula]
-                info_productos = []
-                for _, row in productos_cliente.iterrows():
-                    prod_nombre = row.get(prod_col, "N/A")
-                    # Buscar el ID en Num_producto, si no existe usar el nombre del producto
-                    if num_prod_col and pd.notna(row.get(num_prod_col)):
-                        prod_id = row.get(num_prod_col)
-                    else:
-                        # Extraer número del nombre del producto si existe
-                        prod_id = prod_nombre if prod_nombre != "N/A" else "N/A"
-                    mora = row.get("dias mora", 0)
-                    saldo = row.get("Saldo en mora", 0)
-                    info_productos.append(
-                        f"{prod_nombre} (ID:{prod_id}, {mora:.0f}d, ${saldo:,.0f})"
-                    )
-                return " | ".join(info_productos)
-
-            df_f["detalle_productos"] = df_f["cedula"].map(agregar_info_productos)
+        # Tipo de cliente (mono/multi) y detalle de productos por cédula:
+        # calculados una vez por versión, aquí solo se reindexan al filtro
+        detalle = obtener_detalle_clientes(datos.version, df)
+        if detalle is not None:
+            df_f = df_f.assign(**detalle.reindex(df_f.index))
 
         st.markdown("#### Top 10 por Valor Esperado")
         val_col = (
@@ -1135,12 +1277,12 @@ def main():
 
         # Buscar
         st.markdown("#### Buscar Cliente")
-        busq = st.text_input("🔍 Buscar por nombre, cédula o producto")
+        busq = st.text_input("🔍 Buscar por nombre, cédula, teléfono, producto u obligación")
         if busq:
-            mask = df_f.apply(
-                lambda row: busq.lower() in str(row.values).lower(), axis=1
-            )
-            resultados = df_f[mask]
+            # Índice por versión: se construye en la primera búsqueda
+            indice_busqueda = obtener_indice_busqueda(datos.version, df)
+            encontrados = buscar_en(indice_busqueda, busq, df_f.index.to_numpy())
+            resultados = df_f.loc[encontrados]
 
             # Deduplicar resultados por cédula
             if "cedula" in resultados.columns:
@@ -1176,37 +1318,40 @@ def main():
 
         st.markdown("---")
 
-        # Exportar
+        # Exportar (el archivo solo se genera al pulsar descargar)
         col_e1, col_e2 = st.columns([1, 3])
         with col_e1:
             # Opción para exportar con o sin duplicados
-            if "cedula" in df_f.columns:
-                export_unique = st.checkbox("Exportar solo clientes únicos", value=True)
-                df_export = (
-                    df_f.drop_duplicates(subset="cedula", keep="first")
-                    if export_unique
-                    else df_f
+            export_unique = "cedula" in df_f.columns and st.checkbox(
+                "Exportar solo clientes únicos", value=True
+            )
+            formato_export = st.selectbox("Formato", formatos_disponibles(), key="formato_export")
+
+            def generar_export(df_export=df_f, unicos=export_unique, formato=formato_export):
+                posiciones = (
+                    np.flatnonzero(~df_export["cedula"].duplicated().to_numpy())
+                    if unicos
+                    else None
                 )
-            else:
-                df_export = df_f
+                return exportar(df_export, formato, posiciones)
 
-            csv = df_export.to_csv(index=False).encode("utf-8")
             st.download_button(
-                "📥 Exportar CSV",
-                csv,
-                f"cobranzas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                "text/csv",
-                key="download_csv",
+                f"📥 Exportar {formato_export}",
+                generar_export,
+                nombre_archivo("cobranzas", formato_export, datetime.now()),
+                FORMATOS[formato_export][1],
+                key="download_export",
+                on_click="ignore",
             )
         with col_e2:
             if "cedula" in df_f.columns:
                 clientes_unicos = df_f["cedula"].nunique()
                 st.caption(
-                    f"📊 {len(df_f):,} registros | {clientes_unicos:,} clientes únicos | {len(df_f.columns)} columnas | Última actualización: {st.session_state.get('last_update', datetime.now()).strftime('%H:%M:%S')}"
+                    f"📊 {len(df_f):,} registros | {clientes_unicos:,} clientes únicos | {len(df_f.columns)} columnas | Última actualización: {last_update.strftime('%H:%M:%S')}"
                 )
             else:
                 st.caption(
-                    f"📊 {len(df_f):,} registros | {len(df_f.columns)} columnas | Última actualización: {st.session_state.get('last_update', datetime.now()).strftime('%H:%M:%S')}"
+                    f"📊 {len(df_f):,} registros | {len(df_f.columns)} columnas | Última actualización: {last_update.strftime('%H:%M:%S')}"
                 )
 
     # ===== TAB 6: GESTIONAR LLAMADAS =====
@@ -1221,119 +1366,112 @@ def main():
             # Filtro adicional para priorización
             col_pri1, col_pri2 = st.columns(2)
             with col_pri1:
-                ordenar_por = st.selectbox(
-                    "Ordenar por:",
-                    [
-                        "Valor esperado (mayor)",
-                        "Probabilidad (mayor)",
-                        "Días mora (mayor)",
-                        "Saldo mora (mayor)",
-                    ],
-                    index=0,
-                )
+                ordenar_por = st.selectbox("Ordenar por:", list(CRITERIOS), index=0)
             with col_pri2:
                 mostrar = st.number_input(
-                    "Mostrar registros:", min_value=5, max_value=100, value=20, step=5
+                    "Mostrar registros:", min_value=5, max_value=500, value=20, step=5
                 )
 
-            # Ordenar según selección
-            if ordenar_por == "Valor esperado (mayor)":
-                val_col = (
-                    "valor_esperado_ML"
-                    if "valor_esperado_ML" in df_f.columns
-                    else "valor_esperado_SIMULADO"
-                )
-                df_llamadas = (
-                    df_f.sort_values(val_col, ascending=False)
-                    if val_col in df_f.columns
-                    else df_f
-                )
-            elif ordenar_por == "Probabilidad (mayor)":
-                prob_col = (
-                    "probabilidad_pago_ML"
-                    if "probabilidad_pago_ML" in df_f.columns
-                    else "probabilidad_pago_SIMULADA"
-                )
-                df_llamadas = (
-                    df_f.sort_values(prob_col, ascending=False)
-                    if prob_col in df_f.columns
-                    else df_f
-                )
-            elif ordenar_por == "Días mora (mayor)":
-                df_llamadas = (
-                    df_f.sort_values("dias mora", ascending=False)
-                    if "dias mora" in df_f.columns
-                    else df_f
-                )
-            else:  # Saldo mora
-                df_llamadas = (
-                    df_f.sort_values("Saldo en mora", ascending=False)
-                    if "Saldo en mora" in df_f.columns
-                    else df_f
-                )
+            # Top-K sobre el orden precalculado (sin ordenar df_f)
+            top = obtener_top_llamadas(
+                datos.version, filtros, ordenar_por, int(mostrar), df, posiciones
+            )
+            df_llamadas = df.take(top)
 
             st.markdown("---")
 
-            # Mostrar clientes priorizados
-            for idx, row in df_llamadas.head(int(mostrar)).iterrows():
-                col1, col2, col3, col4, col5, col6, col7 = st.columns(
-                    [1.5, 2, 1.5, 1, 1.5, 1, 1]
-                )
-
-                with col1:
-                    st.text(f"CC: {row.get('cedula', 'N/A')}")
-                with col2:
-                    st.text(f"{row.get('name', 'N/A')[:20]}")
-                with col3:
-                    st.text(f"📞 {row.get('Phone', 'N/A')}")
-                with col4:
-                    mora_dias = row.get("dias mora", 0)
-                    color_mora = (
-                        "🔴" if mora_dias > 90 else "🟡" if mora_dias > 30 else "🟢"
+            # Grilla virtualizada con selección; la acción se aplica por fila
+            prob_col = (
+                "probabilidad_pago_ML"
+                if "probabilidad_pago_ML" in df_f.columns
+                else "probabilidad_pago_SIMULADA"
+            )
+            grilla = pd.DataFrame(index=df_llamadas.index)
+            grilla["CC"] = df_llamadas["cedula"].astype(str)
+            if "name" in df_llamadas.columns:
+                grilla["Nombre"] = df_llamadas["name"].astype(str).str[:20]
+            if "Phone" in df_llamadas.columns:
+                grilla["Teléfono"] = df_llamadas["Phone"].astype(str)
+            if "dias mora" in df_llamadas.columns:
+                mora_dias = df_llamadas["dias mora"].astype(float)
+                grilla["Mora"] = np.select(
+                    [mora_dias > 90, mora_dias > 30], ["🔴", "🟡"], "🟢"
+                ) + mora_dias.map("{:.0f}d".format).radd(" ").to_numpy()
+            if "Saldo en mora" in df_llamadas.columns:
+                grilla["Saldo"] = df_llamadas["Saldo en mora"].astype(float)
+            if prob_col in df_llamadas.columns:
+                grilla["Prob."] = df_llamadas[prob_col].astype(float) * 100
+
+            evento = st.dataframe(
+                grilla,
+                hide_index=True,
+                use_container_width=True,
+                on_select="rerun",
+                selection_mode="multi-row",
+                key="grilla_llamadas",
+                column_config={
+                    "Saldo": st.column_config.NumberColumn(format="$%,.0f"),
+                    "Prob.": st.column_config.NumberColumn(format="%.0f%%"),
+                },
+            )
+            seleccion = evento.selection.rows if evento is not None else []
+
+            # Lanzamiento en segundo plano: la selección o todo el top-K mostrado
+            with st.expander("⚙️ Ritmo de envío"):
+                col_r1, col_r2 = st.columns(2)
+                with col_r1:
+                    concurrencia = st.slider(
+                        "Llamadas en paralelo", 1, 32, CONCURRENCIA, key="lanz_concurrencia"
                     )
-                    st.text(f"{color_mora} {mora_dias:.0f}d")
-                with col5:
-                    saldo = row.get("Saldo en mora", 0)
-                    st.text(f"${saldo:,.0f}")
-                with col6:
-                    prob_col = (
-                        "probabilidad_pago_ML"
-                        if "probabilidad_pago_ML" in df_f.columns
-                        else "probabilidad_pago_SIMULADA"
+                with col_r2:
+                    por_segundo = st.number_input(
+                        "Llamadas por segundo",
+                        min_value=0.5,
+                        max_value=50.0,
+                        value=POR_SEGUNDO,
+                        step=0.5,
+                        key="lanz_por_segundo",
                     )
-                    if prob_col in df_f.columns:
-                        prob = row.get(prob_col, 0) * 100
-                        st.text(f"{prob:.0f}%")
-                with col7:
-                    # Contenedor para mensajes sin recargar página
-                    mensaje_container = st.empty()
-
-                    if st.button("☎️ Llamar", key=f"call_{idx}", type="primary"):
-                        if not REQUESTS_AVAILABLE:
-                            mensaje_container.error("Módulo 'requests' no disponible")
-                        else:
-                            webhook_url = "https://workflows.aosinternational.us/webhook/AmericanBPO"
-                            cedula = str(row.get("cedula", ""))
 
-                            # Mostrar estado sin recargar
-                            mensaje_container.info("⏳ Llamando...")
+            lanzamiento = st.session_state.get("lanzamiento_llamadas")
+            en_curso = lanzamiento is not None and not lanzamiento.terminado
 
-                            try:
-                                response = requests.post(
-                                    webhook_url, json={"cedula": cedula}, timeout=5
-                                )
-                                if response.status_code == 200:
-                                    mensaje_container.success(f"✅ Llamada iniciada")
-                                else:
-                                    mensaje_container.error(
-                                        f"❌ Error: {response.status_code}"
-                                    )
-                            except requests.Timeout:
-                                mensaje_container.error("⏱️ Timeout")
-                            except Exception as e:
-                                mensaje_container.error(f"❌ {str(e)[:50]}")
-
-                st.markdown("---")
+            col_acc1, col_acc2, col_acc3 = st.columns([1, 1, 2])
+            with col_acc1:
+                llamar = st.button(
+                    f"☎️ Llamar selección ({len(seleccion)})",
+                    type="primary",
+                    disabled=not seleccion or en_curso,
+                    key="llamar_seleccion",
+                )
+            with col_acc2:
+                lanzar_top = st.button(
+                    f"🚀 Llamar top {len(grilla)}",
+                    disabled=grilla.empty or en_curso,
+                    key="llamar_top",
+                )
+            with col_acc3:
+                st.caption(
+                    "Selecciona filas en la tabla o lanza todo el listado; "
+                    "las cédulas ya llamadas hoy no se repiten"
+                )
+
+            if llamar or lanzar_top:
+                if not (REQUESTS_AVAILABLE or AIOHTTP_AVAILABLE):
+                    st.error("Módulo 'requests' no disponible")
+                else:
+                    cedulas = (
+                        grilla["CC"].iloc[seleccion] if llamar else grilla["CC"]
+                    ).tolist()
+                    st.session_state.lanzamiento_llamadas = LanzamientoLlamadas(
+                        cedulas, concurrencia=concurrencia, por_segundo=por_segundo
+                    ).iniciar()
+
+            if "lanzamiento_llamadas" in st.session_state:
+                lanzamiento = st.session_state.lanzamiento_llamadas
+                st.fragment(
+                    mostrar_lanzamiento, run_every=None if lanzamiento.terminado else 1.0
+                )(lanzamiento)
 
     # ===== TAB 7: TRAZABILIDAD LLAMADAS =====
     with tab7:
@@ -1344,86 +1482,35 @@ def main():
         AGENT_ID = "agent_7901kfgkj27ef9mt2d2whyk2nzrg"
 
         # Funciones para API ElevenLabs (cache 30s, sin spinner)
-        @st.cache_data(ttl=30, show_spinner=False)
-        def obtener_conversaciones(agent_id, cursor=""):
-            if not REQUESTS_AVAILABLE:
-                return None, "Requests no disponible"
-
-            try:
-                url = "https://api.elevenlabs.io/v1/convai/conversations"
-                headers = {"xi-api-key": ELEVENLABS_API_KEY}
-                params = {"agent_id": agent_id, "cursor": cursor}
-
-                response = requests.get(url, headers=headers, params=params, timeout=10)
-
-                if response.status_code == 200:
-                    return response.json(), None
-                else:
-                    return None, f"Error {response.status_code}"
-            except Exception as e:
-                return None, str(e)
-
-        @st.cache_data(ttl=30, show_spinner=False)
-        def obtener_detalle_conversacion(conversation_id):
-            if not REQUESTS_AVAILABLE:
-                return None, "Requests no disponible"
-
-            try:
-                url = f"https://api.elevenlabs.io/v1/convai/conversations/{conversation_id}"
-                headers = {"xi-api-key": ELEVENLABS_API_KEY}
-
-                response = requests.get(url, headers=headers, timeout=10)
-
-                if response.status_code == 200:
-                    return response.json(), None
-                else:
-                    return None, f"Error {response.status_code}"
-            except Exception as e:
-                return None, str(e)
-
-        @st.cache_data(ttl=30, show_spinner=False)
-        def obtener_audio_conversacion(conversation_id):
-            if not REQUESTS_AVAILABLE:
-                return None, "Requests no disponible"
-
-            try:
-                url = f"https://api.elevenlabs.io/v1/convai/conversations/{conversation_id}/audio"
-                headers = {"xi-api-key": ELEVENLABS_API_KEY}
-
-                response = requests.get(url, headers=headers, timeout=30)
-
-                if response.status_code == 200:
-                    return response.content, None
-                else:
-                    return None, f"Error {response.status_code}"
-            except Exception as e:
-                return None, str(e)
-
-        # Cargar conversaciones (sin spinner)
-        data, error = obtener_conversaciones(AGENT_ID)
-
-        if error:
-            st.error(f"❌ Error al cargar conversaciones: {error}")
-            return
-
-        if not data or "conversations" not in data:
-            st.warning("⚠️ No se encontraron conversaciones")
+        # Sincronización incremental en segundo plano (como mucho cada 30s);
+        # la página se arma con lo que ya está en la base local
+        historial = obtener_historial()
+        sync = historial.sincronizar_en_fondo(AGENT_ID, ELEVENLABS_API_KEY)
+        sincronizando = historial.sincronizando(AGENT_ID)
+        resumen = historial.metricas(AGENT_ID)
+
+        if not resumen["total"]:
+            if sincronizando:
+                st.info("⏳ Sincronizando historial de llamadas... (actualiza en unos segundos)")
+            elif sync and sync["error"]:
+                st.error(f"❌ Error al cargar conversaciones: {sync['error']}")
+            else:
+                st.warning("⚠️ No se encontraron conversaciones")
             return
 
-        conversaciones = data["conversations"]
+        if sync and sync["error"]:
+            st.warning(f"⚠️ Mostrando el historial local; la sincronización falló: {sync['error']}")
+        if sincronizando:
+            st.caption("⏳ Sincronizando historial en segundo plano")
 
         # Métricas generales
         col1, col2, col3, col4, col5 = st.columns(5)
 
-        total_calls = len(conversaciones)
-        successful_calls = len(
-            [c for c in conversaciones if c.get("call_successful") == "success"]
-        )
-        failed_calls = len(
-            [c for c in conversaciones if c.get("call_successful") != "success"]
-        )
-        total_duration = sum([c.get("call_duration_secs", 0) for c in conversaciones])
-        avg_duration = total_duration / total_calls if total_calls > 0 else 0
+        total_calls = resumen["total"]
+        successful_calls = resumen["exitosas"]
+        failed_calls = resumen["fallidas"]
+        total_duration = resumen["duracion_total"]
+        avg_duration = resumen["duracion_media"]
 
         col1.metric("Total Llamadas", f"{total_calls:,}")
         col2.metric(
@@ -1463,48 +1550,33 @@ def main():
                 "Mostrar registros:", min_value=10, max_value=100, value=10, step=10
             )
 
-        # Aplicar filtros
-        conversaciones_filtradas = conversaciones.copy()
-
-        if filtro_estado == "Exitosas":
-            conversaciones_filtradas = [
-                c
-                for c in conversaciones_filtradas
-                if c.get("call_successful") == "success"
-            ]
-        elif filtro_estado == "Fallidas":
-            conversaciones_filtradas = [
-                c
-                for c in conversaciones_filtradas
-                if c.get("call_successful") != "success"
-            ]
-
-        if filtro_duracion == "Cortas (<30s)":
-            conversaciones_filtradas = [
-                c
-                for c in conversaciones_filtradas
-                if c.get("call_duration_secs", 0) < 30
-            ]
-        elif filtro_duracion == "Normales (30s-2m)":
-            conversaciones_filtradas = [
-                c
-                for c in conversaciones_filtradas
-                if 30 <= c.get("call_duration_secs", 0) <= 120
-            ]
-        elif filtro_duracion == "Largas (>2m)":
-            conversaciones_filtradas = [
-                c
-                for c in conversaciones_filtradas
-                if c.get("call_duration_secs", 0) > 120
-            ]
-
-        # Limitar registros mostrados
-        conversaciones_mostrar = conversaciones_filtradas[: int(mostrar_registros)]
+        # Aplicar filtros (SQL sobre el historial local)
+        exitosa = {"Todas": None, "Exitosas": True, "Fallidas": False}[filtro_estado]
+        duracion = {
+            "Todas": None,
+            "Cortas (<30s)": "cortas",
+            "Normales (30s-2m)": "normales",
+            "Largas (>2m)": "largas",
+        }[filtro_duracion]
+
+        total_filtradas = historial.contar(AGENT_ID, exitosa, duracion)
+        conversaciones_mostrar = historial.listar(
+            AGENT_ID, exitosa, duracion, limite=int(mostrar_registros)
+        )
 
         st.markdown(
-            f"**Mostrando {len(conversaciones_mostrar)} de {len(conversaciones_filtradas)} conversaciones**"
+            f"**Mostrando {len(conversaciones_mostrar)} de {total_filtradas:,} conversaciones**"
         )
 
+        # Detalles de la página visible: se precargan en segundo plano
+        # (los terminados quedan en disco) y el render no espera a la red
+        cache_detalles = obtener_cache_detalles()
+        cache_detalles.precargar(
+            [c["conversation_id"] for c in conversaciones_mostrar], ELEVENLABS_API_KEY
+        )
+        if cache_detalles.pendientes:
+            st.caption(f"⏳ {cache_detalles.pendientes} detalles cargándose en segundo plano")
+
         # Lista de conversaciones
         for i, conv in enumerate(conversaciones_mostrar):
             with st.expander(
@@ -1563,8 +1635,8 @@ def main():
 
                 with col_btn1:
                     if st.button(f"🔍 Detalle", key=f"detail_{i}"):
-                        detalle, error_det = obtener_detalle_conversacion(
-                            conv["conversation_id"]
+                        detalle, error_det = cache_detalles.obtener(
+                            conv["conversation_id"], ELEVENLABS_API_KEY
                         )
 
                         if error_det:
@@ -1578,16 +1650,14 @@ def main():
                 with col_btn2:
                     if st.button(f"🎧 Audio", key=f"audio_{i}"):
                         with st.spinner("Cargando audio..."):
-                            audio_data, error_audio = obtener_audio_conversacion(
-                                conv["conversation_id"]
+                            _, error_audio = obtener_cache_audio().obtener(
+                                conv["conversation_id"], ELEVENLABS_API_KEY
                             )
 
                             if error_audio:
                                 status_container.error(f"❌ {error_audio}")
                             else:
-                                st.session_state[f'audio_{conv["conversation_id"]}'] = (
-                                    audio_data
-                                )
+                                st.session_state[f'audio_{conv["conversation_id"]}'] = True
                                 status_container.success("✅ Audio cargado")
 
                 with col_btn3:
@@ -1596,20 +1666,42 @@ def main():
                             f'show_transcript_{conv["conversation_id"]}'
                         ] = True
 
-                # Mostrar audio si está cargado
+                # Mostrar audio si está cargado: el reproductor pide el archivo en
+                # cache por su URL con token (/app/static); fuera de ./static/ se
+                # carga en memoria
                 audio_key = f'audio_{conv["conversation_id"]}'
                 if audio_key in st.session_state:
-                    st.markdown("#### 🎧 Audio de la Llamada")
-                    st.audio(st.session_state[audio_key], format="audio/mpeg")
-
-                    # Botón para descargar
-                    st.download_button(
-                        label="💾 Descargar MP3",
-                        data=st.session_state[audio_key],
-                        file_name=f"llamada_{conv['conversation_id']}.mp3",
-                        mime="audio/mpeg",
-                        key=f"download_{i}",
+                    cache_audio = obtener_cache_audio()
+                    ruta_audio, error_audio = cache_audio.obtener(
+                        conv["conversation_id"], ELEVENLABS_API_KEY
                     )
+                    if error_audio:
+                        st.error(f"❌ {error_audio}")
+                    else:
+                        st.markdown("#### 🎧 Audio de la Llamada")
+                        preview = cache_audio.vista_previa(conv["conversation_id"], ruta_audio)
+                        fuente = preview or ruta_audio
+                        st.audio(
+                            url_estatica(fuente) or fuente,
+                            format="audio/ogg" if preview else "audio/mpeg",
+                        )
+
+                        # Botón para descargar (el MP3 original, leído al pulsar; si
+                        # el cache lo expulsó entretanto, se vuelve a descargar)
+                        def leer_mp3(cid=conv["conversation_id"]):
+                            ruta, error = obtener_cache_audio().obtener(cid, ELEVENLABS_API_KEY)
+                            if error:
+                                raise RuntimeError(f"Audio no disponible: {error}")
+                            return Path(ruta).read_bytes()
+
+                        st.download_button(
+                            label="💾 Descargar MP3",
+                            data=leer_mp3,
+                            file_name=f"llamada_{conv['conversation_id']}.mp3",
+                            mime="audio/mpeg",
+                            key=f"download_{i}",
+                            on_click="ignore",
+                        )
 
                 # Mostrar detalle si está cargado
                 detalle_key = f'detalle_{conv["conversation_id"]}'
@@ -1759,71 +1851,41 @@ def main():
                         st.warning("Primero carga el detalle de la conversación")
 
         # Paginación
-        if len(conversaciones_filtradas) > mostrar_registros:
+        if total_filtradas > mostrar_registros:
             st.markdown("---")
             st.info(
-                f"📄 Mostrando {mostrar_registros} de {len(conversaciones_filtradas)} conversaciones. Ajusta el filtro 'Mostrar registros' para ver más."
+                f"📄 Mostrando {mostrar_registros} de {total_filtradas:,} conversaciones. Ajusta el filtro 'Mostrar registros' para ver más."
             )
 
         # Resumen de análisis
-        if conversaciones:
+        if total_calls:
             st.markdown("---")
             st.markdown("### 📊 Análisis de Llamadas")
 
             # Gráfico de duraciones
-            duraciones = [
-                c.get("call_duration_secs", 0)
-                for c in conversaciones
-                if c.get("call_duration_secs", 0) > 0
-            ]
+            hist_dur = historial.histograma_duraciones(AGENT_ID, bins=20)
 
-            if duraciones:
+            if hist_dur is not None:
                 col_chart1, col_chart2 = st.columns(2)
 
                 with col_chart1:
-                    fig_dur = go.Figure(
-                        go.Histogram(
-                            x=duraciones,
-                            nbinsx=20,
-                            marker=dict(
-                                color="#3b82f6", line=dict(color="#1e293b", width=1)
-                            ),
-                        )
-                    )
-
-                    fig_dur.update_layout(
-                        title=dict(
-                            text="Distribución de Duraciones",
-                            font=dict(color="#f1f5f9", size=16),
-                        ),
-                        paper_bgcolor="rgba(0,0,0,0)",
-                        plot_bgcolor="rgba(0,0,0,0)",
-                        xaxis=dict(
-                            gridcolor="#1e293b",
-                            tickfont=dict(color="#94a3b8"),
-                            title="Segundos",
-                        ),
-                        yaxis=dict(
-                            gridcolor="#1e293b",
-                            tickfont=dict(color="#94a3b8"),
-                            title="Llamadas",
-                        ),
-                        margin=dict(l=10, r=10, t=50, b=10),
-                        height=300,
+                    fig_dur = grafico_histograma(
+                        hist_dur.bordes,
+                        hist_dur.conteos,
+                        "Distribución de Duraciones",
+                        eje_x="Segundos",
+                        eje_y="Llamadas",
                     )
 
                     st.plotly_chart(fig_dur, use_container_width=True)
 
                 with col_chart2:
                     # Gráfico de éxito vs fallo
-                    estados = {}
-                    for c in conversaciones:
-                        estado = (
-                            "Exitosa"
-                            if c.get("call_successful") == "success"
-                            else "Fallida"
-                        )
-                        estados[estado] = estados.get(estado, 0) + 1
+                    estados = {
+                        e: n
+                        for e, n in (("Exitosa", successful_calls), ("Fallida", failed_calls))
+                        if n
+                    }
 
                     fig_estados = go.Figure(
                         go.Pie(
@@ -1863,7 +1925,7 @@ def main():
             
             try:
                 url = f"{APPS_SCRIPT_URL}?sheet=notificaciones"
-                response = requests.get(url, timeout=10)
+                response = CLIENTE_HTTP.get(url, endpoint="sheets.notificaciones", timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -1931,7 +1993,9 @@ def main():
                             try:
                                 webhook_url = "https://workflows.aosinternational.us/webhook/mensaje-leido"
                                 payload = {"fecha": fecha}
-                                requests.post(webhook_url, json=payload, timeout=5)
+                                CLIENTE_HTTP.post(
+                                    webhook_url, endpoint="webhook.leido", json=payload, timeout=5
+                                )
                             except:
                                 pass  # Silenciar errores para no interrumpir la UI
                             
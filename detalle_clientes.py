@@ -0,0 +1,104 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - DETALLE DE CLIENTES                                     ║
+║  Mono/multiproducto y detalle de productos por cédula                         ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Se calcula en una sola pasada agrupando por `cedula` (códigos de factorize):
+    - tipo_cliente:      "Multiproducto" si la cédula tiene más de una fila
+    - detalle_productos: fragmentos "Producto (ID:x, Nd, $saldo)" unidos con " | "
+
+El resultado se calcula una vez por versión del dataset y los filtros solo lo
+reindexan con las filas visibles.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+SEPARADOR_PRODUCTOS = " | "
+
+# ============================================================================
+# FORMATO
+# ============================================================================
+
+PLANTILLA_FRAGMENTO = "{} (ID:{}, {:.0f}d, ${:,.0f})"
+
+
+def fragmentos_productos(df: pd.DataFrame) -> np.ndarray:
+    """Fragmento de texto de cada fila: 'Producto (ID:x, Nd, $saldo)'."""
+    n = len(df)
+    prod_col = "producto" if "producto" in df.columns else "Tipo Producto"
+
+    def columna(col, defecto):
+        if col in df.columns:
+            return df[col].to_numpy(dtype=object)
+        return np.full(n, defecto, dtype=object)
+
+    nombre = columna(prod_col, "N/A")
+    # El ID sale de Num_producto; si no hay, se usa el nombre del producto
+    prod_id = nombre
+    if "Num_producto" in df.columns:
+        prod_id = np.where(df["Num_producto"].notna(), columna("Num_producto", None), nombre)
+
+    textos = map(
+        PLANTILLA_FRAGMENTO.format,
+        nombre.tolist(),
+        prod_id.tolist(),
+        columna("dias mora", 0).tolist(),
+        columna("Saldo en mora", 0).tolist(),
+    )
+    return np.fromiter(textos, dtype=object, count=n)
+
+
+# ============================================================================
+# DETALLE POR CÉDULA
+# ============================================================================
+
+
+def detalle_clientes(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    tipo_cliente y detalle_productos por fila, con el mismo índice que `df`.
+
+    Returns:
+        DataFrame con ambas columnas, o None si no hay columna `cedula`
+    """
+    if "cedula" not in df.columns:
+        return None
+
+    codigos, _ = pd.factorize(df["cedula"], use_na_sentinel=False)
+    filas_por_cedula = np.bincount(codigos)[codigos]
+    multi = filas_por_cedula > 1
+
+    detalle = fragmentos_productos(df)
+
+    # Solo las cédulas multiproducto necesitan unir fragmentos: se ordenan por
+    # grupo (estable, respeta el orden de las filas), se unen una vez por grupo
+    # y el texto unido se difunde a todas las filas del grupo
+    filas = np.flatnonzero(multi)
+    if len(filas):
+        filas = filas[np.argsort(codigos[filas], kind="stable")]
+        grupo = codigos[filas]
+        inicios = np.r_[0, np.flatnonzero(np.diff(grupo)) + 1]
+        limites = np.r_[inicios, len(filas)].tolist()
+        textos = detalle[filas].tolist()
+        unidos = [
+            SEPARADOR_PRODUCTOS.join(textos[a:b]) for a, b in zip(limites, limites[1:])
+        ]
+        por_grupo = np.empty(codigos.max() + 1, dtype=object)
+        por_grupo[grupo[inicios]] = unidos
+        detalle = detalle.copy()
+        detalle[filas] = por_grupo[grupo]
+
+    return pd.DataFrame(
+        {
+            "tipo_cliente": np.where(multi, "Multiproducto", "Monoproducto"),
+            "detalle_productos": detalle,
+        },
+        index=df.index,
+    )
@@ -0,0 +1,235 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - DETALLE DE CONVERSACIONES                               ║
+║  Precarga concurrente y cache permanente de conversaciones terminadas         ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Una conversación con estado terminal (`done`, `failed`) ya no cambia: su
+detalle (transcripción, análisis, variables) se guarda para siempre en la misma
+base SQLite del historial, con `conversation_id` como clave. Las que siguen en
+curso se guardan solo en memoria durante TTL_EN_CURSO segundos y después se
+vuelven a pedir.
+
+`precargar` recibe los ids de la página visible, devuelve al instante lo que
+ya está en cache y encola los que faltan en un pool de hilos acotado y
+persistente: el render nunca espera a la red. Un id que falló no se vuelve a
+encolar durante TTL_ERROR segundos. `obtener` (botón Detalle) espera la
+precarga en curso o pide el detalle en el momento.
+
+Uso:
+    cache = CacheDetalles()
+    detalles = cache.precargar(ids, API_KEY)   # {id: (detalle, error)} ya disponibles
+    detalle, error = cache.obtener(conversation_id, API_KEY)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cliente_http import CLIENTE_HTTP, REQUESTS_AVAILABLE
+from historial_conversaciones import ESTADOS_TERMINALES, RUTA_DB, URL_CONVERSACIONES
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+HILOS_DETALLE = 6  # detalles pedidos a la vez
+TTL_EN_CURSO = 30  # segundos que se reutiliza el detalle de una llamada en curso
+TTL_ERROR = 60  # segundos sin volver a precargar un detalle que falló
+ESPERA_DETALLE = 15  # segundos que `obtener` espera una precarga en curso
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS detalles (
+    conversation_id TEXT PRIMARY KEY,
+    estado TEXT,
+    guardado TEXT NOT NULL,
+    datos TEXT NOT NULL
+);
+"""
+
+# ============================================================================
+# API
+# ============================================================================
+
+
+def pedir_detalle(api_key: str, conversation_id: str) -> Tuple[Optional[dict], Optional[str]]:
+    """Detalle de una conversación: (detalle, error)."""
+    if not REQUESTS_AVAILABLE:
+        return None, "Requests no disponible"
+
+    try:
+        response = CLIENTE_HTTP.get(
+            f"{URL_CONVERSACIONES}/{conversation_id}",
+            endpoint="elevenlabs.detalle",
+            headers={"xi-api-key": api_key},
+            timeout=10,
+        )
+        if response.status_code == 200:
+            return response.json(), None
+        return None, f"Error {response.status_code}"
+    except Exception as e:
+        return None, str(e)
+
+
+def es_terminal(detalle: Optional[dict]) -> bool:
+    return bool(detalle) and detalle.get("status") in ESTADOS_TERMINALES
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+
+class CacheDetalles:
+    """Detalles terminados en SQLite y en curso en memoria con TTL."""
+
+    def __init__(self, ruta: str = RUTA_DB, hilos: int = HILOS_DETALLE):
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self.hilos = hilos
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.executescript(_ESQUEMA)
+        self._en_curso: Dict[str, Tuple[float, dict]] = {}
+        self._fallidos: Dict[str, Tuple[float, str]] = {}
+        self._pendientes: Dict[str, Future] = {}
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="detalles")
+        self.estadisticas = {"disco": 0, "memoria": 0, "pedidos": 0, "errores": 0}
+
+    def _leer(self, ids: List[str]) -> Dict[str, dict]:
+        if not ids:
+            return {}
+        marcadores = ",".join("?" * len(ids))
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT conversation_id, datos FROM detalles "
+                f"WHERE conversation_id IN ({marcadores})",
+                ids,
+            ).fetchall()
+            self.estadisticas["disco"] += len(filas)
+        return {cid: json.loads(datos) for cid, datos in filas}
+
+    def _guardar(self, conversation_id: str, detalle: dict):
+        if es_terminal(detalle):
+            with self._lock, self._conexion:
+                self._conexion.execute(
+                    "INSERT OR REPLACE INTO detalles VALUES (?, ?, ?, ?)",
+                    (
+                        conversation_id,
+                        detalle.get("status"),
+                        datetime.now().isoformat(),
+                        json.dumps(detalle, ensure_ascii=False),
+                    ),
+                )
+                self._en_curso.pop(conversation_id, None)
+        else:
+            with self._lock:
+                self._en_curso[conversation_id] = (time.monotonic(), detalle)
+
+    def _en_memoria(self, ids: List[str]) -> Dict[str, dict]:
+        limite = time.monotonic() - TTL_EN_CURSO
+        with self._lock:
+            for cid in [c for c, (t, _) in self._en_curso.items() if t < limite]:
+                del self._en_curso[cid]
+            encontrados = {cid: self._en_curso[cid][1] for cid in ids if cid in self._en_curso}
+            self.estadisticas["memoria"] += len(encontrados)
+            return encontrados
+
+    def _fallidos_recientes(self, ids: List[str]) -> Dict[str, str]:
+        limite = time.monotonic() - TTL_ERROR
+        with self._lock:
+            for cid in [c for c, (t, _) in self._fallidos.items() if t < limite]:
+                del self._fallidos[cid]
+            return {cid: self._fallidos[cid][1] for cid in ids if cid in self._fallidos}
+
+    def _en_cache(self, ids: List[str]) -> Dict[str, Tuple[Optional[dict], Optional[str]]]:
+        resultado = {cid: (d, None) for cid, d in self._leer(ids).items()}
+        faltan = [cid for cid in ids if cid not in resultado]
+        resultado.update({cid: (d, None) for cid, d in self._en_memoria(faltan).items()})
+        return resultado
+
+    def _pedir(
+        self, conversation_id: str, api_key: str, pedir
+    ) -> Tuple[Optional[dict], Optional[str]]:
+        try:
+            detalle, error = pedir(api_key, conversation_id)
+        except Exception as e:
+            detalle, error = None, str(e)
+        if error is None and detalle:
+            self._guardar(conversation_id, detalle)
+            with self._lock:
+                self.estadisticas["pedidos"] += 1
+                self._fallidos.pop(conversation_id, None)
+        else:
+            with self._lock:
+                self.estadisticas["pedidos"] += 1
+                self.estadisticas["errores"] += 1
+                self._fallidos[conversation_id] = (time.monotonic(), error or "Respuesta vacía")
+        with self._lock:
+            self._pendientes.pop(conversation_id, None)
+        return detalle, error
+
+    @property
+    def pendientes(self) -> int:
+        """Detalles encolados o pidiéndose ahora."""
+        return len(self._pendientes)
+
+    def precargar(
+        self, ids: Iterable[str], api_key: str, pedir=pedir_detalle
+    ) -> Dict[str, Tuple[Optional[dict], Optional[str]]]:
+        """
+        Detalles de `ids` ya disponibles; los que faltan se piden en segundo plano.
+
+        Returns:
+            {conversation_id: (detalle, error)} solo con los ids en cache o que
+            fallaron hace menos de TTL_ERROR (estos con su error)
+        """
+        ids = list(dict.fromkeys(ids))
+        resultado = self._en_cache(ids)
+
+        faltan = [cid for cid in ids if cid not in resultado]
+        fallidos = self._fallidos_recientes(faltan)
+        resultado.update({cid: (None, error) for cid, error in fallidos.items()})
+
+        encolados = 0
+        with self._lock:
+            for cid in faltan:
+                if cid not in fallidos and cid not in self._pendientes:
+                    self._pendientes[cid] = self._pool.submit(self._pedir, cid, api_key, pedir)
+                    encolados += 1
+        if encolados:
+            logger.info(f"🔍 {encolados} detalles en cola ({self.hilos} a la vez)")
+
+        return {cid: resultado[cid] for cid in ids if cid in resultado}
+
+    def obtener(
+        self, conversation_id: str, api_key: str, pedir=pedir_detalle
+    ) -> Tuple[Optional[dict], Optional[str]]:
+        """Detalle de una conversación: de cache, de su precarga en curso o pedido ahora."""
+        en_cache = self._en_cache([conversation_id])
+        if conversation_id in en_cache:
+            return en_cache[conversation_id]
+
+        with self._lock:
+            futuro = self._pendientes.get(conversation_id)
+        if futuro is not None:
+            try:
+                return futuro.result(timeout=ESPERA_DETALLE)
+            except Exception as e:
+                return None, str(e)
+        # Pedido explícito: se reintenta aunque la precarga haya fallado
+        return self._pedir(conversation_id, api_key, pedir)
+
+    def cerrar(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._conexion.close()
@@ -0,0 +1,182 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - ESQUEMA CTI                                             ║
+║  Tipos compactos para el CTI enriquecido                                      ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Después del enriquecimiento:
+    - Texto de baja cardinalidad   → Categorical (value_counts y filtros sobre códigos)
+    - campaign                     → bool
+    - dias mora                    → int16 (int32 si no cabe)
+    - Montos en pesos enteros      → entero más pequeño que los contenga
+    - Probabilidades y derivados   → float32
+
+Los casts a entero solo se aplican si todos los valores son enteros, así que
+ningún valor cambia; las columnas con decimales se dejan en float64.
+"""
+
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+COLUMNAS_CATEGORICAS = [
+    "segmento_SIMULADO",
+    "segmento_ML",
+    "mecanismo_detectado",
+    "producto",
+    "Tipo Producto",
+    "Tipo Cartera",
+    "Campaña",
+    "Nombre producto",
+    "Marca Producto",
+    "Metodo de pago",
+    "Convenio",
+    "Ciclo",
+    "BLOQUEO",
+    "EXCLUIR",
+    "Ultima Neg Aplicada",
+    "POPUP_CAMP",
+    "CONCEPTO_EXCLUSION",
+]
+
+COLUMNAS_MONTO = [
+    "Saldo en mora",
+    "Saldo total",
+    "Capital Total",
+    "Capital Mora",
+    "Cuota Mensual Aprox",
+]
+
+COLUMNAS_FLOAT32 = [
+    "probabilidad_pago_SIMULADA",
+    "probabilidad_pago_ML",
+    "valor_esperado_SIMULADO",
+    "valor_esperado_ML",
+    "GAC_proyectado",
+]
+
+SEGMENTOS = ["A", "B", "C", "D"]
+
+# ============================================================================
+# UTILIDADES
+# ============================================================================
+
+
+def mascara_campana(serie: pd.Series) -> pd.Series:
+    """True donde el cliente tiene campaña (acepta bool o texto 'true')."""
+    if serie.dtype == bool:
+        return serie
+    return serie.astype(str).str.lower() == "true"
+
+
+def conteos(serie: pd.Series) -> Dict:
+    """value_counts como dict, sin las categorías que no aparecen."""
+    vc = serie.value_counts()
+    return vc[vc > 0].to_dict()
+
+
+def segmentar(probabilidad) -> pd.Categorical:
+    """Segmento A/B/C/D por umbrales 0.75 / 0.50 / 0.25 de probabilidad."""
+    cortes = np.searchsorted([0.25, 0.50, 0.75], probabilidad, side="right")
+    return pd.Categorical.from_codes(3 - cortes, categories=SEGMENTOS)
+
+
+def memoria_mb(df: pd.DataFrame) -> float:
+    """Memoria del DataFrame en MB (incluye el contenido de los objetos)."""
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def _a_entero(serie: pd.Series, minimo: str = "int8") -> pd.Series:
+    """Entero más pequeño (desde `minimo`) si todos los valores son enteros."""
+    valores = serie.to_numpy()
+    if not np.issubdtype(valores.dtype, np.number) or not len(valores):
+        return serie
+    if not (np.isfinite(valores).all() and (np.mod(valores, 1) == 0).all()):
+        return serie
+
+    for tipo in ("int8", "int16", "int32", "int64"):
+        if np.dtype(tipo).itemsize < np.dtype(minimo).itemsize:
+            continue
+        info = np.iinfo(tipo)
+        if valores.min() >= info.min and valores.max() <= info.max:
+            return serie.astype(tipo)
+    return serie
+
+
+# ============================================================================
+# COMPACTACIÓN
+# ============================================================================
+
+
+def compactar_cti(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Convierte en sitio las columnas del CTI enriquecido a tipos compactos.
+
+    Returns:
+        Memoria de las columnas convertidas: {"antes_mb": ..., "despues_mb": ...}
+    """
+    conversiones = {}
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns and not isinstance(df[col].dtype, CategoricalDtype):
+            conversiones[col] = lambda s: s.astype("category")
+    if "campaign" in df.columns:
+        conversiones["campaign"] = mascara_campana
+    if "dias mora" in df.columns:
+        conversiones["dias mora"] = lambda s: _a_entero(s, minimo="int16")
+    for col in COLUMNAS_MONTO:
+        if col in df.columns:
+            conversiones[col] = lambda s: _a_entero(s, minimo="int32")
+    for col in COLUMNAS_FLOAT32:
+        if col in df.columns and df[col].dtype == np.float64:
+            conversiones[col] = lambda s: s.astype(np.float32)
+
+    antes = despues = 0
+    for col, convertir in conversiones.items():
+        antes += df[col].memory_usage(index=False, deep=True)
+        df[col] = convertir(df[col])
+        despues += df[col].memory_usage(index=False, deep=True)
+
+    reporte = {"antes_mb": round(antes / 1e6, 2), "despues_mb": round(despues / 1e6, 2)}
+    logger.info(
+        f"💾 CTI compactado: {reporte['antes_mb']:.1f} MB → {reporte['despues_mb']:.1f} MB"
+    )
+    return reporte
+
+
+def concatenar_cti(partes: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatena frames compactados conservando las columnas categóricas.
+
+    `pd.concat` convierte a object las categóricas con categorías distintas;
+    aquí se unifican antes (solo se reasignan códigos, sin tocar el texto).
+    """
+    partes = [p for p in partes if len(p)] or partes[:1]
+    if len(partes) == 1:
+        return partes[0].reset_index(drop=True)
+
+    alineadas = [p.copy(deep=False) for p in partes]
+    for col, dtype in partes[0].dtypes.items():
+        if not isinstance(dtype, CategoricalDtype):
+            continue
+        if not all(isinstance(p[col].dtype, CategoricalDtype) for p in partes if col in p):
+            continue
+        # Unión de categorías en orden de aparición (sin recorrer los datos)
+        categorias = partes[0][col].cat.categories
+        for p in partes[1:]:
+            if col in p:
+                nuevas = p[col].cat.categories.difference(categorias, sort=False)
+                categorias = categorias.append(nuevas)
+        for p in alineadas:
+            if col in p:
+                p[col] = p[col].cat.set_categories(categorias)
+
+    return pd.concat(alineadas, ignore_index=True)
@@ -0,0 +1,171 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - EXPORTADOR                                              ║
+║  Exportación bajo demanda a CSV, Parquet (zstd) o Excel por bloques           ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+El archivo solo se genera cuando el usuario pulsa descargar (`st.download_button`
+con un callable). Se escribe por bloques de FILAS_POR_BLOQUE filas en un
+`SpooledTemporaryFile`, que pasa a disco al superar MAX_MEMORIA_SPOOL; así un
+export grande no necesita una copia del DataFrame además del archivo. Al final
+se devuelven los bytes, que es lo que `st.download_button` acepta de un callable
+(no acepta el `SpooledTemporaryFile`).
+
+    - CSV:     cabecera una vez y to_csv por bloque
+    - Parquet: un row group por bloque con pyarrow.parquet.ParquetWriter (zstd)
+    - Excel:   openpyxl en modo write_only (filas en streaming)
+"""
+
+import logging
+import tempfile
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Intentar importar pyarrow (Parquet)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Intentar importar openpyxl (Excel)
+try:
+    from openpyxl import Workbook
+
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+FILAS_POR_BLOQUE = 50_000
+MAX_MEMORIA_SPOOL = 32 * 1024 * 1024  # por encima, el temporal pasa a disco
+MAX_FILAS_EXCEL = 1_048_575  # límite de filas de una hoja (sin la cabecera)
+
+# nombre → (extensión, mime)
+FORMATOS: Dict[str, Tuple[str, str]] = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def formatos_disponibles() -> list:
+    """Formatos cuya dependencia está instalada."""
+    disponibles = {"CSV": True, "Parquet": PYARROW_AVAILABLE, "Excel": OPENPYXL_AVAILABLE}
+    return [f for f in FORMATOS if disponibles[f]]
+
+
+# ============================================================================
+# ESCRITORES POR BLOQUE
+# ============================================================================
+
+
+def _bloques(df: pd.DataFrame, posiciones: Optional[np.ndarray], filas: int):
+    """Bloques de filas; con `posiciones` se toma cada bloque sin copiar el resto."""
+    total = len(df) if posiciones is None else len(posiciones)
+    for inicio in range(0, total, filas):
+        if posiciones is None:
+            yield df.iloc[inicio : inicio + filas]
+        else:
+            yield df.take(posiciones[inicio : inicio + filas])
+
+
+def _escribir_csv(df: pd.DataFrame, posiciones, archivo, filas: int):
+    archivo.write(df.head(0).to_csv(index=False).encode("utf-8"))
+    for bloque in _bloques(df, posiciones, filas):
+        archivo.write(bloque.to_csv(index=False, header=False).encode("utf-8"))
+
+
+def _es_texto(serie: pd.Series) -> bool:
+    return serie.dtype == object or isinstance(
+        serie.dtype, (pd.CategoricalDtype, pd.StringDtype)
+    )
+
+
+def _escribir_parquet(df: pd.DataFrame, posiciones, archivo, filas: int):
+    # Columnas de texto (object, categóricas) como string: el esquema debe ser
+    # el mismo en todos los row groups y cada bloque tendría su diccionario
+    texto = [c for c in df.columns if _es_texto(df[c])]
+    otras = pa.Schema.from_pandas(df.head(0).drop(columns=texto), preserve_index=False)
+    esquema = pa.schema(
+        [
+            pa.field(str(c), pa.string()) if c in texto else otras.field(str(c))
+            for c in df.columns
+        ]
+    )
+    with pq.ParquetWriter(archivo, esquema, compression="zstd") as escritor:
+        for bloque in _bloques(df, posiciones, filas):
+            bloque = bloque.astype({c: "string" for c in texto})
+            escritor.write_table(
+                pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False)
+            )
+
+
+def _escribir_excel(df: pd.DataFrame, posiciones, archivo, filas: int):
+    total = len(df) if posiciones is None else len(posiciones)
+    if total > MAX_FILAS_EXCEL:
+        raise ValueError(f"Excel admite hasta {MAX_FILAS_EXCEL:,} filas; usa CSV o Parquet")
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet("Cobranzas")
+    hoja.append([str(c) for c in df.columns])
+    for bloque in _bloques(df, posiciones, filas):
+        valores = bloque.astype(object).to_numpy()
+        valores[pd.isna(valores)] = None
+        for fila in valores.tolist():
+            hoja.append(fila)
+    libro.save(archivo)
+
+
+_ESCRITORES: Dict[str, Callable] = {
+    "CSV": _escribir_csv,
+    "Parquet": _escribir_parquet,
+    "Excel": _escribir_excel,
+}
+
+# ============================================================================
+# EXPORTAR
+# ============================================================================
+
+
+def exportar(
+    df: pd.DataFrame,
+    formato: str = "CSV",
+    posiciones: Optional[np.ndarray] = None,
+    filas_por_bloque: int = FILAS_POR_BLOQUE,
+) -> bytes:
+    """
+    Escribe el export por bloques en un temporal y devuelve su contenido.
+
+    Args:
+        df: Datos a exportar
+        formato: Una de las claves de FORMATOS
+        posiciones: Filas a exportar (None = todas)
+        filas_por_bloque: Filas que se serializan de una vez
+
+    Returns:
+        Contenido del archivo, listo para `st.download_button`
+    """
+    if formato not in formatos_disponibles():
+        raise ValueError(f"Formato no disponible: {formato}")
+
+    with tempfile.SpooledTemporaryFile(max_size=MAX_MEMORIA_SPOOL) as archivo:
+        _ESCRITORES[formato](df, posiciones, archivo, filas_por_bloque)
+        archivo.seek(0)
+        contenido = archivo.read()
+    total = len(df) if posiciones is None else len(posiciones)
+    logger.info(f"📤 Export {formato}: {total:,} filas")
+    return contenido
+
+
+def nombre_archivo(prefijo: str, formato: str, momento) -> str:
+    return f"{prefijo}_{momento.strftime('%Y%m%d_%H%M%S')}.{FORMATOS[formato][0]}"
@@ -0,0 +1,411 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - FUENTE GOOGLE SHEETS                                    ║
+║  Descarga del payload de Apps Script con huella en streaming                  ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+La huella del payload se calcula mientras se recibe la respuesta (BLAKE2b sobre
+los bytes crudos), sin volver a serializar los registros. Si el servidor envía
+una versión (`ETag` o `X-Sheet-Version`) se usa directamente como huella.
+
+Protocolo de sincronización (opcional en el Apps Script):
+    GET ?accion=version             → {"revision": 42}
+    GET ?accion=cambios&desde=40    → {"revision": 42, "completo": false,
+                                       "filas": [...], "eliminadas": [[uid, obligacion], ...]}
+
+`SincronizadorSheets` consulta primero la revisión; si no cambió no descarga
+nada, y si cambió pide solo las filas modificadas desde la revisión conocida y
+las aplica sobre su copia local (clave `unique_user_id` + `OBLIGACION`). Si el
+servidor no implementa el protocolo, o el delta no se puede aplicar, se usa la
+descarga completa de siempre.
+"""
+
+import json
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from cliente_http import CLIENTE_HTTP, REQUESTS_AVAILABLE
+
+if REQUESTS_AVAILABLE:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+TAMANO_BLOQUE = 256 * 1024  # bytes por bloque leído del socket
+CABECERAS_VERSION = ("ETag", "X-Sheet-Version")
+
+ACCION_VERSION = "version"
+ACCION_CAMBIOS = "cambios"
+ACCION_PAGINA = "pagina"
+
+TAMANO_PAGINA = 5000  # filas por página
+HILOS_PAGINAS = 4  # páginas en vuelo a la vez
+REINTENTOS_PAGINA = 2
+PAUSA_REINTENTO = 0.5  # segundos (se multiplica por el número de intento)
+COLUMNAS_CLAVE = ("unique_user_id", "OBLIGACION")
+
+# ============================================================================
+# HUELLA
+# ============================================================================
+
+
+def version_servidor(headers) -> Optional[str]:
+    """Versión publicada por el servidor, si existe."""
+    for cabecera in CABECERAS_VERSION:
+        valor = headers.get(cabecera)
+        if valor:
+            return f"{cabecera.lower()}:{valor}"
+    return None
+
+
+def leer_con_huella(
+    response, calcular_huella: bool = True
+) -> Tuple[bytearray, Optional[str]]:
+    """Lee el cuerpo por bloques alimentando un BLAKE2b incremental."""
+    hasher = hashlib.blake2b(digest_size=16) if calcular_huella else None
+    cuerpo = bytearray()
+
+    for bloque in response.iter_content(chunk_size=TAMANO_BLOQUE):
+        if hasher is not None:
+            hasher.update(bloque)
+        cuerpo += bloque
+
+    huella = f"blake2b:{hasher.hexdigest()}" if hasher is not None else None
+    return cuerpo, huella
+
+
+# ============================================================================
+# DESCARGA
+# ============================================================================
+
+
+def descargar_sheets(
+    url: str, timeout: int = 10
+) -> Tuple[Any, Optional[str], Optional[str]]:
+    """
+    Descarga el payload de Apps Script.
+
+    Returns:
+        (datos, huella, error): datos es la lista de registros o None
+    """
+    if not REQUESTS_AVAILABLE:
+        return None, None, "Error: requests no disponible"
+
+    try:
+        with CLIENTE_HTTP.get(
+            url, endpoint="sheets.completo", timeout=timeout, stream=True
+        ) as response:
+            if response.status_code != 200:
+                return None, None, f"Error HTTP {response.status_code}"
+
+            version = version_servidor(response.headers)
+            cuerpo, huella = leer_con_huella(response, calcular_huella=version is None)
+
+        data = json.loads(cuerpo)
+
+        if isinstance(data, list) and len(data) > 0:
+            return data, version or huella, None
+        return None, None, "No se encontraron datos"
+
+    except requests.Timeout:
+        return None, None, "Timeout"
+    except requests.ConnectionError:
+        return None, None, "Error de conexión"
+    except Exception as e:
+        return None, None, f"Error: {str(e)}"
+
+
+# ============================================================================
+# DESCARGA PAGINADA
+# ============================================================================
+
+
+class PaginacionNoSoportada(Exception):
+    """
+    El Apps Script no implementa `accion=pagina`.
+
+    Si respondió con el payload completo (lista), viene en `respuesta` para no
+    descargarlo dos veces.
+    """
+
+    def __init__(self, respuesta=None, cuerpo: bytes = b""):
+        super().__init__("accion=pagina no soportada")
+        self.respuesta = respuesta
+        self.cuerpo = cuerpo
+
+
+def decodificar_pagina(pagina: dict) -> List[dict]:
+    """Filas de una página columnar {"columnas": [...], "filas": [[...], ...]}."""
+    columnas = pagina["columnas"]
+    return [dict(zip(columnas, fila)) for fila in pagina["filas"]]
+
+
+def _pedir_pagina(
+    sesion, url: str, offset: int, limite: int, timeout: int, reintentos: int
+) -> Tuple[dict, bytes]:
+    """Una página con reintentos propios; solo se repite la página que falló."""
+    params = {"accion": ACCION_PAGINA, "offset": offset, "limite": limite}
+    for intento in range(reintentos + 1):
+        try:
+            response = sesion.get(url, endpoint="sheets.pagina", params=params, timeout=timeout)
+            if response.status_code != 200:
+                raise requests.HTTPError(f"Error HTTP {response.status_code}")
+            cuerpo = response.content
+            pagina = json.loads(cuerpo)
+            if not isinstance(pagina, dict) or "total" not in pagina:
+                raise PaginacionNoSoportada(pagina, cuerpo)
+            return pagina, cuerpo
+        except (requests.RequestException, ValueError) as e:
+            if intento == reintentos:
+                raise
+            logger.warning(f"⚠️ Página {offset} falló ({e}), reintento {intento + 1}")
+            time.sleep(PAUSA_REINTENTO * (intento + 1))
+
+
+def descargar_paginado(
+    url: str,
+    sesion=None,
+    tamano_pagina: int = TAMANO_PAGINA,
+    hilos: int = HILOS_PAGINAS,
+    timeout: int = 10,
+    reintentos: int = REINTENTOS_PAGINA,
+) -> Tuple[Any, Optional[str], Optional[str]]:
+    """
+    Descarga el payload por páginas en paralelo (pool de hilos acotado).
+
+    La primera página informa el total; las demás se piden a la vez sobre el
+    pool de `CLIENTE_HTTP` (o el cliente `sesion`) y se reensamblan en orden. La huella combina el BLAKE2b de
+    cada página en orden, o usa la revisión si el servidor la informa.
+
+    Raises:
+        PaginacionNoSoportada: si el servidor no implementa `accion=pagina`
+
+    Returns:
+        (datos, huella, error), igual que `descargar_sheets`
+    """
+    sesion = sesion or CLIENTE_HTTP
+    try:
+        primera, cuerpo = _pedir_pagina(sesion, url, 0, tamano_pagina, timeout, reintentos)
+        total = int(primera["total"])
+        paginas = {0: (primera, cuerpo)}
+
+        offsets = range(tamano_pagina, total, tamano_pagina)
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            futuros = {
+                pool.submit(
+                    _pedir_pagina, sesion, url, offset, tamano_pagina, timeout, reintentos
+                ): offset
+                for offset in offsets
+            }
+            for futuro in as_completed(futuros):
+                paginas[futuros[futuro]] = futuro.result()
+
+    except PaginacionNoSoportada:
+        raise
+    except requests.Timeout:
+        return None, None, "Timeout"
+    except requests.ConnectionError:
+        return None, None, "Error de conexión"
+    except Exception as e:
+        return None, None, f"Error: {str(e)}"
+
+    # Todas las páginas deben venir de la misma revisión
+    revisiones = {p.get("revision") for p, _ in paginas.values()}
+    if len(revisiones) > 1:
+        return None, None, "Error: la hoja cambió durante la descarga"
+
+    hasher = hashlib.blake2b(digest_size=16)
+    datos = []
+    for offset in sorted(paginas):
+        pagina, cuerpo = paginas[offset]
+        hasher.update(hashlib.blake2b(cuerpo, digest_size=16).digest())
+        datos.extend(decodificar_pagina(pagina))
+
+    if not datos:
+        return None, None, "No se encontraron datos"
+    revision = revisiones.pop()
+    huella = f"rev:{revision}" if revision is not None else f"blake2b:{hasher.hexdigest()}"
+    return datos, huella, None
+
+
+# ============================================================================
+# SINCRONIZACIÓN INCREMENTAL
+# ============================================================================
+
+
+def _clave(registro: dict) -> tuple:
+    return tuple(str(registro.get(c)) for c in COLUMNAS_CLAVE)
+
+
+def _consultar_json(sesion, url: str, params: dict, timeout: int) -> Optional[dict]:
+    """
+    GET con parámetros; None si la respuesta 200 no es un objeto JSON.
+
+    Un estado distinto de 200 lanza `requests.HTTPError`: es un fallo de la
+    consulta, no una respuesta del Apps Script sobre el protocolo.
+    """
+    response = sesion.get(
+        url, endpoint=f"sheets.{params['accion']}", params=params, timeout=timeout
+    )
+    if response.status_code != 200:
+        raise requests.HTTPError(f"Error {response.status_code}", response=response)
+    try:
+        data = response.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def aplicar_cambios(
+    registros: List[dict], filas: List[dict], eliminadas: List[list]
+) -> Optional[List[dict]]:
+    """
+    Aplica un delta sobre una copia de `registros`.
+
+    Las filas existentes se reemplazan en su lugar y las nuevas van al final.
+    Devuelve None si las claves no son únicas (el delta sería ambiguo).
+    """
+    posicion = {_clave(r): i for i, r in enumerate(registros)}
+    if len(posicion) != len(registros):
+        return None
+
+    nuevos = list(registros)
+    for fila in filas:
+        i = posicion.get(_clave(fila))
+        if i is None:
+            posicion[_clave(fila)] = len(nuevos)
+            nuevos.append(fila)
+        else:
+            nuevos[i] = fila
+
+    borrar = {tuple(str(v) for v in clave) for clave in eliminadas}
+    if borrar:
+        nuevos = [r for r in nuevos if _clave(r) not in borrar]
+    return nuevos
+
+
+class SincronizadorSheets:
+    """Copia local del payload, actualizada por revisión y deltas."""
+
+    def __init__(self, url: str, timeout: int = 10):
+        self.url = url
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._registros: Optional[List[dict]] = None
+        self._revision = None
+        self._huella: Optional[str] = None
+        self._soporta_protocolo: Optional[bool] = None  # None = aún no se sabe
+        self._soporta_paginas: Optional[bool] = None
+        self._sesion = CLIENTE_HTTP
+        self.estadisticas: Dict[str, int] = {
+            "sin_cambios": 0,
+            "deltas": 0,
+            "completas": 0,
+            "filas_delta": 0,
+        }
+
+    def _descargar(self) -> Tuple[Any, Optional[str], Optional[str]]:
+        """Descarga paginada en paralelo o, si no está soportada, de una vez."""
+        if self._soporta_paginas is not False:
+            try:
+                datos, huella, error = descargar_paginado(
+                    self.url, self._sesion, timeout=self.timeout
+                )
+                if error is None or self._soporta_paginas:
+                    self._soporta_paginas = True
+                    return datos, huella, error
+            except PaginacionNoSoportada as e:
+                self._soporta_paginas = False
+                logger.info("ℹ️ Apps Script sin paginación, descarga completa")
+                if isinstance(e.respuesta, list) and e.respuesta:
+                    huella = f"blake2b:{hashlib.blake2b(e.cuerpo, digest_size=16).hexdigest()}"
+                    return e.respuesta, huella, None
+        return descargar_sheets(self.url, self.timeout)
+
+    def _completa(self, revision=None) -> Tuple[Any, Optional[str], Optional[str]]:
+        data, huella, error = self._descargar()
+        if error is not None:
+            return None, None, error
+
+        self._registros = data
+        self._revision = revision
+        self._huella = f"rev:{revision}" if revision is not None else huella
+        self.estadisticas["completas"] += 1
+        return data, self._huella, None
+
+    def sincronizar(self) -> Tuple[Any, Optional[str], Optional[str]]:
+        """
+        Trae el payload actual con el menor tráfico posible.
+
+        Returns:
+            (datos, huella, error), igual que `descargar_sheets`
+        """
+        if not REQUESTS_AVAILABLE:
+            return None, None, "Error: requests no disponible"
+
+        with self._lock:
+            if self._soporta_protocolo is False:
+                return self._completa()
+
+            try:
+                version = _consultar_json(
+                    self._sesion, self.url, {"accion": ACCION_VERSION}, self.timeout
+                )
+            except requests.RequestException as e:
+                # Fallo transitorio (timeout, red, 5xx): descarga completa solo
+                # en este ciclo; el siguiente vuelve a consultar la versión
+                logger.warning(f"⚠️ Consulta de versión falló, descarga completa: {e}")
+                return self._completa()
+            if version is None or "revision" not in version:
+                # Respuesta 200 sin revisión: el Apps Script no implementa el protocolo
+                self._soporta_protocolo = False
+                logger.info("ℹ️ Apps Script sin protocolo de revisiones, descarga completa")
+                return self._completa()
+
+            self._soporta_protocolo = True
+            revision = version["revision"]
+
+            # Sin copia local o sin revisión conocida (tras un fallo) no hay delta posible
+            if self._registros is None or self._revision is None:
+                return self._completa(revision)
+
+            if revision == self._revision:
+                self.estadisticas["sin_cambios"] += 1
+                return self._registros, self._huella, None
+
+            try:
+                delta = _consultar_json(
+                    self._sesion,
+                    self.url,
+                    {"accion": ACCION_CAMBIOS, "desde": self._revision},
+                    self.timeout,
+                )
+            except requests.RequestException:
+                delta = None
+            if not delta or delta.get("completo", True) or "revision" not in delta:
+                return self._completa(revision)
+
+            nuevos = aplicar_cambios(
+                self._registros, delta.get("filas", []), delta.get("eliminadas", [])
+            )
+            if not nuevos:
+                return self._completa(revision)
+
+            self._registros = nuevos
+            self._revision = delta["revision"]
+            self._huella = f"rev:{self._revision}"
+            self.estadisticas["deltas"] += 1
+            self.estadisticas["filas_delta"] += len(delta.get("filas", []))
+            logger.info(
+                f"🔄 Delta rev {self._revision}: {len(delta.get('filas', []))} filas, "
+                f"{len(delta.get('eliminadas', []))} eliminadas"
+            )
+            return self._registros, self._huella, None
@@ -0,0 +1,386 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - HISTORIAL DE CONVERSACIONES                             ║
+║  Copia local en SQLite de las conversaciones de ElevenLabs                    ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+La pestaña de Trazabilidad consulta esta base en lugar de la API: métricas,
+filtros y gráficos son SQL sobre índices y no dependen de cuántas llamadas se
+hayan hecho.
+
+Sincronización incremental por agente:
+    - Primera vez: se recorre `cursor` hasta agotar las páginas. El cursor se
+      guarda tras cada página, así un backfill interrumpido continúa donde quedó
+    - Después: solo conversaciones con `start_time_unix_secs` desde la marca de
+      agua (`call_start_after_unix`). La marca es la última hora de inicio vista,
+      o la de la conversación más antigua aún sin estado terminal, para que las
+      llamadas en curso se vuelvan a pedir hasta que terminen. Una que nunca
+      llega a estado terminal no puede fijar la marca para siempre: se mira
+      como mucho VENTANA_EN_CURSO hacia atrás (el detalle la refresca aparte)
+    - Las páginas llegan de la más reciente a la más antigua, así que la marca
+      se fija al empezar una pasada incremental y se guarda con el cursor; si
+      la pasada se corta, la siguiente continúa con esa marca y ese cursor en
+      vez de recalcularla (lo que saltaría las páginas más antiguas)
+
+`sincronizar_en_fondo` corre la sincronización en un hilo propio (a lo sumo
+una cada INTERVALO_SYNC segundos por agente): el dashboard lee la base sin
+esperar a la red, incluido el primer backfill, que se ve crecer página a página.
+
+Uso:
+    historial = HistorialConversaciones("02_datos/cache/conversaciones.sqlite")
+    historial.sincronizar_en_fondo(AGENT_ID, API_KEY)  # último resultado o None
+    historial.metricas(AGENT_ID)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agregados_graficos import Histograma
+from cliente_http import CLIENTE_HTTP, REQUESTS_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+RUTA_DB = os.getenv("CONVERSACIONES_DB", "02_datos/cache/conversaciones.sqlite")
+URL_CONVERSACIONES = "https://api.elevenlabs.io/v1/convai/conversations"
+TAMANO_PAGINA = 100  # máximo que acepta la API
+MAX_PAGINAS = 1000  # tope de seguridad por sincronización
+VENTANA_EN_CURSO = 6 * 3600  # segundos; más atrás una llamada "en curso" se da por perdida
+INTERVALO_SYNC = 30  # segundos mínimos entre sincronizaciones en segundo plano
+
+ESTADOS_TERMINALES = ("done", "failed")
+
+# Filtro de duración → condición SQL
+CONDICIONES_DURACION = {
+    "cortas": "duracion < 30",
+    "normales": "duracion BETWEEN 30 AND 120",
+    "largas": "duracion > 120",
+}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS conversaciones (
+    conversation_id TEXT PRIMARY KEY,
+    agent_id TEXT NOT NULL,
+    inicio INTEGER NOT NULL,
+    duracion REAL NOT NULL,
+    exitosa INTEGER NOT NULL,
+    estado TEXT,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_conv_agente_inicio ON conversaciones (agent_id, inicio DESC);
+CREATE INDEX IF NOT EXISTS ix_conv_agente_exito ON conversaciones (agent_id, exitosa, duracion);
+CREATE INDEX IF NOT EXISTS ix_conv_agente_estado ON conversaciones (agent_id, estado);
+CREATE TABLE IF NOT EXISTS sincronizacion (
+    agent_id TEXT PRIMARY KEY,
+    completo INTEGER NOT NULL DEFAULT 0,
+    cursor TEXT,
+    ultima TEXT,
+    marca INTEGER
+);
+"""
+
+# ============================================================================
+# API
+# ============================================================================
+
+
+def pedir_conversaciones(
+    api_key: str,
+    agent_id: str,
+    cursor: Optional[str] = None,
+    despues_de: Optional[int] = None,
+    tamano: int = TAMANO_PAGINA,
+) -> Tuple[Optional[dict], Optional[str]]:
+    """Una página del listado de conversaciones: (data, error)."""
+    if not REQUESTS_AVAILABLE:
+        return None, "Requests no disponible"
+
+    params = {"agent_id": agent_id, "page_size": tamano}
+    if cursor:
+        params["cursor"] = cursor
+    if despues_de is not None:
+        params["call_start_after_unix"] = despues_de
+    try:
+        response = CLIENTE_HTTP.get(
+            URL_CONVERSACIONES,
+            endpoint="elevenlabs.conversaciones",
+            headers={"xi-api-key": api_key},
+            params=params,
+            timeout=10,
+        )
+        if response.status_code == 200:
+            return response.json(), None
+        return None, f"Error {response.status_code}"
+    except Exception as e:
+        return None, str(e)
+
+
+# ============================================================================
+# HISTORIAL
+# ============================================================================
+
+
+def _fila(agent_id: str, conv: dict) -> tuple:
+    return (
+        conv["conversation_id"],
+        agent_id,
+        int(conv.get("start_time_unix_secs") or 0),
+        float(conv.get("call_duration_secs") or 0),
+        int(conv.get("call_successful") == "success"),
+        conv.get("status"),
+        json.dumps(conv, ensure_ascii=False),
+    )
+
+
+class HistorialConversaciones:
+    """Conversaciones por agente en SQLite, con sincronización incremental."""
+
+    def __init__(self, ruta: str = RUTA_DB):
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.executescript(_ESQUEMA)
+        self._fondo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="historial")
+        self._syncs: Dict[str, Tuple[float, Future]] = {}
+        self._ultimo_sync: Dict[str, Dict] = {}
+        columnas = {c[1] for c in self._conexion.execute("PRAGMA table_info(sincronizacion)")}
+        if "marca" not in columnas:  # bases creadas antes de guardar la marca
+            self._conexion.execute("ALTER TABLE sincronizacion ADD COLUMN marca INTEGER")
+
+    def _consultar(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conexion.execute(sql, params).fetchall()
+
+    # ------------------------------------------------------------------
+    # Sincronización
+    # ------------------------------------------------------------------
+
+    def _estado_sync(self, agent_id: str) -> Tuple[bool, Optional[str], Optional[int]]:
+        filas = self._consultar(
+            "SELECT completo, cursor, marca FROM sincronizacion WHERE agent_id = ?",
+            (agent_id,),
+        )
+        return (bool(filas[0][0]), filas[0][1], filas[0][2]) if filas else (False, None, None)
+
+    def marca_agua(self, agent_id: str) -> Optional[int]:
+        """Inicio desde el que hay que volver a pedir (None si no hay datos)."""
+        marcadores = ",".join("?" * len(ESTADOS_TERMINALES))
+        ((abierta, ultima),) = self._consultar(
+            "SELECT (SELECT MIN(inicio) FROM conversaciones WHERE agent_id = ? "
+            f"AND (estado IS NULL OR estado NOT IN ({marcadores}))), "
+            "(SELECT MAX(inicio) FROM conversaciones WHERE agent_id = ?)",
+            (agent_id, *ESTADOS_TERMINALES, agent_id),
+        )
+        if abierta is None:
+            return ultima
+        return max(abierta, ultima - VENTANA_EN_CURSO)
+
+    def _guardar(self, agent_id: str, conversaciones: List[dict], **sync):
+        filas = [_fila(agent_id, c) for c in conversaciones]
+        with self._lock, self._conexion:
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO conversaciones VALUES (?, ?, ?, ?, ?, ?, ?)", filas
+            )
+            if sync:
+                self._conexion.execute(
+                    "INSERT INTO sincronizacion (agent_id, completo, cursor, ultima, marca) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT(agent_id) DO UPDATE SET "
+                    "completo = excluded.completo, cursor = excluded.cursor, "
+                    "ultima = excluded.ultima, marca = excluded.marca",
+                    (
+                        agent_id,
+                        int(sync["completo"]),
+                        sync["cursor"],
+                        datetime.now().isoformat(),
+                        sync.get("marca"),
+                    ),
+                )
+
+    def sincronizar(self, agent_id: str, api_key: str, pedir=pedir_conversaciones) -> Dict:
+        """
+        Trae lo que falta desde la API.
+
+        Args:
+            agent_id: Agente de ElevenLabs
+            api_key: Clave de la API
+            pedir: Función que trae una página (como `pedir_conversaciones`)
+
+        Returns:
+            {"recibidas": n, "paginas": p, "completo": bool, "error": str | None}
+        """
+        with self._sync_lock:
+            completo, cursor, marca = self._estado_sync(agent_id)
+            despues_de = None
+            if completo:
+                # Pasada incremental nueva: la marca se fija antes de la primera página.
+                # Con cursor guardado, la anterior se cortó y se continúa con su marca
+                if cursor is None:
+                    marca = self.marca_agua(agent_id)
+                despues_de = marca - 1 if marca is not None else None
+
+            resultado = {"recibidas": 0, "paginas": 0, "completo": completo, "error": None}
+            for _ in range(MAX_PAGINAS):
+                data, error = pedir(api_key, agent_id, cursor=cursor, despues_de=despues_de)
+                if error or not isinstance(data, dict):
+                    resultado["error"] = error or "Respuesta inválida"
+                    break
+
+                conversaciones = data.get("conversations") or []
+                cursor = data.get("next_cursor") if data.get("has_more") else None
+                # Si la API ignorara call_start_after_unix, la página ya es antigua
+                if despues_de is not None and conversaciones and all(
+                    int(c.get("start_time_unix_secs") or 0) <= despues_de for c in conversaciones
+                ):
+                    cursor = None
+                    conversaciones = []
+
+                terminado = cursor is None
+                self._guardar(
+                    agent_id,
+                    conversaciones,
+                    completo=completo or terminado,
+                    cursor=cursor,
+                    marca=marca if completo and not terminado else None,
+                )
+                resultado["recibidas"] += len(conversaciones)
+                resultado["paginas"] += 1
+                if terminado:
+                    resultado["completo"] = True
+                    break
+
+            if resultado["recibidas"]:
+                logger.info(
+                    f"📞 Historial {agent_id}: {resultado['recibidas']} conversaciones "
+                    f"en {resultado['paginas']} páginas"
+                )
+            return resultado
+
+    def sincronizar_en_fondo(
+        self, agent_id: str, api_key: str, pedir=pedir_conversaciones
+    ) -> Optional[Dict]:
+        """
+        Lanza `sincronizar` en segundo plano si no hay una en curso y pasaron
+        INTERVALO_SYNC segundos desde la anterior.
+
+        Returns:
+            Resultado de la última sincronización terminada (None si aún no hay)
+        """
+        with self._lock:
+            lanzada, futuro = self._syncs.get(agent_id, (float("-inf"), None))
+            if futuro is not None and futuro.done():
+                try:
+                    self._ultimo_sync[agent_id] = futuro.result()
+                except Exception as e:
+                    self._ultimo_sync[agent_id] = {
+                        "recibidas": 0, "paginas": 0, "completo": False, "error": str(e)
+                    }
+            if (futuro is None or futuro.done()) and time.monotonic() - lanzada >= INTERVALO_SYNC:
+                self._syncs[agent_id] = (
+                    time.monotonic(),
+                    self._fondo.submit(self.sincronizar, agent_id, api_key, pedir),
+                )
+            return self._ultimo_sync.get(agent_id)
+
+    def sincronizando(self, agent_id: str) -> bool:
+        """True mientras hay una sincronización en segundo plano del agente."""
+        with self._lock:
+            _, futuro = self._syncs.get(agent_id, (None, None))
+        return futuro is not None and not futuro.done()
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _filtro(exitosa: Optional[bool], duracion: Optional[str]) -> Tuple[str, tuple]:
+        condiciones, params = ["agent_id = ?"], []
+        if exitosa is not None:
+            condiciones.append("exitosa = ?")
+            params.append(int(exitosa))
+        if duracion is not None:
+            condiciones.append(CONDICIONES_DURACION[duracion])
+        return " AND ".join(condiciones), tuple(params)
+
+    def metricas(self, agent_id: str) -> Dict[str, float]:
+        """Totales del agente: llamadas, exitosas, fallidas y duración."""
+        ((total, exitosas, duracion),) = self._consultar(
+            "SELECT COUNT(*), COALESCE(SUM(exitosa), 0), COALESCE(SUM(duracion), 0) "
+            "FROM conversaciones WHERE agent_id = ?",
+            (agent_id,),
+        )
+        return {
+            "total": total,
+            "exitosas": exitosas,
+            "fallidas": total - exitosas,
+            "duracion_total": duracion,
+            "duracion_media": duracion / total if total else 0,
+        }
+
+    def contar(
+        self, agent_id: str, exitosa: Optional[bool] = None, duracion: Optional[str] = None
+    ) -> int:
+        donde, params = self._filtro(exitosa, duracion)
+        ((n,),) = self._consultar(
+            f"SELECT COUNT(*) FROM conversaciones WHERE {donde}", (agent_id, *params)
+        )
+        return n
+
+    def listar(
+        self,
+        agent_id: str,
+        exitosa: Optional[bool] = None,
+        duracion: Optional[str] = None,
+        limite: int = 10,
+        desplazamiento: int = 0,
+    ) -> List[dict]:
+        """Conversaciones filtradas, de la más reciente a la más antigua."""
+        donde, params = self._filtro(exitosa, duracion)
+        filas = self._consultar(
+            f"SELECT datos FROM conversaciones WHERE {donde} "
+            "ORDER BY inicio DESC LIMIT ? OFFSET ?",
+            (agent_id, *params, int(limite), int(desplazamiento)),
+        )
+        return [json.loads(datos) for (datos,) in filas]
+
+    def histograma_duraciones(self, agent_id: str, bins: int = 20) -> Optional[Histograma]:
+        """Histograma de duraciones > 0 (bins uniformes entre mín. y máx.), en SQL."""
+        ((lo, hi),) = self._consultar(
+            "SELECT MIN(duracion), MAX(duracion) FROM conversaciones "
+            "WHERE agent_id = ? AND duracion > 0",
+            (agent_id,),
+        )
+        if lo is None:
+            return None
+        if hi <= lo:
+            lo, hi = lo - 0.5, hi + 0.5
+        filas = self._consultar(
+            "SELECT MIN(CAST((duracion - ?) * ? AS INTEGER), ?) AS bin, COUNT(*) "
+            "FROM conversaciones WHERE agent_id = ? AND duracion > 0 GROUP BY bin",
+            (lo, bins / (hi - lo), bins - 1, agent_id),
+        )
+        conteos = np.zeros(bins, dtype=np.int64)
+        for b, n in filas:
+            conteos[b] = n
+        return Histograma(bordes=np.linspace(lo, hi, bins + 1), conteos=conteos)
+
+    def cerrar(self):
+        self._fondo.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._conexion.close()
@@ -0,0 +1,338 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - ÍNDICE DE BÚSQUEDA                                      ║
+║  Búsqueda de clientes por cédula, teléfono, nombre, producto u obligación     ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+El índice se construye una vez por versión del dataset sobre los valores
+distintos de cada columna buscable:
+    - Cédula, teléfonos y obligación → número (largo, valor) para prefijos
+    - Nombre y producto              → tokens en minúscula y sin tildes
+
+Un prefijo numérico p de L dígitos equivale, para cada largo d ≥ L, al rango
+de valores [p·10^(d-L), (p+1)·10^(d-L)), así que se resuelve con
+`searchsorted` sobre enteros ordenados sin ordenar millones de textos. Los
+tokens de texto distintos también se ordenan y se buscan por prefijo; si una
+palabra no es prefijo de ningún token se busca como subcadena. Las filas de
+cada valor se leen de arreglos CSR y deben cumplir todos los términos.
+
+Uso:
+    indice = IndiceBusqueda.construir(df)
+    pos = indice.buscar("perez 3001")
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Intentar importar pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+COLUMNAS_NUMERICAS = ["cedula", "celular", "Phone", "Phone_2", "Phone_3", "OBLIGACION"]
+COLUMNAS_TEXTO = ["name", "fullname", "producto", "Tipo Producto"]
+
+PREFIJO_PAIS = "57"
+MAX_DIGITOS = 18  # los números más largos se indexan por sus primeros 18 dígitos
+
+_NO_DIGITO = re.compile(r"\D+")
+_SEPARADOR_TOKENS = re.compile(r"[^0-9a-z]+")
+_COMBINANTES = re.compile("[\u0300-\u036f]")
+
+# ============================================================================
+# NORMALIZACIÓN
+# ============================================================================
+
+
+def normalizar_texto(serie: pd.Series) -> pd.Series:
+    """Minúsculas sin tildes ni diéresis (ñ → n)."""
+    return (
+        serie.astype(str)
+        .str.lower()
+        .str.normalize("NFKD")
+        .str.replace(_COMBINANTES, "", regex=True)
+    )
+
+
+def _como_texto(valores) -> np.ndarray:
+    """Valores distintos de una columna como texto ('12345678.0' → '12345678')."""
+    valores = np.asarray(valores)
+    if valores.dtype.kind == "f":
+        enteros = np.isfinite(valores) & (np.mod(valores, 1) == 0)
+        if enteros.all():
+            return valores.astype(np.int64).astype(str).astype(object)
+    if valores.dtype.kind in "iu":
+        return valores.astype(str).astype(object)
+    return np.array([str(v) for v in valores.tolist()], dtype=object)
+
+
+def _terminos(consulta: str) -> List[str]:
+    """Términos de la consulta; si no tiene letras es un único número."""
+    normal = normalizar_texto(pd.Series([consulta])).iloc[0]
+    if not re.search(r"[a-z]", normal):
+        digitos = _NO_DIGITO.sub("", normal)
+        return [digitos] if digitos else []
+    return [t for t in _SEPARADOR_TOKENS.split(normal) if t]
+
+
+# ============================================================================
+# CLAVES NUMÉRICAS Y TOKENS
+# ============================================================================
+
+
+def _numeros_pyarrow(textos: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(largo, valor, posición del valor original) de cada clave numérica."""
+    digitos = pa.array(textos, type=pa.string())
+    if not pc.all(pc.utf8_is_digit(digitos)).as_py():
+        digitos = pc.replace_substring_regex(digitos, _NO_DIGITO.pattern, "")
+    digitos = pc.utf8_slice_codeunits(digitos, 0, MAX_DIGITOS)
+
+    # Teléfonos guardados con indicativo: también sin él
+    con_pais = pc.and_(
+        pc.equal(pc.utf8_length(digitos), 10 + len(PREFIJO_PAIS)),
+        pc.starts_with(digitos, PREFIJO_PAIS),
+    )
+    claves = pa.concat_arrays(
+        [digitos, pc.utf8_slice_codeunits(digitos.filter(con_pais), len(PREFIJO_PAIS))]
+    )
+    padres = np.concatenate(
+        [np.arange(len(digitos)), np.flatnonzero(con_pais.to_numpy(zero_copy_only=False))]
+    )
+
+    largo = pc.utf8_length(claves).to_numpy(zero_copy_only=False)
+    validas = largo > 0
+    valor = pc.cast(claves.filter(pa.array(validas)), pa.int64()).to_numpy()
+    return largo[validas], valor, padres[validas]
+
+
+def _numeros_pandas(textos: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Variante con `.str` de pandas cuando pyarrow no está disponible."""
+    digitos = pd.Series(textos, dtype=object).str.replace(_NO_DIGITO, "", regex=True)
+    digitos = digitos.str[:MAX_DIGITOS]
+    con_pais = (digitos.str.len() == 10 + len(PREFIJO_PAIS)) & digitos.str.startswith(
+        PREFIJO_PAIS
+    )
+    claves = pd.concat([digitos, digitos[con_pais].str[len(PREFIJO_PAIS) :]])
+    claves = claves[claves.str.len() > 0]
+    return (
+        claves.str.len().to_numpy(),
+        claves.astype(np.int64).to_numpy(),
+        claves.index.to_numpy(),
+    )
+
+
+def _tokens_pyarrow(textos: np.ndarray) -> Tuple[np.ndarray, np.ndarray, "pa.Array"]:
+    """(tokens, posición del valor original, texto normalizado de cada valor)."""
+    normal = pc.utf8_lower(pa.array(textos, type=pa.string()))
+
+    # Solo los textos no ASCII necesitan descomponer y quitar tildes
+    no_ascii = pc.invert(pc.string_is_ascii(normal))
+    if pc.any(no_ascii).as_py():
+        sin_tildes = pc.replace_substring_regex(
+            pc.utf8_normalize(normal.filter(no_ascii), "NFKD"), _COMBINANTES.pattern, ""
+        )
+        normal = pc.replace_with_mask(normal, no_ascii, sin_tildes)
+
+    partes = pc.split_pattern_regex(normal, _SEPARADOR_TOKENS.pattern)
+    return (
+        pc.list_flatten(partes).to_numpy(zero_copy_only=False),
+        pc.list_parent_indices(partes).to_numpy(),
+        normal,
+    )
+
+
+def _tokens_pandas(textos: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Variante con `.str` de pandas cuando pyarrow no está disponible."""
+    normal = normalizar_texto(pd.Series(textos, dtype=object))
+    partes = normal.str.split(_SEPARADOR_TOKENS, regex=True).explode()
+    return partes.to_numpy(), partes.index.to_numpy(), normal.to_numpy()
+
+
+def _csr(grupos: np.ndarray, datos: np.ndarray, n_grupos: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Agrupa `datos`: los del grupo g quedan en datos[inicio[g]:inicio[g+1]]."""
+    orden = np.argsort(grupos, kind="stable")
+    return np.searchsorted(grupos[orden], np.arange(n_grupos + 1)), datos[orden]
+
+
+def _rangos(inicios: np.ndarray, fines: np.ndarray) -> np.ndarray:
+    """Concatena los rangos [inicio, fin) sin bucle en Python."""
+    largos = fines - inicios
+    desplazamiento = np.repeat(inicios - np.cumsum(largos) + largos, largos)
+    return np.arange(largos.sum()) + desplazamiento
+
+
+def _columnas(df: pd.DataFrame, candidatas: List[str]) -> List[str]:
+    extra = [c for c in df.columns if str(c).startswith("Phone") and c not in candidatas]
+    return [c for c in candidatas + extra if c in df.columns]
+
+
+# ============================================================================
+# ÍNDICE
+# ============================================================================
+
+
+@dataclass(frozen=True)
+class IndiceBusqueda:
+    """Índice inmutable de búsqueda para una versión del dataset."""
+
+    n: int
+    # Claves numéricas ordenadas por (largo, valor); las de largo d empiezan en inicio_largo[d]
+    inicio_largo: np.ndarray
+    num_valor: np.ndarray
+    num_id: np.ndarray
+    # Tokens distintos ordenados; los valores del token k en tok_id[inicio[k]:inicio[k+1]]
+    tokens: np.ndarray
+    inicio_token: np.ndarray
+    tok_id: np.ndarray
+    # Texto normalizado de cada valor de texto (búsqueda por subcadena)
+    textos: pd.Series
+    # Filas de cada valor en filas[inicio_filas[v]:inicio_filas[v+1]]
+    inicio_filas: np.ndarray
+    filas: np.ndarray
+
+    @classmethod
+    def construir(cls, df: pd.DataFrame) -> "IndiceBusqueda":
+        """Construye el índice a partir del dataset enriquecido."""
+        numeros = _numeros_pyarrow if PYARROW_AVAILABLE else _numeros_pandas
+        tokenizar = _tokens_pyarrow if PYARROW_AVAILABLE else _tokens_pandas
+
+        n = len(df)
+        largos, valores_num, ids_num = [], [], []
+        tokens, ids_tok, textos, ids_texto = [], [], [], []
+        codigos_por_columna = []
+        base = 0
+
+        for col in _columnas(df, COLUMNAS_NUMERICAS) + _columnas(df, COLUMNAS_TEXTO):
+            codigos, valores = pd.factorize(df[col], use_na_sentinel=True)
+            texto = _como_texto(valores)
+
+            if col in COLUMNAS_TEXTO:
+                col_tokens, padres, normal = tokenizar(texto)
+                tokens.append(col_tokens)
+                ids_tok.append(padres + base)
+                textos.append(normal)
+                ids_texto.append(np.arange(base, base + len(valores)))
+            else:
+                largo, valor, padres = numeros(texto)
+                largos.append(largo)
+                valores_num.append(valor)
+                ids_num.append(padres + base)
+
+            codigos_por_columna.append(np.where(codigos >= 0, codigos + base, -1))
+            base += len(valores)
+
+        def unir(partes, dtype):
+            return np.concatenate(partes) if partes else np.array([], dtype=dtype)
+
+        # Claves numéricas ordenadas por (largo, valor)
+        largos = unir(largos, np.int64)
+        valores_num = unir(valores_num, np.int64)
+        orden = np.lexsort((valores_num, largos))
+        inicio_largo = np.searchsorted(largos[orden], np.arange(MAX_DIGITOS + 2))
+
+        # Tokens distintos ordenados
+        codigos_tok, distintos = pd.factorize(unir(tokens, object), sort=True)
+        inicio_token, tok_id = _csr(codigos_tok, unir(ids_tok, np.int64), len(distintos))
+
+        # Filas de cada valor
+        todos = unir(codigos_por_columna, np.int64)
+        filas = np.tile(np.arange(n), len(codigos_por_columna))
+        validos = todos >= 0
+        inicio_filas, filas = _csr(todos[validos], filas[validos], base)
+
+        return cls(
+            n=n,
+            inicio_largo=inicio_largo,
+            num_valor=valores_num[orden],
+            num_id=unir(ids_num, np.int64)[orden],
+            tokens=np.asarray(distintos, dtype=object),
+            inicio_token=inicio_token,
+            tok_id=tok_id,
+            textos=pd.Series(
+                pd.arrays.ArrowStringArray(pa.chunked_array(textos, pa.string()))
+                if PYARROW_AVAILABLE
+                else unir(textos, object),
+                index=unir(ids_texto, np.int64),
+            ),
+            inicio_filas=inicio_filas,
+            filas=filas,
+        )
+
+    # ------------------------------------------------------------------------
+
+    def _valores_numero(self, digitos: str) -> np.ndarray:
+        digitos = digitos[:MAX_DIGITOS]
+        p, largo = int(digitos), len(digitos)
+        inicios, fines = [], []
+        for d in range(largo, MAX_DIGITOS + 1):
+            a, b = self.inicio_largo[d], self.inicio_largo[d + 1]
+            if a == b:
+                continue
+            escala = 10 ** (d - largo)
+            segmento = self.num_valor[a:b]
+            inicios.append(a + np.searchsorted(segmento, p * escala, side="left"))
+            fines.append(a + np.searchsorted(segmento, (p + 1) * escala, side="left"))
+        if not inicios:
+            return np.array([], dtype=np.int64)
+        return self.num_id[_rangos(np.array(inicios), np.array(fines))]
+
+    def _valores_token(self, termino: str) -> np.ndarray:
+        lo = np.searchsorted(self.tokens, termino, side="left")
+        hi = np.searchsorted(self.tokens, termino + "\uffff", side="left")
+        return self.tok_id[self.inicio_token[lo] : self.inicio_token[hi]]
+
+    def _valores_subcadena(self, termino: str) -> np.ndarray:
+        encontrados = self.textos.str.contains(termino, regex=False).to_numpy(dtype=bool)
+        return self.textos.index.to_numpy()[encontrados]
+
+    def _mascara_de(self, valores: np.ndarray) -> np.ndarray:
+        """Máscara de filas de los valores (los duplicados no molestan)."""
+        mascara = np.zeros(self.n, dtype=bool)
+        rangos = _rangos(self.inicio_filas[valores], self.inicio_filas[valores + 1])
+        mascara[self.filas[rangos]] = True
+        return mascara
+
+    def buscar(self, consulta: str) -> np.ndarray:
+        """
+        Posiciones de fila (ordenadas) que contienen todos los términos.
+
+        Los números se buscan por prefijo en cédula, teléfono y obligación (y
+        como token de texto). Las palabras se buscan por prefijo de token en
+        nombre y producto; si no hay coincidencias, como subcadena.
+        """
+        terminos = _terminos(consulta)
+        if not terminos:
+            return np.array([], dtype=np.int64)
+
+        resultado = None
+        for termino in terminos:
+            valores = self._valores_token(termino)
+            if termino.isdigit():
+                valores = np.concatenate([self._valores_numero(termino), valores])
+            elif not len(valores):
+                valores = self._valores_subcadena(termino)
+            if not len(valores):
+                return np.array([], dtype=np.int64)
+
+            mascara = self._mascara_de(valores)
+            resultado = mascara if resultado is None else np.logical_and(
+                resultado, mascara, out=resultado
+            )
+        return np.flatnonzero(resultado)
+
+
+def buscar_en(indice: IndiceBusqueda, consulta: str, posiciones: np.ndarray) -> np.ndarray:
+    """Resultados de `consulta` restringidos a `posiciones` (filas visibles)."""
+    return np.intersect1d(indice.buscar(consulta), posiciones, assume_unique=True)
@@ -0,0 +1,188 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - ÍNDICE DE FILTROS                                       ║
+║  Bitmaps por valor y mora ordenada para los filtros del sidebar               ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+El índice se construye una vez por versión del dataset:
+    - Un bitmap (np.packbits) por valor de campaña, segmento y producto
+    - La permutación que ordena `dias mora` junto con los valores ordenados
+
+Cualquier combinación de filtros se resuelve con AND/OR sobre los bitmaps y un
+`searchsorted` sobre la mora, y devuelve las posiciones de fila (ordenadas).
+
+Uso:
+    indice = IndiceFiltros.construir(df)
+    pos = indice.resolver(campana=True, segmentos=["A", "B"], mora=(30, 90))
+    df_f = df.take(pos)
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from esquema_cti import mascara_campana
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+COLUMNAS_SEGMENTO = ("segmento_ML", "segmento_SIMULADO")
+COLUMNAS_PRODUCTO = ("producto", "Tipo Producto")
+
+# Por debajo de esta fracción de filas, el rango de mora se cruza con los
+# bitmaps leyendo bits sueltos; por encima se arma su propio bitmap
+_FRACCION_GATHER = 1 / 16
+
+# ============================================================================
+# BITMAPS
+# ============================================================================
+
+
+def _bitmap(mascara: np.ndarray) -> np.ndarray:
+    return np.packbits(mascara)
+
+
+def _bitmaps_por_valor(serie: pd.Series) -> Dict[object, np.ndarray]:
+    """Un bitmap por valor distinto (los nulos no entran en ninguno)."""
+    codigos, valores = pd.factorize(serie, use_na_sentinel=True)
+    return {valor: _bitmap(codigos == i) for i, valor in enumerate(valores)}
+
+
+def _primera_columna(df: pd.DataFrame, candidatas: Tuple[str, ...]) -> Optional[str]:
+    return next((c for c in candidatas if c in df.columns), None)
+
+
+# ============================================================================
+# ÍNDICE
+# ============================================================================
+
+
+@dataclass(frozen=True)
+class IndiceFiltros:
+    """Índice inmutable de filtros para una versión del dataset."""
+
+    n: int
+    campana: Dict[bool, np.ndarray]
+    segmentos: Dict[object, np.ndarray]
+    productos: Dict[object, np.ndarray]
+    segmentos_con_nulos: bool
+    col_segmento: Optional[str]
+    col_producto: Optional[str]
+    mora_orden: Optional[np.ndarray]
+    mora_valores: Optional[np.ndarray]
+
+    @classmethod
+    def construir(cls, df: pd.DataFrame) -> "IndiceFiltros":
+        """Construye el índice a partir del dataset enriquecido."""
+        col_seg = _primera_columna(df, COLUMNAS_SEGMENTO)
+        col_prod = _primera_columna(df, COLUMNAS_PRODUCTO)
+
+        campana = {}
+        if "campaign" in df.columns:
+            con = mascara_campana(df["campaign"]).to_numpy(dtype=bool)
+            campana = {True: _bitmap(con), False: _bitmap(~con)}
+
+        mora_orden = mora_valores = None
+        if "dias mora" in df.columns:
+            mora = df["dias mora"].to_numpy(dtype=np.float64, na_value=np.nan)
+            validos = np.flatnonzero(~np.isnan(mora))
+            mora_orden = validos[np.argsort(mora[validos], kind="stable")]
+            mora_valores = mora[mora_orden]
+
+        return cls(
+            n=len(df),
+            campana=campana,
+            segmentos=_bitmaps_por_valor(df[col_seg]) if col_seg else {},
+            productos=_bitmaps_por_valor(df[col_prod]) if col_prod else {},
+            segmentos_con_nulos=bool(col_seg and df[col_seg].isna().any()),
+            col_segmento=col_seg,
+            col_producto=col_prod,
+            mora_orden=mora_orden,
+            mora_valores=mora_valores,
+        )
+
+    # ------------------------------------------------------------------------
+
+    def valores_segmento(self) -> list:
+        return list(self.segmentos.keys())
+
+    def valores_producto(self) -> list:
+        return list(self.productos.keys())
+
+    def rango_mora(self) -> Optional[Tuple[int, int]]:
+        if self.mora_valores is None or not len(self.mora_valores):
+            return None
+        return int(self.mora_valores[0]), int(self.mora_valores[-1])
+
+    def _vacio(self) -> np.ndarray:
+        return np.zeros((self.n + 7) // 8, dtype=np.uint8)
+
+    def _union(self, bitmaps: Dict, seleccion: Iterable) -> np.ndarray:
+        resultado = self._vacio()
+        for valor in seleccion:
+            if valor in bitmaps:
+                np.bitwise_or(resultado, bitmaps[valor], out=resultado)
+        return resultado
+
+    def resolver(
+        self,
+        campana: Optional[bool] = None,
+        segmentos: Optional[Iterable] = None,
+        mora: Optional[Tuple[float, float]] = None,
+        producto: Optional[object] = None,
+    ) -> np.ndarray:
+        """
+        Posiciones de fila (ordenadas) que cumplen todos los filtros.
+
+        Args:
+            campana: True/False para con/sin campaña, None para todos
+            segmentos: Segmentos aceptados, None o vacío para no filtrar
+            mora: Rango cerrado (min, max) de días de mora
+            producto: Producto exacto, None para todos
+        """
+        bits = None
+
+        def intersectar(otro):
+            nonlocal bits
+            bits = otro.copy() if bits is None else np.bitwise_and(bits, otro, out=bits)
+
+        if campana is not None and self.campana:
+            intersectar(self.campana[bool(campana)])
+
+        if segmentos and self.segmentos:
+            seleccion = set(segmentos)
+            # Con todos los segmentos solo hace falta filtrar si hay nulos
+            if self.segmentos_con_nulos or not seleccion.issuperset(self.segmentos):
+                intersectar(self._union(self.segmentos, seleccion))
+
+        if producto is not None and self.col_producto:
+            intersectar(self.productos.get(producto, self._vacio()))
+
+        candidatas = None
+        if mora is not None and self.mora_orden is not None:
+            lo = np.searchsorted(self.mora_valores, mora[0], side="left")
+            hi = np.searchsorted(self.mora_valores, mora[1], side="right")
+            if lo > 0 or hi < self.n:
+                candidatas = self.mora_orden[lo:hi]
+
+        if candidatas is None:
+            if bits is None:
+                return np.arange(self.n)
+            return np.flatnonzero(np.unpackbits(bits, count=self.n))
+
+        if len(candidatas) < self.n * _FRACCION_GATHER:
+            # Rango estrecho: ordenar pocas posiciones y leer solo sus bits
+            if bits is not None:
+                activos = (bits[candidatas >> 3] >> (7 - (candidatas & 7))) & 1
+                candidatas = candidatas[activos.astype(bool)]
+            return np.sort(candidatas)
+
+        mascara = np.zeros(self.n, dtype=bool)
+        mascara[candidatas] = True
+        if bits is None:
+            return np.flatnonzero(mascara)
+        np.bitwise_and(bits, _bitmap(mascara), out=bits)
+        return np.flatnonzero(np.unpackbits(bits, count=self.n))
@@ -0,0 +1,420 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - LANZADOR DE LLAMADAS                                    ║
+║  Envío masivo al webhook de llamadas con un pool asíncrono acotado            ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Un `LanzamientoLlamadas` recibe una lista de cédulas y las envía al webhook
+desde un hilo propio con su bucle asyncio, así el script de Streamlit no
+espera a la red: la interfaz solo lee `progreso()` y `tabla()`.
+
+    - Concurrencia: como máximo `concurrencia` peticiones en vuelo
+    - Tasa: un limitador de `por_segundo` peticiones por segundo
+    - Reintentos: solo cuando la llamada seguro no se creó (error de conexión
+      antes de enviar, 429/503 con `Retry-After`), con espera exponencial y
+      jitter. Un timeout o un 5xx pueden llegar después de que el webhook ya
+      aceptó la petición: reintentarlos llamaría dos veces al cliente, así que
+      solo se reintentan con `webhook_idempotente=True`
+    - Idempotencia: cada cédula lleva una clave (`Idempotency-Key`) derivada de
+      la cédula y del lanzamiento, igual en todos sus reintentos. Un
+      lanzamiento nuevo usa claves nuevas: relanzar una cédula la vuelve a llamar
+
+Usa aiohttp si está instalado; si no, cada petición va por `CLIENTE_HTTP`
+(pool keep-alive compartido) desde un pool de hilos del tamaño de la
+concurrencia.
+
+Uso:
+    lanzamiento = LanzamientoLlamadas(cedulas, concurrencia=8, por_segundo=5)
+    lanzamiento.iniciar()
+    hechas, total = lanzamiento.progreso()
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+# Intentar importar aiohttp
+try:
+    import aiohttp
+
+    AIOHTTP_AVAILABLE = True
+    # Fallos de conexión antes de enviar (ConnectionTimeoutError existe desde aiohttp 3.10)
+    _AIOHTTP_SIN_ENVIO = (aiohttp.ClientConnectorError,) + (
+        (aiohttp.ConnectionTimeoutError,) if hasattr(aiohttp, "ConnectionTimeoutError") else ()
+    )
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+from cliente_http import CLIENTE_HTTP, REQUESTS_AVAILABLE, TIMEOUT_CONEXION
+
+if REQUESTS_AVAILABLE:
+    import requests
+    from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+WEBHOOK_LLAMADAS = "https://workflows.aosinternational.us/webhook/AmericanBPO"
+
+CONCURRENCIA = 8  # peticiones en vuelo
+POR_SEGUNDO = 5.0  # peticiones iniciadas por segundo
+REINTENTOS = 3
+PAUSA_BASE = 0.5  # segundos; se duplica en cada intento
+TIMEOUT = 5.0  # segundos por petición
+MAX_RETRY_AFTER = 30.0  # segundos; tope a la espera que pide el webhook
+
+# Respuestas que aseguran que la llamada no se creó: se reintentan si traen Retry-After
+CODIGOS_CON_ESPERA = {429, 503}
+# Con un webhook que deduplica por Idempotency-Key también se reintentan estas
+CODIGOS_REINTENTABLES_IDEMPOTENTE = {408, 425, 429, 500, 502, 503, 504}
+
+PENDIENTE = "⏳ Pendiente"
+ENVIANDO = "📞 Enviando"
+INICIADA = "✅ Iniciada"
+FALLIDA = "❌ Error"
+CANCELADA = "🚫 Cancelada"
+
+_TERMINALES = {INICIADA, FALLIDA, CANCELADA}
+
+# ============================================================================
+# IDEMPOTENCIA Y ESPERAS
+# ============================================================================
+
+
+def clave_idempotencia(cedula: str, lote: str) -> str:
+    """Clave estable por cédula y lote (por defecto, un id por lanzamiento)."""
+    return hashlib.blake2b(f"{lote}:{cedula}".encode(), digest_size=16).hexdigest()
+
+
+def segundos_retry_after(valor: Optional[str]) -> Optional[float]:
+    """Espera pedida en `Retry-After` (segundos o fecha HTTP); None si falta o no se entiende."""
+    if not valor:
+        return None
+    try:
+        segundos = float(valor)
+    except ValueError:
+        try:
+            segundos = (parsedate_to_datetime(valor) - datetime.now().astimezone()).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(segundos, 0.0), MAX_RETRY_AFTER)
+
+
+def pausa_reintento(intento: int, base: float = PAUSA_BASE) -> float:
+    """Espera exponencial con jitter completo: uniforme en [0, base · 2^intento]."""
+    return random.uniform(0, base * (2**intento))
+
+
+class LimitadorTasa:
+    """Espacia los inicios de petición a `por_segundo` por segundo."""
+
+    def __init__(self, por_segundo: float):
+        self.intervalo = 1.0 / por_segundo if por_segundo > 0 else 0.0
+        self._siguiente = 0.0
+        self._lock = asyncio.Lock()
+
+    async def esperar(self):
+        async with self._lock:
+            ahora = time.monotonic()
+            espera = self._siguiente - ahora
+            self._siguiente = max(ahora, self._siguiente) + self.intervalo
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+# ============================================================================
+# RESULTADOS
+# ============================================================================
+
+
+@dataclass(frozen=True)
+class ResultadoLlamada:
+    """Estado de una cédula dentro del lanzamiento."""
+
+    cedula: str
+    clave: str
+    estado: str = PENDIENTE
+    intentos: int = 0
+    codigo: Optional[int] = None
+    detalle: str = ""
+    duracion: Optional[float] = None
+
+
+class _NoEnviada(Exception):
+    """La conexión falló antes de enviar la petición: la llamada no se creó."""
+
+
+class _SinRespuesta(Exception):
+    """Timeout o conexión cortada tras enviar: el webhook pudo crear la llamada."""
+
+
+# ============================================================================
+# LANZAMIENTO
+# ============================================================================
+
+
+class LanzamientoLlamadas:
+    """
+    Envío de un lote de cédulas al webhook en segundo plano.
+
+    Args:
+        cedulas: Cédulas a llamar (los duplicados se envían una vez)
+        url: Webhook de llamadas
+        concurrencia: Peticiones en vuelo como máximo
+        por_segundo: Peticiones iniciadas por segundo
+        reintentos: Reintentos por cédula cuando la llamada seguro no se creó
+        lote: Ámbito de idempotencia (por defecto, uno nuevo por lanzamiento)
+        webhook_idempotente: El webhook deduplica por `Idempotency-Key`; solo
+            entonces se reintentan timeouts y 5xx
+    """
+
+    def __init__(
+        self,
+        cedulas: Iterable,
+        url: str = WEBHOOK_LLAMADAS,
+        concurrencia: int = CONCURRENCIA,
+        por_segundo: float = POR_SEGUNDO,
+        reintentos: int = REINTENTOS,
+        timeout: float = TIMEOUT,
+        lote: Optional[str] = None,
+        webhook_idempotente: bool = False,
+    ):
+        self.url = url
+        self.concurrencia = max(1, int(concurrencia))
+        self.por_segundo = por_segundo
+        self.reintentos = reintentos
+        self.timeout = timeout
+        self.lote = lote or uuid.uuid4().hex
+        self.webhook_idempotente = webhook_idempotente
+        self.creado = datetime.now()
+        self.terminado_en: Optional[datetime] = None
+
+        self._lock = threading.Lock()
+        self._cancelar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._resultados: Dict[str, ResultadoLlamada] = {}
+        for cedula in cedulas:
+            cedula = str(cedula)
+            if cedula not in self._resultados:
+                self._resultados[cedula] = ResultadoLlamada(
+                    cedula, clave_idempotencia(cedula, self.lote)
+                )
+
+    # ------------------------------------------------------------------
+    # Estado (lectura desde Streamlit)
+    # ------------------------------------------------------------------
+
+    def progreso(self) -> Tuple[int, int]:
+        """(terminadas, total)."""
+        with self._lock:
+            hechas = sum(r.estado in _TERMINALES for r in self._resultados.values())
+            return hechas, len(self._resultados)
+
+    def resumen(self) -> Dict[str, int]:
+        """Cédulas por estado."""
+        with self._lock:
+            cuenta: Dict[str, int] = {}
+            for r in self._resultados.values():
+                cuenta[r.estado] = cuenta.get(r.estado, 0) + 1
+            return cuenta
+
+    def tabla(self) -> pd.DataFrame:
+        """Resultado por cédula, en el orden del lote."""
+        with self._lock:
+            filas = list(self._resultados.values())
+        return pd.DataFrame(
+            {
+                "CC": [r.cedula for r in filas],
+                "Estado": [r.estado for r in filas],
+                "Intentos": [r.intentos for r in filas],
+                "HTTP": [r.codigo for r in filas],
+                "Detalle": [r.detalle for r in filas],
+                "Seg.": [r.duracion for r in filas],
+            }
+        )
+
+    @property
+    def terminado(self) -> bool:
+        return self._hilo is not None and not self._hilo.is_alive()
+
+    def _actualizar(self, cedula: str, **cambios):
+        with self._lock:
+            self._resultados[cedula] = replace(self._resultados[cedula], **cambios)
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def iniciar(self) -> "LanzamientoLlamadas":
+        """Arranca el hilo del lanzamiento (solo la primera vez)."""
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(
+                    target=self._ejecutar, name="lanzador-llamadas", daemon=True
+                )
+                self._hilo.start()
+        return self
+
+    def cancelar(self):
+        """Las cédulas que aún no se enviaron quedan canceladas."""
+        self._cancelar.set()
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+        return self.terminado
+
+    def _ejecutar(self):
+        total = len(self._resultados)
+        logger.info(f"📞 Lanzamiento de {total} llamadas (lote {self.lote})")
+        try:
+            asyncio.run(self._lanzar())
+        except Exception:
+            logger.exception("❌ Error en el lanzamiento de llamadas")
+            for cedula, r in list(self._resultados.items()):
+                if r.estado not in _TERMINALES:
+                    self._actualizar(cedula, estado=FALLIDA, detalle="Lanzamiento interrumpido")
+        self.terminado_en = datetime.now()
+        logger.info(f"📞 Lanzamiento terminado: {self.resumen()}")
+
+    # ------------------------------------------------------------------
+    # Envío
+    # ------------------------------------------------------------------
+
+    async def _lanzar(self):
+        limitador = LimitadorTasa(self.por_segundo)
+        semaforo = asyncio.Semaphore(self.concurrencia)
+
+        if AIOHTTP_AVAILABLE:
+            conector = aiohttp.TCPConnector(limit=self.concurrencia)
+            # Timeout de conexión aparte: ese sí se puede reintentar sin riesgo
+            tiempo = aiohttp.ClientTimeout(
+                total=self.timeout, sock_connect=min(TIMEOUT_CONEXION, self.timeout)
+            )
+            async with aiohttp.ClientSession(connector=conector, timeout=tiempo) as sesion:
+                await self._enviar_todas(self._post_aiohttp(sesion), limitador, semaforo)
+        elif REQUESTS_AVAILABLE:
+            with ThreadPoolExecutor(self.concurrencia) as hilos:
+                await self._enviar_todas(
+                    self._post_requests(CLIENTE_HTTP, hilos), limitador, semaforo
+                )
+        else:
+            raise RuntimeError("Ni aiohttp ni requests están disponibles")
+
+    async def _enviar_todas(self, post, limitador: LimitadorTasa, semaforo):
+        await asyncio.gather(
+            *(self._enviar(cedula, post, limitador, semaforo) for cedula in list(self._resultados))
+        )
+
+    async def _enviar(self, cedula: str, post, limitador: LimitadorTasa, semaforo):
+        clave = self._resultados[cedula].clave
+        async with semaforo:
+            inicio = time.monotonic()
+            for intento in range(self.reintentos + 1):
+                if self._cancelar.is_set():
+                    self._actualizar(cedula, estado=CANCELADA)
+                    return
+                await limitador.esperar()
+                self._actualizar(cedula, estado=ENVIANDO, intentos=intento + 1)
+                espera = None
+                try:
+                    codigo, retry_after = await post(cedula, clave)
+                except _NoEnviada as e:
+                    codigo, detalle, reintentar = None, str(e), True
+                except _SinRespuesta as e:
+                    codigo, detalle = None, str(e)
+                    reintentar = self.webhook_idempotente
+                else:
+                    if codigo == 200:
+                        self._actualizar(
+                            cedula,
+                            estado=INICIADA,
+                            codigo=codigo,
+                            detalle="Llamada iniciada",
+                            duracion=round(time.monotonic() - inicio, 2),
+                        )
+                        return
+                    detalle = f"Error {codigo}"
+                    if codigo in CODIGOS_CON_ESPERA and retry_after is not None:
+                        reintentar, espera = True, retry_after
+                    else:
+                        reintentar = (
+                            self.webhook_idempotente
+                            and codigo in CODIGOS_REINTENTABLES_IDEMPOTENTE
+                        )
+
+                self._actualizar(cedula, codigo=codigo, detalle=detalle)
+                if not reintentar:
+                    break
+                if intento < self.reintentos:
+                    await asyncio.sleep(espera if espera is not None else pausa_reintento(intento))
+
+            self._actualizar(
+                cedula,
+                estado=FALLIDA,
+                codigo=codigo,
+                detalle=detalle,
+                duracion=round(time.monotonic() - inicio, 2),
+            )
+
+    def _post_aiohttp(self, sesion):
+        async def post(cedula: str, clave: str) -> Tuple[int, Optional[float]]:
+            try:
+                async with sesion.post(
+                    self.url, json={"cedula": cedula}, headers={"Idempotency-Key": clave}
+                ) as response:
+                    return response.status, segundos_retry_after(
+                        response.headers.get("Retry-After")
+                    )
+            except _AIOHTTP_SIN_ENVIO as e:
+                raise _NoEnviada(str(e)[:50] or "Timeout de conexión")
+            except asyncio.TimeoutError:
+                raise _SinRespuesta("Timeout")
+            except aiohttp.ClientError as e:
+                raise _SinRespuesta(str(e)[:50])
+
+        return post
+
+    def _post_requests(self, cliente, hilos: ThreadPoolExecutor):
+        def enviar(cedula: str, clave: str) -> Tuple[int, Optional[float]]:
+            try:
+                response = cliente.post(
+                    self.url,
+                    endpoint="webhook.llamadas",
+                    json={"cedula": cedula},
+                    headers={"Idempotency-Key": clave},
+                    timeout=self.timeout,
+                )
+                return response.status_code, segundos_retry_after(
+                    response.headers.get("Retry-After")
+                )
+            except requests.ConnectTimeout:
+                raise _NoEnviada("Timeout de conexión")
+            except requests.Timeout:
+                raise _SinRespuesta("Timeout")
+            except requests.ConnectionError as e:
+                motivo = getattr(e.args[0], "reason", None) if e.args else None
+                if isinstance(motivo, NewConnectionError):
+                    raise _NoEnviada(str(e)[:50])
+                raise _SinRespuesta(str(e)[:50])
+            except requests.RequestException as e:
+                raise _SinRespuesta(str(e)[:50])
+
+        async def post(cedula: str, clave: str) -> Tuple[int, Optional[float]]:
+            return await asyncio.get_running_loop().run_in_executor(hilos, enviar, cedula, clave)
+
+        return post
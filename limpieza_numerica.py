@@ -0,0 +1,147 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - LIMPIEZA NUMÉRICA                                       ║
+║  Parseo columnar de montos del payload de Apps Script                         ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Mantiene exactamente la regla histórica de `limpiar_numero`:
+    - Vacío / NaN            → 0
+    - Quitar "$", "," y "."  → float()
+    - Si float() falla       → 0 (ahora contado como celda fallida)
+
+El caso común (solo dígitos tras quitar separadores) se resuelve en bloque con
+kernels de pyarrow (o `.str` de pandas si pyarrow no está instalado). Solo las
+celdas atípicas pasan por `float()` de Python, para conservar su semántica.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Intentar importar pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Caracteres que se eliminan antes de convertir (incluye el punto, como siempre)
+SEPARADORES = ("$", ",", ".")
+
+# Enteros que el cast en bloque convierte igual que float() sin perder precisión
+_PATRON_ENTERO = r"^[-+]?[0-9]{1,18}$"
+
+
+def _float_o_none(valor: str):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parsear_pyarrow(texto: np.ndarray) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Quita separadores y convierte en bloque; separa las celdas atípicas."""
+    arr = pa.array(texto, type=pa.string())
+    for sep in SEPARADORES:
+        arr = pc.replace_substring(arr, sep, "")
+
+    validos = pc.match_substring_regex(arr, _PATRON_ENTERO)
+    valores = pc.if_else(validos, arr, None).cast(pa.float64())
+    atipicos = pc.invert(validos)
+
+    return (
+        np.array(valores.to_numpy(zero_copy_only=False), dtype=np.float64),
+        np.flatnonzero(atipicos.to_numpy(zero_copy_only=False)),
+        arr.filter(atipicos).to_pylist(),
+    )
+
+
+def _parsear_pandas(texto: np.ndarray) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Variante con `.str` de pandas cuando pyarrow no está disponible."""
+    limpio = pd.Series(texto, dtype=object)
+    for sep in SEPARADORES:
+        limpio = limpio.str.replace(sep, "", regex=False)
+
+    validos = limpio.str.fullmatch(_PATRON_ENTERO).fillna(False).to_numpy(dtype=bool)
+    valores = pd.to_numeric(limpio.where(validos), errors="coerce").to_numpy(
+        dtype=np.float64
+    )
+    return valores, np.flatnonzero(~validos), limpio[~validos].tolist()
+
+
+def _parsear_moneda(serie: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(valores float64, máscara de vacías, máscara de fallidas)."""
+    # Enteros nativos (JSON sin formato): no hay separadores que quitar
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        sin_marca = np.zeros(len(serie), dtype=bool)
+        return serie.to_numpy(dtype=np.float64), sin_marca, sin_marca.copy()
+
+    vacias = serie.isna().to_numpy(dtype=bool)
+    if serie.dtype == object:
+        vacias |= (serie == "").to_numpy(dtype=bool)
+
+    resultado = np.zeros(len(serie), dtype=np.float64)
+    fallidas = np.zeros(len(serie), dtype=bool)
+
+    pendientes = np.flatnonzero(~vacias)
+    if len(pendientes):
+        texto = serie.iloc[pendientes].astype(str).to_numpy(dtype=object)
+        parsear = _parsear_pyarrow if PYARROW_AVAILABLE else _parsear_pandas
+        valores, posiciones, atipicos = parsear(texto)
+
+        # Celdas atípicas (espacios, exponentes, "_", etc.): float() de Python
+        for pos, valor_str in zip(posiciones, atipicos):
+            valor = _float_o_none(valor_str)
+            if valor is None:
+                fallidas[pendientes[pos]] = True
+                valor = 0.0
+            valores[pos] = valor
+
+        resultado[pendientes] = valores
+
+    return resultado, vacias, fallidas
+
+
+def parsear_moneda(serie: pd.Series) -> Tuple[pd.Series, Dict[str, int]]:
+    """
+    Convierte una columna de montos a float64.
+
+    Returns:
+        (valores, reporte) donde reporte = {"vacias": n, "fallidas": n}
+    """
+    valores, vacias, fallidas = _parsear_moneda(serie)
+    reporte = {"vacias": int(vacias.sum()), "fallidas": int(fallidas.sum())}
+    return pd.Series(valores, index=serie.index, name=serie.name), reporte
+
+
+def limpiar_columnas_moneda(
+    df: pd.DataFrame, columnas: Iterable[str], por_fila: bool = False
+) -> Dict[str, Dict]:
+    """
+    Limpia en sitio las columnas de montos presentes y devuelve el reporte.
+
+    Con `por_fila` el reporte trae máscaras booleanas (una posición por fila)
+    en lugar de conteos, para poder sumarlo sobre cualquier subconjunto.
+    """
+    reporte = {}
+    for col in columnas:
+        if col not in df.columns:
+            continue
+        valores, vacias, fallidas = _parsear_moneda(df[col])
+        df[col] = pd.Series(valores, index=df.index, name=col)
+        n_fallidas = int(fallidas.sum())
+        if por_fila:
+            reporte[col] = {"vacias": vacias, "fallidas": fallidas}
+        else:
+            reporte[col] = {"vacias": int(vacias.sum()), "fallidas": n_fallidas}
+        if n_fallidas:
+            logger.warning(
+                f"⚠️ {n_fallidas:,} celdas no numéricas en '{col}' (se usan como 0)"
+            )
+    return reporte
@@ -0,0 +1,107 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - MECANISMOS DE NEGOCIACIÓN                               ║
+║  Clasificación de POPUP_CAMP                                                  ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Prioridad: NOVACION > CONSOLIDACION > PAGO > DESCUENTO.
+
+La versión vectorizada factoriza la columna y pasa una sola expresión regular
+sobre los valores distintos. La expresión usa lookaheads anclados al inicio:
+el motor prueba las alternativas en orden, así que gana la de mayor prioridad
+aunque aparezca más a la derecha en el texto.
+"""
+
+import re
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+# (palabra clave en POPUP_CAMP, mecanismo) en orden de prioridad
+REGLAS_MECANISMO = [
+    ("NOVACION", "NOVACION"),
+    ("CONSOLIDACION", "CONSOLIDACION"),
+    ("PAGO", "ACUERDO_PAGO"),
+    ("DESCUENTO", "DESCUENTO"),
+]
+
+OTRO_MECANISMO = "OTRO_MECANISMO"
+SIN_MECANISMO = "SIN_MECANISMO"
+
+CATEGORIAS_MECANISMO = [m for _, m in REGLAS_MECANISMO] + [OTRO_MECANISMO, SIN_MECANISMO]
+
+# Mecanismos que exigen un pago inicial
+MECANISMOS_CON_PAGO = [m for m in CATEGORIAS_MECANISMO if "PAGO" in m]
+
+PATRON_MECANISMO = re.compile(
+    "^(?:"
+    + "|".join(f"(?=.*({re.escape(clave)}))" for clave, _ in REGLAS_MECANISMO)
+    + ")",
+    re.DOTALL,
+)
+
+# ============================================================================
+# CLASIFICACIÓN
+# ============================================================================
+
+
+def parsear_popup_camp(popup):
+    """Parsea POPUP_CAMP para detectar mecanismo."""
+    if pd.isna(popup) or popup == "":
+        return SIN_MECANISMO
+
+    popup_upper = str(popup).upper()
+
+    for clave, mecanismo in REGLAS_MECANISMO:
+        if clave in popup_upper:
+            return mecanismo
+    return OTRO_MECANISMO
+
+
+def clasificar_mecanismos(popup: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """
+    Clasifica toda la columna POPUP_CAMP en una pasada.
+
+    Returns:
+        (mecanismo_detectado como Categorical, requiere_pago como bool)
+    """
+    vacias = popup.isna().to_numpy(dtype=bool)
+    if popup.dtype == object:
+        vacias |= (popup == "").to_numpy(dtype=bool)
+
+    # Por defecto OTRO_MECANISMO; las vacías, SIN_MECANISMO
+    codigos = np.full(
+        len(popup), CATEGORIAS_MECANISMO.index(OTRO_MECANISMO), dtype=np.int8
+    )
+    codigos[vacias] = CATEGORIAS_MECANISMO.index(SIN_MECANISMO)
+
+    pendientes = np.flatnonzero(~vacias)
+    if len(pendientes):
+        # POPUP_CAMP tiene pocos valores distintos: se clasifica cada uno una vez
+        codigos_valor, valores = pd.factorize(popup.iloc[pendientes])
+        texto = pd.Series(valores, dtype=object).astype(str).str.upper()
+        grupos = texto.str.extract(PATRON_MECANISMO).notna().to_numpy()
+
+        # Cada valor activa como mucho un grupo: el de mayor prioridad
+        por_valor = np.where(
+            grupos.any(axis=1),
+            grupos.argmax(axis=1),
+            CATEGORIAS_MECANISMO.index(OTRO_MECANISMO),
+        ).astype(np.int8)
+        codigos[pendientes] = por_valor[codigos_valor]
+
+    mecanismo = pd.Series(
+        pd.Categorical.from_codes(codigos, categories=CATEGORIAS_MECANISMO),
+        index=popup.index,
+        name="mecanismo_detectado",
+    )
+    codigos_pago = [CATEGORIAS_MECANISMO.index(m) for m in MECANISMOS_CON_PAGO]
+    requiere_pago = pd.Series(
+        np.isin(codigos, codigos_pago), index=popup.index, name="requiere_pago"
+    )
+    return mecanismo, requiere_pago
@@ -0,0 +1,153 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - MOTOR GAC                                               ║
+║  Cálculo vectorizado de Gastos de Cobranza                                    ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+La tabla de tarifas se convierte en arreglos ordenados de cortes (días mínimos
+y máximos) y la tarifa, el mínimo y el máximo de todas las filas se resuelven
+con un solo `searchsorted` de NumPy.
+
+Uso:
+    from motor_gac import cargar_tabla_gac, calcular_gac_vectorizado
+
+    tabla = cargar_tabla_gac()  # config/tabla_gac.json o GAC_TABLE_PATH
+    gac = calcular_gac_vectorizado(df["dias mora"], df["Saldo en mora"], tabla)
+"""
+
+import os
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+# Ruta por defecto; se puede sobrescribir con la variable GAC_TABLE_PATH
+GAC_TABLE_PATH_DEFAULT = Path(__file__).parent / "config" / "tabla_gac.json"
+
+# Tabla oficial (se usa si no hay archivo de configuración)
+TABLA_GAC_DEFAULT: Dict[Tuple[int, int], Dict[str, float]] = {
+    (1, 10): {"tarifa": 0.00, "min": 0, "max": 0},
+    (11, 15): {"tarifa": 0.06, "min": 10000, "max": 260000},
+    (16, 30): {"tarifa": 0.08, "min": 15000, "max": 350000},
+    (31, 60): {"tarifa": 0.10, "min": 20000, "max": 450000},
+    (61, 90): {"tarifa": 0.12, "min": 25000, "max": 550000},
+    (91, 9999): {"tarifa": 0.15, "min": 30000, "max": 650000},
+}
+
+# ============================================================================
+# TABLA DE TARIFAS
+# ============================================================================
+
+
+@dataclass(frozen=True)
+class TablaGAC:
+    """Tabla GAC en forma de arreglos ordenados por días mínimos."""
+
+    dias_min: np.ndarray
+    dias_max: np.ndarray
+    tarifa: np.ndarray
+    minimo: np.ndarray
+    maximo: np.ndarray
+
+    @classmethod
+    def desde_dict(cls, tabla: Dict[Tuple[int, int], Dict[str, float]]) -> "TablaGAC":
+        """Construye la tabla desde el formato {(min_dias, max_dias): config}."""
+        rangos = sorted(tabla.items(), key=lambda item: item[0][0])
+
+        for (anterior, _), (siguiente, _) in zip(rangos, rangos[1:]):
+            if siguiente[0] <= anterior[1]:
+                raise ValueError(f"Rangos GAC solapados: {anterior} y {siguiente}")
+
+        return cls(
+            dias_min=np.array([r[0][0] for r in rangos], dtype=np.float64),
+            dias_max=np.array([r[0][1] for r in rangos], dtype=np.float64),
+            tarifa=np.array([r[1]["tarifa"] for r in rangos], dtype=np.float64),
+            minimo=np.array([r[1]["min"] for r in rangos], dtype=np.float64),
+            maximo=np.array([r[1]["max"] for r in rangos], dtype=np.float64),
+        )
+
+    def como_dict(self) -> Dict[Tuple[int, int], Dict[str, float]]:
+        """Devuelve la tabla en el formato {(min_dias, max_dias): config}."""
+        return {
+            (int(ini), int(fin)): {"tarifa": float(t), "min": float(mn), "max": float(mx)}
+            for ini, fin, t, mn, mx in zip(
+                self.dias_min, self.dias_max, self.tarifa, self.minimo, self.maximo
+            )
+        }
+
+
+def cargar_tabla_gac(ruta: Optional[str] = None) -> TablaGAC:
+    """Carga la tabla GAC desde JSON; usa la tabla oficial si no existe."""
+    ruta = Path(ruta or os.getenv("GAC_TABLE_PATH", GAC_TABLE_PATH_DEFAULT))
+
+    if not ruta.exists():
+        logger.warning(f"⚠️ Tabla GAC no encontrada en {ruta}, usando tabla oficial")
+        return TablaGAC.desde_dict(TABLA_GAC_DEFAULT)
+
+    with open(ruta, encoding="utf-8") as f:
+        config = json.load(f)
+
+    tabla = {
+        (int(r["dias_min"]), int(r["dias_max"])): {
+            "tarifa": float(r["tarifa"]),
+            "min": float(r["min"]),
+            "max": float(r["max"]),
+        }
+        for r in config["rangos"]
+    }
+    return TablaGAC.desde_dict(tabla)
+
+
+# ============================================================================
+# CÁLCULO VECTORIZADO
+# ============================================================================
+
+
+def calcular_gac_vectorizado(dias_mora, saldo_mora, tabla: Optional[TablaGAC] = None):
+    """
+    Calcula GAC = máx(Mín, mín(Saldo × Tarifa, Máx)) para todas las filas.
+
+    Las filas cuyos días no caen en ningún rango (0, negativos, NaN o huecos
+    entre rangos) reciben GAC 0, igual que el cálculo fila a fila.
+    """
+    if tabla is None:
+        tabla = tabla_gac_default()
+
+    dias = np.asarray(dias_mora, dtype=np.float64)
+    saldo = np.asarray(saldo_mora, dtype=np.float64)
+
+    # Rango candidato: el último cuyo mínimo es <= días
+    idx = np.searchsorted(tabla.dias_min, dias, side="right") - 1
+    idx_seguro = np.clip(idx, 0, len(tabla.dias_min) - 1)
+    en_rango = (idx >= 0) & (dias <= tabla.dias_max[idx_seguro])
+
+    maximo = tabla.maximo[idx_seguro]
+    minimo = tabla.minimo[idx_seguro]
+    gac_calc = saldo * tabla.tarifa[idx_seguro]
+
+    # Misma semántica que max(minimo, min(gac_calc, maximo)) de Python,
+    # incluido el caso NaN (min conserva NaN y max devuelve el mínimo)
+    gac = np.where(maximo < gac_calc, maximo, gac_calc)
+    gac = np.where(gac > minimo, gac, minimo)
+
+    return np.where(en_rango, gac, 0.0)
+
+
+_TABLA_DEFAULT: Optional[TablaGAC] = None
+
+
+def tabla_gac_default() -> TablaGAC:
+    """Tabla GAC de configuración, cargada una sola vez por proceso."""
+    global _TABLA_DEFAULT
+    if _TABLA_DEFAULT is None:
+        _TABLA_DEFAULT = cargar_tabla_gac()
+    return _TABLA_DEFAULT
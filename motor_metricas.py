@@ -0,0 +1,215 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - MOTOR DE MÉTRICAS                                       ║
+║  KPIs del dashboard en una sola pasada sobre las filas filtradas              ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Por cada versión del dataset se extraen una vez las columnas que usan los KPIs
+como arrays NumPy (montos en float64, categorías como códigos enteros y la mora
+ya asignada a su tramo). Las métricas de un filtro se calculan tomando esas
+posiciones y reduciendo con sumas y `np.bincount`, sin groupby ni value_counts.
+
+Uso:
+    base = BaseMetricas.construir(df)
+    m = base.calcular(posiciones)   # mismo dict que calcular_metricas(df.take(pos))
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from esquema_cti import mascara_campana
+from agregados_graficos import BINS_PROB, codigos_histograma
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+# Tramos de mora: intervalos (a, b] como pd.cut; fuera de rango no cuenta
+CORTES_MORA = [0, 10, 30, 60, 90, 9999]
+TRAMOS_MORA = ["1-10", "11-30", "31-60", "61-90", ">90"]
+
+# ============================================================================
+# COLUMNAS
+# ============================================================================
+
+
+def _columna(df: pd.DataFrame, preferida: str, alternativa: str) -> Optional[str]:
+    if preferida in df.columns:
+        return preferida
+    return alternativa if alternativa in df.columns else None
+
+
+def _montos(df: pd.DataFrame, col: Optional[str]) -> Optional[np.ndarray]:
+    if col is None or col not in df.columns:
+        return None
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _codigos(df: pd.DataFrame, col: Optional[str]) -> Tuple[Optional[np.ndarray], list]:
+    """Códigos enteros (-1 = nulo) y valores de una columna categórica."""
+    if col is None:
+        return None, []
+    codigos, valores = pd.factorize(df[col], use_na_sentinel=True)
+    return codigos, list(valores)
+
+
+def tramos_mora(mora: np.ndarray) -> np.ndarray:
+    """Código de tramo de cada fila (-1 si queda fuera de los cortes o es nulo)."""
+    tramo = np.searchsorted(CORTES_MORA, mora, side="left") - 1
+    fuera = np.isnan(mora) | (mora <= CORTES_MORA[0]) | (mora > CORTES_MORA[-1])
+    return np.where(fuera, -1, tramo).astype(np.int8)
+
+
+def ordenar_conteos(cuenta: np.ndarray, valores: list) -> Dict:
+    """Conteo por valor como conteos(): mayor a menor, sin valores ausentes."""
+    orden = np.argsort(-cuenta, kind="stable")
+    return {valores[i]: int(cuenta[i]) for i in orden if cuenta[i] > 0}
+
+
+def _conteos(codigos: Optional[np.ndarray], valores: list) -> Dict:
+    if codigos is None:
+        return {}
+    return ordenar_conteos(np.bincount(codigos + 1, minlength=len(valores) + 1)[1:], valores)
+
+
+def distribucion_mora(cuenta: np.ndarray) -> Dict:
+    """Filas por tramo de mora, mayor a menor (incluye tramos vacíos, como pd.cut)."""
+    orden = np.argsort(-cuenta, kind="stable")
+    return {TRAMOS_MORA[i]: int(cuenta[i]) for i in orden}
+
+
+def _media(valores: Optional[np.ndarray]) -> float:
+    if valores is None or not len(valores) or np.isnan(valores).all():
+        return 0.0
+    return float(np.nanmean(valores))
+
+
+# ============================================================================
+# BASE POR VERSIÓN
+# ============================================================================
+
+
+@dataclass(frozen=True)
+class BaseMetricas:
+    """Columnas de los KPIs como arrays, una vez por versión del dataset."""
+
+    n: int
+    gac: Optional[np.ndarray]
+    campana: Optional[np.ndarray]
+    prob: Optional[np.ndarray]
+    bin_prob: Optional[np.ndarray]
+    mora: Optional[np.ndarray]
+    tramo_mora: Optional[np.ndarray]
+    requiere_pago: Optional[np.ndarray]
+    valor_esperado: Optional[np.ndarray]
+    segmentos: Tuple[Optional[np.ndarray], list]
+    mecanismos: Tuple[Optional[np.ndarray], list]
+    productos: Tuple[Optional[np.ndarray], list]
+
+    @classmethod
+    def construir(cls, df: pd.DataFrame) -> "BaseMetricas":
+        mora = _montos(df, "dias mora")
+        prob = _montos(df, _columna(df, "probabilidad_pago_ML", "probabilidad_pago_SIMULADA"))
+        return cls(
+            n=len(df),
+            gac=_montos(df, "GAC_proyectado"),
+            campana=(
+                mascara_campana(df["campaign"]).to_numpy(dtype=bool)
+                if "campaign" in df.columns
+                else None
+            ),
+            prob=prob,
+            bin_prob=(
+                codigos_histograma(prob * 100, BINS_PROB, (0, 100)) if prob is not None else None
+            ),
+            mora=mora,
+            tramo_mora=tramos_mora(mora) if mora is not None else None,
+            requiere_pago=(
+                (df["requiere_pago"] == True).to_numpy(dtype=bool)
+                if "requiere_pago" in df.columns
+                else None
+            ),
+            valor_esperado=_montos(
+                df, _columna(df, "valor_esperado_ML", "valor_esperado_SIMULADO")
+            ),
+            segmentos=_codigos(df, _columna(df, "segmento_ML", "segmento_SIMULADO")),
+            mecanismos=_codigos(
+                df, "mecanismo_detectado" if "mecanismo_detectado" in df.columns else None
+            ),
+            productos=_codigos(df, _columna(df, "producto", "Tipo Producto")),
+        )
+
+    def calcular(self, posiciones: Optional[np.ndarray] = None) -> Dict:
+        """
+        Todas las métricas del dashboard para las filas en `posiciones`.
+
+        Args:
+            posiciones: Posiciones de fila (None = todas)
+        """
+
+        def tomar(arr):
+            if arr is None or posiciones is None:
+                return arr
+            return arr[posiciones]
+
+        m = {}
+        total = self.n if posiciones is None else len(posiciones)
+
+        # Básicas
+        gac = tomar(self.gac)
+        m["total"] = total
+        m["gac_total"] = float(np.nansum(gac)) if gac is not None else 0
+        m["gac_promedio"] = _media(gac) if gac is not None else 0
+
+        # Campañas
+        if self.campana is not None:
+            m["con_campana"] = int(np.count_nonzero(tomar(self.campana)))
+            m["sin_campana"] = total - m["con_campana"]
+            m["pct_campana"] = m["con_campana"] / total * 100 if total > 0 else 0
+        else:
+            m["con_campana"], m["sin_campana"], m["pct_campana"] = 0, total, 0
+
+        # Probabilidad
+        prob = tomar(self.prob)
+        if prob is not None and len(prob) and not np.isnan(prob).all():
+            m["prob_media"] = float(np.nanmean(prob)) * 100
+            m["prob_max"] = float(np.nanmax(prob)) * 100
+            m["prob_min"] = float(np.nanmin(prob)) * 100
+        else:
+            m["prob_media"], m["prob_max"], m["prob_min"] = 0, 0, 0
+        m["hist_prob"] = (
+            np.bincount(tomar(self.bin_prob) + 1, minlength=BINS_PROB + 1)[1:]
+            if self.bin_prob is not None
+            else None
+        )
+
+        # Segmentos, mecanismos y productos
+        m["segmentos"] = _conteos(tomar(self.segmentos[0]), self.segmentos[1])
+        m["mecanismos"] = _conteos(tomar(self.mecanismos[0]), self.mecanismos[1])
+        m["productos"] = _conteos(tomar(self.productos[0]), self.productos[1])
+
+        # Mora
+        if self.mora is not None:
+            tramo = tomar(self.tramo_mora)
+            m["mora_dist"] = distribucion_mora(
+                np.bincount(tramo + 1, minlength=len(TRAMOS_MORA) + 1)[1:]
+            )
+            m["mora_promedio"] = _media(tomar(self.mora))
+        else:
+            m["mora_dist"], m["mora_promedio"] = {}, 0
+
+        # Requiere pago
+        if self.requiere_pago is not None:
+            m["req_pago"] = int(np.count_nonzero(tomar(self.requiere_pago)))
+            m["no_req_pago"] = total - m["req_pago"]
+        else:
+            m["req_pago"], m["no_req_pago"] = 0, 0
+
+        # Valor esperado
+        valor = tomar(self.valor_esperado)
+        m["valor_esperado_total"] = float(np.nansum(valor)) if valor is not None else 0
+
+        return m
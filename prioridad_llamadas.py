@@ -0,0 +1,127 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - PRIORIDAD DE LLAMADAS                                   ║
+║  Top-K por criterio sin ordenar el dataset filtrado                           ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Por cada versión del dataset se guarda, para cada criterio de "Gestionar
+Llamadas", la permutación de filas de mayor a menor (NaN al final). El top-K
+de una combinación de filtros se obtiene:
+
+    - Sin filtros: los K primeros de la permutación, O(K)
+    - Filtro amplio: recorriendo la permutación por bloques hasta juntar K
+      filas que pasan el filtro, O(K · n / m)
+    - Filtro estrecho: np.argpartition sobre los m valores filtrados, O(m)
+
+Uso:
+    orden = OrdenLlamadas.construir(df)
+    top = orden.top_k("Saldo mora (mayor)", 20, posiciones)
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+# criterio → columnas candidatas (la primera que exista)
+CRITERIOS: Dict[str, Tuple[str, ...]] = {
+    "Valor esperado (mayor)": ("valor_esperado_ML", "valor_esperado_SIMULADO"),
+    "Probabilidad (mayor)": ("probabilidad_pago_ML", "probabilidad_pago_SIMULADA"),
+    "Días mora (mayor)": ("dias mora",),
+    "Saldo mora (mayor)": ("Saldo en mora",),
+}
+
+_BLOQUE_MINIMO = 4096  # posiciones de la permutación revisadas por iteración
+
+# ============================================================================
+# ORDEN POR CRITERIO
+# ============================================================================
+
+
+def _orden_descendente(valores: np.ndarray) -> np.ndarray:
+    """Posiciones de mayor a menor, estable, con los NaN al final."""
+    nulos = np.isnan(valores)
+    validos = np.flatnonzero(~nulos)
+    orden = validos[np.argsort(-valores[validos], kind="stable")]
+    return np.concatenate([orden, np.flatnonzero(nulos)])
+
+
+@dataclass(frozen=True)
+class OrdenLlamadas:
+    """Permutación descendente por criterio para una versión del dataset."""
+
+    n: int
+    ordenes: Dict[str, np.ndarray]
+    valores: Dict[str, np.ndarray]
+
+    @classmethod
+    def construir(cls, df: pd.DataFrame) -> "OrdenLlamadas":
+        ordenes, valores = {}, {}
+        for criterio, columnas in CRITERIOS.items():
+            col = next((c for c in columnas if c in df.columns), None)
+            if col is None:
+                continue
+            v = pd.to_numeric(df[col], errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+            valores[criterio] = v
+            ordenes[criterio] = _orden_descendente(v)
+        return cls(n=len(df), ordenes=ordenes, valores=valores)
+
+    def top_k(
+        self, criterio: str, k: int, posiciones: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Posiciones de las K filas con mayor valor del criterio.
+
+        Args:
+            criterio: Una de las claves de CRITERIOS
+            k: Filas a devolver
+            posiciones: Filas que pasan los filtros (None = todas)
+
+        Returns:
+            Posiciones en el dataset completo, de mayor a menor. Si el
+            criterio no tiene columna, las K primeras filas filtradas.
+        """
+        todas = posiciones is None or len(posiciones) == self.n
+        if criterio not in self.ordenes:
+            return np.arange(min(k, self.n)) if todas else posiciones[:k]
+
+        orden = self.ordenes[criterio]
+        if todas:
+            return orden[:k]
+
+        m = len(posiciones)
+        if m * m < k * self.n:
+            # Filtro estrecho: seleccionar directamente entre las m filas
+            return posiciones[_top_k_parcial(self.valores[criterio][posiciones], k)]
+
+        # Filtro amplio: la permutación trae en promedio una fila útil cada n/m
+        pasa = np.zeros(self.n, dtype=bool)
+        pasa[posiciones] = True
+        elegidas, inicio = [], 0
+        bloque = max(_BLOQUE_MINIMO, 2 * k * self.n // max(m, 1))
+        faltan = k
+        while faltan > 0 and inicio < self.n:
+            tramo = orden[inicio : inicio + bloque]
+            utiles = tramo[pasa[tramo]][:faltan]
+            elegidas.append(utiles)
+            faltan -= len(utiles)
+            inicio += bloque
+        return np.concatenate(elegidas) if elegidas else np.empty(0, dtype=np.intp)
+
+
+def _top_k_parcial(valores: np.ndarray, k: int) -> np.ndarray:
+    """Índices de los k mayores (NaN al final) con argpartition, de mayor a menor."""
+    if len(valores) <= k:
+        return _orden_descendente(valores)
+    claves = np.where(np.isnan(valores), -np.inf, valores)
+    parte = np.argpartition(-claves, k - 1)[:k]
+    # Orden estable dentro del top (desempate por posición, como la permutación)
+    parte = np.sort(parte)
+    return parte[np.argsort(-claves[parte], kind="stable")]
@@ -0,0 +1,245 @@
+"""
+╔═══════════════════════════════════════════════════════════════════════════════╗
+║  VOICEBOT COBRANZAS - SERVIDOR SHEETS LOCAL                                   ║
+║  Sustituto local del Apps Script para pruebas de sincronización               ║
+╚═══════════════════════════════════════════════════════════════════════════════╝
+
+Sirve las filas de `sample_data.csv` (replicadas hasta --filas) con el mismo
+contrato que el Apps Script, más el protocolo de revisiones:
+
+    GET /exec                        → lista completa de registros
+    GET /exec?accion=version         → {"revision": N}
+    GET /exec?accion=cambios&desde=M → {"revision": N, "completo": false,
+                                        "filas": [...], "eliminadas": [...]}
+    GET /exec?accion=pagina&offset=O&limite=L
+                                     → {"revision": N, "total": T,
+                                        "columnas": [...], "filas": [[...], ...]}
+    GET /exec?sheet=notificaciones   → []
+
+Uso:
+    python3 servidor_sheets_local.py --filas 50000 --cambios-cada 10
+    APPS_SCRIPT_URL=http://127.0.0.1:8765/exec streamlit run dashboard.py
+"""
+
+import csv
+import json
+import random
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from fuente_sheets import ACCION_CAMBIOS, ACCION_PAGINA, ACCION_VERSION, COLUMNAS_CLAVE
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+CSV_EJEMPLO = Path(__file__).resolve().parent / "sample_data.csv"
+HISTORIAL_MAXIMO = 1000  # revisiones con delta disponible; más atrás → completo
+
+# ============================================================================
+# HOJA EN MEMORIA
+# ============================================================================
+
+
+class HojaLocal:
+    """Filas de la hoja con la revisión en que cambió cada una."""
+
+    def __init__(self, filas: int = 0, ruta_csv: Path = CSV_EJEMPLO, seed: int = 42):
+        with open(ruta_csv, encoding="utf-8") as f:
+            base = list(csv.DictReader(f))
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.revision = 1
+        self.registros: List[dict] = []
+        self.modificada: Dict[tuple, int] = {}
+        self.eliminadas: List[tuple] = []  # (revision, clave)
+
+        for i in range(max(filas, len(base))):
+            fila = dict(base[i % len(base)])
+            if i >= len(base):
+                fila["unique_user_id"] = f"LOCAL{i:08d}"
+                fila["OBLIGACION"] = str(900000000 + i)
+                fila["cedula"] = str(10000000 + i)
+            self.registros.append(fila)
+            self.modificada[self._clave(fila)] = 1
+
+    @staticmethod
+    def _clave(fila: dict) -> tuple:
+        return tuple(str(fila.get(c)) for c in COLUMNAS_CLAVE)
+
+    def mutar(self, cantidad: int = 1, insertar: int = 0, eliminar: int = 0):
+        """Modifica, inserta y elimina filas en una nueva revisión."""
+        with self._lock:
+            self.revision += 1
+            for fila in self._rng.sample(self.registros, min(cantidad, len(self.registros))):
+                fila["dias mora"] = str(int(float(fila.get("dias mora") or 0)) + 1)
+                fila["Saldo en mora"] = str(self._rng.randint(50_000, 5_000_000))
+                self.modificada[self._clave(fila)] = self.revision
+
+            for _ in range(eliminar):
+                fila = self.registros.pop(self._rng.randrange(len(self.registros)))
+                del self.modificada[self._clave(fila)]
+                self.eliminadas.append((self.revision, self._clave(fila)))
+
+            for _ in range(insertar):
+                fila = dict(self._rng.choice(self.registros))
+                fila["unique_user_id"] = f"NUEVO{self.revision:06d}{self._rng.randrange(10**6):06d}"
+                self.registros.append(fila)
+                self.modificada[self._clave(fila)] = self.revision
+
+    def cambios(self, desde: int) -> dict:
+        """Delta desde la revisión `desde` (o completo si ya no hay historial)."""
+        with self._lock:
+            if desde < self.revision - HISTORIAL_MAXIMO:
+                return {"revision": self.revision, "completo": True}
+            return {
+                "revision": self.revision,
+                "completo": False,
+                "filas": [
+                    dict(r) for r in self.registros if self.modificada[self._clave(r)] > desde
+                ],
+                "eliminadas": [list(c) for rev, c in self.eliminadas if rev > desde],
+            }
+
+    def completo(self) -> List[dict]:
+        with self._lock:
+            return [dict(r) for r in self.registros]
+
+    def pagina(self, offset: int, limite: int) -> dict:
+        """Página columnar: nombres de columna una vez y filas como listas."""
+        with self._lock:
+            columnas = list(self.registros[0].keys()) if self.registros else []
+            filas = self.registros[offset : offset + limite]
+            return {
+                "revision": self.revision,
+                "total": len(self.registros),
+                "columnas": columnas,
+                "filas": [[r.get(c) for c in columnas] for r in filas],
+            }
+
+
+# ============================================================================
+# SERVIDOR HTTP
+# ============================================================================
+
+
+class ServidorSheetsLocal:
+    """Servidor HTTP en un hilo; cuenta peticiones y bytes enviados."""
+
+    def __init__(
+        self,
+        hoja: HojaLocal,
+        puerto: int = 0,
+        protocolo: bool = True,
+        latencia: float = 0.0,
+    ):
+        self.hoja = hoja
+        self.protocolo = protocolo
+        self.latencia = latencia  # segundos de espera por petición
+        self.fallos_pagina: Dict[int, int] = {}  # offset → veces que debe fallar
+        self.peticiones: Dict[str, int] = {}
+        self.bytes_enviados = 0
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", puerto), self._manejador())
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}/exec"
+
+    def _manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                if servidor.latencia:
+                    time.sleep(servidor.latencia)
+                accion = params.get("accion") if servidor.protocolo else None
+
+                if params.get("sheet") == "notificaciones":
+                    tipo, respuesta = "notificaciones", []
+                elif accion == ACCION_VERSION:
+                    tipo, respuesta = "version", {"revision": servidor.hoja.revision}
+                elif accion == ACCION_CAMBIOS:
+                    tipo = "cambios"
+                    respuesta = servidor.hoja.cambios(int(params.get("desde") or 0))
+                elif accion == ACCION_PAGINA:
+                    tipo = "pagina"
+                    offset = int(params.get("offset") or 0)
+                    if servidor.fallos_pagina.get(offset):
+                        servidor.fallos_pagina[offset] -= 1
+                        servidor.peticiones["fallos"] = servidor.peticiones.get("fallos", 0) + 1
+                        self.send_error(503)
+                        return
+                    respuesta = servidor.hoja.pagina(offset, int(params.get("limite") or 1000))
+                else:
+                    tipo, respuesta = "completo", servidor.hoja.completo()
+
+                cuerpo = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+                servidor.peticiones[tipo] = servidor.peticiones.get(tipo, 0) + 1
+                servidor.bytes_enviados += len(cuerpo)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, formato, *args):
+                pass
+
+        return Manejador
+
+    def iniciar(self) -> "ServidorSheetsLocal":
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita el Apps Script")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--filas", type=int, default=1000)
+    parser.add_argument("--cambios-cada", type=float, default=0, help="segundos (0 = nunca)")
+    parser.add_argument("--filas-por-cambio", type=int, default=5)
+    parser.add_argument("--latencia", type=float, default=0, help="segundos por petición")
+    parser.add_argument("--sin-protocolo", action="store_true", help="solo descarga completa")
+    args = parser.parse_args()
+
+    hoja = HojaLocal(filas=args.filas)
+    servidor = ServidorSheetsLocal(
+        hoja, args.puerto, protocolo=not args.sin_protocolo, latencia=args.latencia
+    ).iniciar()
+    print(f"🚀 Sirviendo {len(hoja.registros):,} filas en {servidor.url}")
+
+    try:
+        while True:
+            time.sleep(args.cambios_cada or 60)
+            if args.cambios_cada:
+                hoja.mutar(args.filas_por_cambio)
+            print(
+                f"📊 rev {hoja.revision} | peticiones {servidor.peticiones} | "
+                f"{servidor.bytes_enviados / 1e6:.1f} MB enviados"
+            )
+    except KeyboardInterrupt:
+        servidor.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Test script para verificar los bins de agregados_graficos en los bordes
+(valores justo por debajo del máximo, máximo exacto, mínimo)
+"""
+
+import numpy as np
+
+from agregados_graficos import codigos_bin, codigos_histograma, densidad_2d
+
+
+def test_bordes_bin():
+    """Ningún valor dentro del rango sale del último bin"""
+    casos = [
+        (np.array([np.nextafter(100, 0), 100.0, 0.0]), 40, (0, 100)),
+        (np.array([np.nextafter(1.0, 0), 1.0]), 25, (0.0, 1.0)),
+        (np.array([np.nextafter(0.3, 0), 0.3, 0.1]), 7, (0.1, 0.3)),
+    ]
+    for valores, bins, rango in casos:
+        codigos = codigos_bin(valores, bins, rango)
+        assert codigos.max() == bins - 1 and codigos.min() >= 0, (valores, codigos)
+        esperado, _ = np.histogram(valores, bins=bins, range=rango)
+        assert (np.bincount(codigos, minlength=bins) == esperado).all(), (valores, codigos)
+
+    valores = np.array([np.nan, -1.0, 101.0, np.nextafter(100, 0)])
+    codigos = codigos_histograma(valores, 40, (0, 100))
+    assert codigos.tolist() == [-1, -1, -1, 39], codigos
+    print("✅ Bordes: máximo y valores justo por debajo en el último bin")
+    return True
+
+
+def test_densidad_2d_bordes():
+    """La densidad 2-D coincide con np.histogram2d con puntos en el borde superior"""
+    rng = np.random.default_rng(0)
+    x = np.concatenate([rng.uniform(0, 100, 1000), [np.nextafter(100, 0), 100.0]])
+    y = np.concatenate([rng.uniform(0, 1, 1000), [np.nextafter(1.0, 0), np.nextafter(1.0, 0)]])
+    rango = ((0, 100), (0, 1))
+    densidad = densidad_2d(x, y, bins=(40, 25), rango=rango)
+    esperado, _, _ = np.histogram2d(x, y, bins=(40, 25), range=rango)
+    assert (densidad.conteos == esperado).all()
+    print(f"✅ Densidad 2-D igual a np.histogram2d ({int(densidad.conteos.sum())} puntos)")
+    return True
+
+
+if __name__ == "__main__":
+    test_bordes_bin()
+    test_densidad_2d_bordes()
@@ -0,0 +1,49 @@
+"""
+Test script para verificar que cada formato de exportación es aceptado por
+st.download_button (mismo conversor que usa Streamlit para el callable diferido)
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from exportador import exportar, formatos_disponibles
+
+
+def datos_prueba(filas: int = 1200) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "cedula": [str(1000 + i // 2) for i in range(filas)],
+            "name": [f"Cliente {i}" for i in range(filas)],
+            "dias mora": np.arange(filas) % 120,
+            "Saldo en mora": np.linspace(0, 5e6, filas),
+            "probabilidad_pago_ML": np.where(np.arange(filas) % 7, 0.4, np.nan),
+        }
+    )
+
+
+def test_formatos_descargables():
+    """Cada formato pasa por el conversor de Streamlit y se puede releer"""
+    df = datos_prueba()
+    posiciones = np.flatnonzero(~df["cedula"].duplicated().to_numpy())
+    for formato in formatos_disponibles():
+        contenido = exportar(df, formato, posiciones, filas_por_bloque=250)
+        datos, _ = convert_data_to_bytes_and_infer_mime(
+            contenido, unsupported_error=TypeError(f"{formato}: tipo no soportado")
+        )
+        if formato == "CSV":
+            leido = pd.read_csv(io.BytesIO(datos), dtype={"cedula": str})
+        elif formato == "Parquet":
+            leido = pd.read_parquet(io.BytesIO(datos))
+        else:
+            leido = pd.read_excel(io.BytesIO(datos), dtype={"cedula": str})
+        assert len(leido) == len(posiciones), (formato, len(leido))
+        assert leido["cedula"].tolist() == df["cedula"].iloc[posiciones].tolist(), formato
+        print(f"✅ {formato}: {len(datos):,} bytes, {len(leido):,} filas")
+    return True
+
+
+if __name__ == "__main__":
+    test_formatos_descargables()
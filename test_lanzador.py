@@ -0,0 +1,141 @@
+"""
+Test script para verificar la política de reintentos del lanzador de llamadas
+contra un webhook local, por la ruta aiohttp y por la de requests
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import lanzador_llamadas
+from lanzador_llamadas import CANCELADA, FALLIDA, INICIADA, LanzamientoLlamadas
+
+
+class WebhookLocal:
+    """Webhook de llamadas en 127.0.0.1; la respuesta depende de la cédula"""
+
+    def __init__(self):
+        self.peticiones = Counter()
+        self.claves = {}
+        lock = threading.Lock()
+        webhook = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_POST(self):
+                cuerpo = self.rfile.read(int(self.headers["Content-Length"]))
+                cedula = json.loads(cuerpo)["cedula"]
+                with lock:
+                    webhook.peticiones[cedula] += 1
+                    vez = webhook.peticiones[cedula]
+                    webhook.claves.setdefault(cedula, set()).add(self.headers["Idempotency-Key"])
+
+                cabeceras = {}
+                if cedula == "503-espera":  # ocupado una vez, con Retry-After
+                    codigo = 503 if vez == 1 else 200
+                    cabeceras["Retry-After"] = "0"
+                elif cedula == "429-sin-espera":
+                    codigo = 429
+                elif cedula == "500":
+                    codigo = 500
+                elif cedula == "lenta":  # el webhook la acepta pero responde tarde
+                    time.sleep(1.0)
+                    codigo = 200
+                else:
+                    codigo = 200
+
+                try:
+                    self.send_response(codigo)
+                    for nombre, valor in cabeceras.items():
+                        self.send_header(nombre, valor)
+                    self.send_header("Content-Length", "2")
+                    self.end_headers()
+                    self.wfile.write(b"{}")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # el cliente ya cortó por timeout
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}/webhook"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def detener(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+def _lanzar(url, cedulas, **kwargs):
+    lanzamiento = LanzamientoLlamadas(
+        cedulas, url=url, por_segundo=100, timeout=0.5, **kwargs
+    ).iniciar()
+    assert lanzamiento.esperar(timeout=30), "el lanzamiento no terminó"
+    return {r["CC"]: r for r in lanzamiento.tabla().to_dict("records")}
+
+
+def _probar_ruta(nombre: str, usar_aiohttp: bool):
+    print(f"🔄 Probando envío por {nombre}...")
+    original = lanzador_llamadas.AIOHTTP_AVAILABLE
+    lanzador_llamadas.AIOHTTP_AVAILABLE = usar_aiohttp
+    lanzador_llamadas.PAUSA_BASE = 0.01
+    webhook = WebhookLocal()
+    try:
+        cedulas = ["100", "100", "503-espera", "429-sin-espera", "500", "lenta"]
+        filas = _lanzar(webhook.url, cedulas)
+
+        # Duplicados del lote: una sola petición
+        assert filas["100"]["Estado"] == INICIADA and webhook.peticiones["100"] == 1
+        # 503 con Retry-After: se reintenta con la misma clave
+        assert filas["503-espera"]["Estado"] == INICIADA
+        assert webhook.peticiones["503-espera"] == 2
+        assert len(webhook.claves["503-espera"]) == 1
+        # 429 sin Retry-After, 5xx y timeout: la llamada pudo crearse, no se reintenta
+        for cedula in ("429-sin-espera", "500", "lenta"):
+            assert filas[cedula]["Estado"] == FALLIDA, (cedula, filas[cedula])
+            assert webhook.peticiones[cedula] == 1, (cedula, webhook.peticiones[cedula])
+
+        # Un lanzamiento nuevo vuelve a llamar (clave nueva)
+        filas = _lanzar(webhook.url, ["100"])
+        assert filas["100"]["Estado"] == INICIADA and webhook.peticiones["100"] == 2
+        assert len(webhook.claves["100"]) == 2
+
+        # Con un webhook que deduplica, el 5xx sí se reintenta
+        filas = _lanzar(webhook.url, ["500"], reintentos=2, webhook_idempotente=True)
+        assert filas["500"]["Intentos"] == 3 and webhook.peticiones["500"] == 4
+
+        # Conexión rechazada: la petición no salió, se reintenta
+        webhook.detener()
+        filas = _lanzar(webhook.url, ["200"], reintentos=2)
+        assert filas["200"]["Estado"] == FALLIDA and filas["200"]["Intentos"] == 3
+
+        # Cancelar antes de enviar
+        lanzamiento = LanzamientoLlamadas(["1", "2"], url=webhook.url, por_segundo=0.5)
+        lanzamiento.cancelar()
+        lanzamiento.iniciar().esperar(timeout=10)
+        assert set(lanzamiento.resumen()) == {CANCELADA}
+
+        print(f"✅ {nombre}: {dict(webhook.peticiones)}")
+        return True
+    finally:
+        lanzador_llamadas.AIOHTTP_AVAILABLE = original
+        webhook.servidor.server_close()
+
+
+def test_envio_aiohttp():
+    """Ruta asíncrona con aiohttp"""
+    if not lanzador_llamadas.AIOHTTP_AVAILABLE:
+        print("⚠️ aiohttp no está instalado, se omite")
+        return None
+    return _probar_ruta("aiohttp", usar_aiohttp=True)
+
+
+def test_envio_requests():
+    """Ruta con requests (CLIENTE_HTTP) en un pool de hilos"""
+    return _probar_ruta("requests", usar_aiohttp=False)
+
+
+if __name__ == "__main__":
+    test_envio_aiohttp()
+    test_envio_requests()
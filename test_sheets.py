@@ -50,5 +50,105 @@ def test_connection():
         print(f"❌ Error: {str(e)}")
         return False
 
+def test_sincronizacion_local():
+    """Prueba el protocolo de revisiones contra el servidor local (sin red)"""
+    from fuente_sheets import SincronizadorSheets
+    from servidor_sheets_local import HojaLocal, ServidorSheetsLocal
+
+    print("🔄 Probando sincronización contra el servidor local...")
+    hoja = HojaLocal(filas=2000)
+    servidor = ServidorSheetsLocal(hoja).iniciar()
+    try:
+        sync = SincronizadorSheets(servidor.url)
+
+        datos, huella, error = sync.sincronizar()
+        assert error is None and len(datos) == 2000, error
+        bytes_completo = servidor.bytes_enviados
+
+        # Sin cambios: solo la consulta de revisión
+        datos2, huella2, _ = sync.sincronizar()
+        assert datos2 is datos and huella2 == huella
+        assert servidor.peticiones["pagina"] == 1
+
+        # Cambios: solo el delta
+        hoja.mutar(cantidad=10, insertar=2, eliminar=3)
+        antes = servidor.bytes_enviados
+        datos3, huella3, _ = sync.sincronizar()
+        assert huella3 != huella and servidor.peticiones["pagina"] == 1
+        assert datos3 == hoja.completo(), "la copia local no coincide con la hoja"
+        print(f"✅ Delta: {servidor.bytes_enviados - antes:,} bytes (completo: {bytes_completo:,})")
+        print(f"📊 Peticiones: {servidor.peticiones} | {sync.estadisticas}")
+        return True
+    finally:
+        servidor.detener()
+
+
+def test_version_transitoria_local():
+    """Un timeout al consultar la versión no desactiva el protocolo de revisiones"""
+    import requests
+    from fuente_sheets import SincronizadorSheets
+    from servidor_sheets_local import HojaLocal, ServidorSheetsLocal
+
+    print("🔄 Probando fallo transitorio de la consulta de versión...")
+    hoja = HojaLocal(filas=500)
+    servidor = ServidorSheetsLocal(hoja).iniciar()
+    try:
+        sync = SincronizadorSheets(servidor.url)
+        sesion = sync._sesion
+
+        class SesionConTimeout:
+            """Falla la primera consulta de versión como un timeout de red"""
+
+            fallos = 1
+
+            def get(self, url, **kwargs):
+                if kwargs.get("params", {}).get("accion") == "version" and self.fallos:
+                    self.fallos -= 1
+                    raise requests.Timeout("timeout simulado")
+                return sesion.get(url, **kwargs)
+
+        sync._sesion = SesionConTimeout()
+        datos, _, error = sync.sincronizar()
+        assert error is None and len(datos) == 500, error
+        assert sync._soporta_protocolo is None, "un timeout no prueba que falte el protocolo"
+
+        # El ciclo siguiente vuelve a usar revisiones y deltas
+        sync.sincronizar()
+        hoja.mutar(cantidad=5)
+        datos, _, _ = sync.sincronizar()
+        assert sync._soporta_protocolo and sync.estadisticas["deltas"] == 1
+        assert datos == hoja.completo(), "la copia local no coincide con la hoja"
+        print(f"✅ Protocolo activo tras el timeout | {sync.estadisticas}")
+        return True
+    finally:
+        servidor.detener()
+
+
+def test_descarga_paginada_local():
+    """Prueba la descarga paginada en paralelo con una página que falla una vez"""
+    import time
+    from fuente_sheets import descargar_paginado
+    from servidor_sheets_local import HojaLocal, ServidorSheetsLocal
+
+    print("🔄 Probando descarga paginada contra el servidor local...")
+    hoja = HojaLocal(filas=12000)
+    servidor = ServidorSheetsLocal(hoja, latencia=0.2).iniciar()
+    servidor.fallos_pagina[4000] = 1
+    try:
+        t0 = time.perf_counter()
+        datos, huella, error = descargar_paginado(servidor.url, tamano_pagina=2000, hilos=4)
+        segundos = time.perf_counter() - t0
+        assert error is None, error
+        assert datos == hoja.completo(), "las páginas no se reensamblaron en orden"
+        assert servidor.peticiones == {"pagina": 6, "fallos": 1}, servidor.peticiones
+        print(f"✅ {len(datos):,} filas en {segundos:.2f}s | {servidor.peticiones} | {huella}")
+        return True
+    finally:
+        servidor.detener()
+
+
 if __name__ == "__main__":
+    test_descarga_paginada_local()
+    test_sincronizacion_local()
+    test_version_transitoria_local()
     test_connection()
\ No newline at end of file